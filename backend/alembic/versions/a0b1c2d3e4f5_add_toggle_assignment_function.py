@@ -0,0 +1,115 @@
+"""add toggle_line_item_assignment function
+
+Revision ID: a0b1c2d3e4f5
+Revises: f9a0b1c2d3e4
+Create Date: 2026-10-16 20:00:00.000000
+
+Server-side version of assignment_service.toggle_assignment, so a tap on a
+member chip costs one round trip. Shares are split the way
+currency_utils.compute_shares does it (seed = line item id), for both
+remainder orders: split_version 1 sorts by md5(seed:uid), version 2 rotates
+the str-sorted users by the first 32 bits of md5("v2:" + seed).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a0b1c2d3e4f5'
+down_revision: Union[str, None] = 'f9a0b1c2d3e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION toggle_line_item_assignment(
+            p_receipt_id uuid,
+            p_line_item_id uuid,
+            p_user_id uuid,
+            p_expected_version integer,
+            p_new_id uuid
+        ) RETURNS TABLE (
+            new_version integer,
+            assigned boolean,
+            group_id uuid,
+            receipt_id uuid,
+            receipt_date date,
+            created_at timestamptz,
+            exchange_rate numeric,
+            line_item_id uuid,
+            amount numeric,
+            assignment_id uuid,
+            user_id uuid,
+            share_amount numeric
+        )
+        LANGUAGE plpgsql VOLATILE AS $$
+        #variable_conflict use_column
+        DECLARE
+            v_version integer;
+            v_split integer;
+            v_cents bigint;
+            v_assigned boolean;
+        BEGIN
+            -- Locks the receipt, so concurrent toggles queue up here; each statement
+            -- below then sees what the previous toggle committed
+            UPDATE receipts r SET version = r.version + 1
+            WHERE r.id = p_receipt_id
+              AND (p_expected_version IS NULL OR r.version = p_expected_version)
+              AND EXISTS (SELECT 1 FROM line_items li WHERE li.id = p_line_item_id AND li.receipt_id = r.id)
+            RETURNING r.version, r.split_version INTO v_version, v_split;
+            IF NOT FOUND THEN
+                RETURN;  -- version conflict, or no such receipt / line item
+            END IF;
+
+            SELECT round(li.amount * 100)::bigint INTO v_cents
+            FROM line_items li WHERE li.id = p_line_item_id;
+
+            DELETE FROM line_item_assignments a
+            WHERE a.line_item_id = p_line_item_id AND a.user_id = p_user_id;
+            v_assigned := NOT FOUND;
+            IF v_assigned THEN
+                INSERT INTO line_item_assignments (id, line_item_id, user_id, share_amount)
+                VALUES (p_new_id, p_line_item_id, p_user_id, 0);
+            END IF;
+
+            -- Floor division and modulo as in Python, so negative amounts split the same way
+            UPDATE line_item_assignments a
+            SET share_amount = (s.base + CASE WHEN s.pos < v_cents - s.base * s.n THEN 1 ELSE 0 END)::numeric / 100
+            FROM (
+                SELECT o.id, o.n,
+                       floor(v_cents::numeric / o.n)::bigint AS base,
+                       CASE WHEN v_split = 2 THEN
+                           mod(mod(o.str_rank - mod(
+                               ('x' || lpad(substr(md5('v2:' || p_line_item_id::text), 1, 8), 16, '0'))::bit(64)::bigint,
+                               o.n), o.n) + o.n, o.n)
+                       ELSE o.hash_rank END AS pos
+                FROM (
+                    SELECT a.id,
+                           count(*) OVER () AS n,
+                           row_number() OVER (ORDER BY a.user_id::text COLLATE "C") - 1 AS str_rank,
+                           row_number() OVER (
+                               ORDER BY md5(p_line_item_id::text || ':' || a.user_id::text) COLLATE "C"
+                           ) - 1 AS hash_rank
+                    FROM line_item_assignments a
+                    WHERE a.line_item_id = p_line_item_id
+                ) o
+            ) s
+            WHERE a.id = s.id;
+
+            -- The receipt's rows as ledger_service._collect_contributions selects them
+            RETURN QUERY
+            SELECT v_version, v_assigned, r.group_id, r.id, r.receipt_date, r.created_at,
+                   r.exchange_rate, li.id, li.amount, a.id, a.user_id, a.share_amount
+            FROM receipts r
+            JOIN line_items li ON li.receipt_id = r.id
+            LEFT JOIN line_item_assignments a ON a.line_item_id = li.id
+            WHERE r.id = p_receipt_id;
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS toggle_line_item_assignment(uuid, uuid, uuid, integer, uuid)")
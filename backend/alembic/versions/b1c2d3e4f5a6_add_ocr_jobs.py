@@ -0,0 +1,51 @@
+"""add ocr jobs queue
+
+Revision ID: b1c2d3e4f5a6
+Revises: a0b1c2d3e4f5
+Create Date: 2026-10-16 21:00:00.000000
+
+Receipts left in 'processing' by the old in-process background tasks are
+picked up by the worker's stuck-receipt reclaim, so no backfill is needed.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1c2d3e4f5a6'
+down_revision: Union[str, None] = 'a0b1c2d3e4f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ocr_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('receipt_id', sa.UUID(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=True),
+    sa.Column('status', sa.Enum('queued', 'running', 'done', 'failed', name='ocrjobstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('run_after', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+    sa.Column('locked_by', sa.String(), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['receipt_id'], ['receipts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ocr_jobs_receipt_id'), 'ocr_jobs', ['receipt_id'], unique=False)
+    op.create_index('ix_ocr_jobs_queued_run_after', 'ocr_jobs', ['run_after'], postgresql_where=sa.text("status = 'queued'"))
+    op.create_index('ix_ocr_jobs_running_lease', 'ocr_jobs', ['lease_expires_at'], postgresql_where=sa.text("status = 'running'"))
+    op.create_index(
+        'uq_ocr_jobs_live_receipt', 'ocr_jobs', ['receipt_id'], unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ocr_jobs')
+    sa.Enum(name='ocrjobstatus').drop(op.get_bind(), checkfirst=True)
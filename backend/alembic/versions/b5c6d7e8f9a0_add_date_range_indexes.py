@@ -0,0 +1,44 @@
+"""add date range indexes
+
+Revision ID: b5c6d7e8f9a0
+Revises: a4b5c6d7e8f9
+Create Date: 2026-10-16 15:00:00.000000
+
+Built CONCURRENTLY outside the migration transaction so writes to receipts
+and settlements are not blocked. If a build is interrupted Postgres leaves an
+INVALID index behind; downgrade (or DROP INDEX CONCURRENTLY) it and rerun the
+upgrade.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5c6d7e8f9a0'
+down_revision: Union[str, None] = 'a4b5c6d7e8f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_receipts_group_id_receipt_date', 'receipts', ['group_id', 'receipt_date'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_receipts_group_id_created_at', 'receipts', ['group_id', 'created_at'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_settlements_group_id_settled_at', 'settlements', ['group_id', 'settled_at'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_settlements_group_id_settled_at', table_name='settlements', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_receipts_group_id_created_at', table_name='receipts', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_receipts_group_id_receipt_date', table_name='receipts', postgresql_concurrently=True, if_exists=True)
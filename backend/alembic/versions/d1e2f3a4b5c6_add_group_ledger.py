@@ -0,0 +1,85 @@
+"""add group ledger
+
+Revision ID: d1e2f3a4b5c6
+Revises: 20cb291f1ef7
+Create Date: 2026-10-16 09:00:00.000000
+
+Backfills from existing rows in SQL. Postgres numeric division keeps fewer
+digits than Python's Decimal context, so run `python -m scripts.rebuild_group_ledger`
+afterwards to bring every group to the exact Python figures.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1e2f3a4b5c6'
+down_revision: Union[str, None] = '20cb291f1ef7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('groups', sa.Column('ledger_spent_cents', sa.BigInteger(), nullable=False, server_default='0'))
+    op.create_table('group_ledger',
+    sa.Column('group_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('spent', sa.Numeric(), nullable=False, server_default='0'),
+    sa.Column('assignment_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('paid', sa.Numeric(), nullable=False, server_default='0'),
+    sa.Column('settled_out', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'),
+    sa.Column('settled_in', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('group_id', 'user_id')
+    )
+
+    op.execute("""
+        INSERT INTO group_ledger (group_id, user_id, spent, assignment_count)
+        SELECT r.group_id, a.user_id,
+               sum(li.amount / n.user_count * r.exchange_rate), count(*)
+        FROM line_item_assignments a
+        JOIN line_items li ON li.id = a.line_item_id
+        JOIN receipts r ON r.id = li.receipt_id
+        JOIN (
+            SELECT line_item_id, count(*) AS user_count
+            FROM line_item_assignments GROUP BY line_item_id
+        ) n ON n.line_item_id = a.line_item_id
+        GROUP BY r.group_id, a.user_id
+    """)
+    op.execute("""
+        INSERT INTO group_ledger (group_id, user_id, paid)
+        SELECT r.group_id, p.paid_by, sum(p.amount * r.exchange_rate)
+        FROM payments p JOIN receipts r ON r.id = p.receipt_id
+        GROUP BY r.group_id, p.paid_by
+        ON CONFLICT (group_id, user_id) DO UPDATE SET paid = excluded.paid
+    """)
+    op.execute("""
+        INSERT INTO group_ledger (group_id, user_id, settled_out)
+        SELECT group_id, from_user, sum(amount) FROM settlements
+        WHERE is_settled GROUP BY group_id, from_user
+        ON CONFLICT (group_id, user_id) DO UPDATE SET settled_out = excluded.settled_out
+    """)
+    op.execute("""
+        INSERT INTO group_ledger (group_id, user_id, settled_in)
+        SELECT group_id, to_user, sum(amount) FROM settlements
+        WHERE is_settled GROUP BY group_id, to_user
+        ON CONFLICT (group_id, user_id) DO UPDATE SET settled_in = excluded.settled_in
+    """)
+    op.execute("""
+        UPDATE groups g SET ledger_spent_cents = c.cents
+        FROM (
+            SELECT r.group_id, sum(trunc(li.amount * r.exchange_rate * 100))::bigint AS cents
+            FROM line_items li JOIN receipts r ON r.id = li.receipt_id
+            WHERE EXISTS (SELECT 1 FROM line_item_assignments a WHERE a.line_item_id = li.id)
+            GROUP BY r.group_id
+        ) c
+        WHERE g.id = c.group_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('group_ledger')
+    op.drop_column('groups', 'ledger_spent_cents')
@@ -0,0 +1,51 @@
+"""add partial indexes for hot queries
+
+Revision ID: d7e8f9a0b1c2
+Revises: c6d7e8f9a0b1
+Create Date: 2026-10-16 17:00:00.000000
+
+Built CONCURRENTLY outside the migration transaction so writes are not
+blocked. If a build is interrupted Postgres leaves an INVALID index behind;
+downgrade (or DROP INDEX CONCURRENTLY) it and rerun the upgrade.
+
+list_receipts' (group_id, created_at) ordering is already served by
+ix_receipts_group_id_created_at (b5c6d7e8f9a0) via a backward index scan.
+Check the plans with `python -m scripts.check_query_plans`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e8f9a0b1c2'
+down_revision: Union[str, None] = 'c6d7e8f9a0b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_receipts_pending_group_id_created_at', 'receipts',
+            ['group_id', sa.text('created_at DESC')],
+            unique=False,
+            postgresql_where=sa.text("status IN ('processing', 'failed')"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_settlements_unsettled_created_at', 'settlements',
+            ['created_at'],
+            unique=False,
+            postgresql_where=sa.text('is_settled = false'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_settlements_unsettled_created_at', table_name='settlements', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_receipts_pending_group_id_created_at', table_name='receipts', postgresql_concurrently=True, if_exists=True)
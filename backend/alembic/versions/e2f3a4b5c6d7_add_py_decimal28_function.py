@@ -0,0 +1,56 @@
+"""add py_decimal28 rounding function
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-16 11:00:00.000000
+
+Rounds a numeric the way Python's default Decimal context does (28
+significant digits, ROUND_HALF_EVEN) so set-based financial queries can
+reproduce calculation_service's Decimal arithmetic exactly.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f3a4b5c6d7'
+down_revision: Union[str, None] = 'd1e2f3a4b5c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION py_decimal28(x numeric) RETURNS numeric
+        LANGUAGE plpgsql IMMUTABLE STRICT PARALLEL SAFE AS $$
+        DECLARE
+            a numeric := abs(x);
+            int_digits integer;
+            places integer;
+            scaled numeric;
+            kept numeric;
+        BEGIN
+            IF a = 0 THEN
+                RETURN 0;
+            END IF;
+            -- Position of the leading significant digit, read from the exact text form
+            IF a >= 1 THEN
+                int_digits := length(trunc(a)::text);
+            ELSE
+                int_digits := -length(substring(a::text from '^0\\.(0*)'));
+            END IF;
+            places := 28 - int_digits;
+            scaled := a * power(10::numeric, places);
+            kept := floor(scaled);
+            IF scaled - kept > 0.5 OR (scaled - kept = 0.5 AND mod(kept, 2) = 1) THEN
+                kept := kept + 1;
+            END IF;
+            RETURN sign(x) * (kept::numeric(80, 40) / power(10::numeric, places));
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS py_decimal28(numeric)")
@@ -0,0 +1,42 @@
+"""add receipt keyset index
+
+Revision ID: e8f9a0b1c2d3
+Revises: d7e8f9a0b1c2
+Create Date: 2026-10-16 18:00:00.000000
+
+(group_id, created_at DESC, id DESC) matches the receipt listing's keyset
+order exactly and still serves created_at date ranges, so it replaces
+ix_receipts_group_id_created_at.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8f9a0b1c2d3'
+down_revision: Union[str, None] = 'd7e8f9a0b1c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_receipts_group_id_created_at_id', 'receipts',
+            ['group_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index('ix_receipts_group_id_created_at', table_name='receipts', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_receipts_group_id_created_at', 'receipts', ['group_id', 'created_at'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index('ix_receipts_group_id_created_at_id', table_name='receipts', postgresql_concurrently=True, if_exists=True)
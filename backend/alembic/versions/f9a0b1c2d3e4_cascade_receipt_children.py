@@ -0,0 +1,50 @@
+"""cascade receipt children on delete
+
+Revision ID: f9a0b1c2d3e4
+Revises: e8f9a0b1c2d3
+Create Date: 2026-10-16 19:00:00.000000
+
+Each foreign key is swapped in one ALTER (drop + add NOT VALID, which only
+needs a brief lock), then validated separately under a lock that does not
+block reads or writes. Every statement runs in its own autocommit block so
+the ALTER locks are released before the validation scans start.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f9a0b1c2d3e4'
+down_revision: Union[str, None] = 'e8f9a0b1c2d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referenced table)
+_FOREIGN_KEYS = [
+    ('line_items', 'receipt_id', 'receipts'),
+    ('line_item_assignments', 'line_item_id', 'line_items'),
+    ('payments', 'receipt_id', 'receipts'),
+]
+
+
+def _replace(on_delete: str) -> None:
+    for table, column, referenced in _FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        with op.get_context().autocommit_block():
+            op.execute(f"""
+                ALTER TABLE {table}
+                    DROP CONSTRAINT {name},
+                    ADD CONSTRAINT {name} FOREIGN KEY ({column})
+                        REFERENCES {referenced} (id) {on_delete} NOT VALID
+            """)
+        with op.get_context().autocommit_block():
+            op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {name}')
+
+
+def upgrade() -> None:
+    _replace('ON DELETE CASCADE')
+
+
+def downgrade() -> None:
+    _replace('')
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.core.auth import UserSnapshot, get_admin_user
+from app.core.slow_query_log import worst_queries, clear
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/slow-queries")
+async def slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    user: UserSnapshot = Depends(get_admin_user),
+):
+    """Slowest statements recorded by this worker since startup (or the last reset)."""
+    return worst_queries(limit)
+
+
+@router.delete("/slow-queries", status_code=204)
+async def reset_slow_queries(user: UserSnapshot = Depends(get_admin_user)):
+    clear()
@@ -3,9 +3,9 @@ import uuid
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_user
-from app.core.database import get_db
-from app.models.user import User
+from app.core.auth import UserSnapshot
+from app.core.database import get_db, get_read_db
+from app.core.membership import require_receipt_member
 from app.schemas.assignment import BulkAssignRequest, AssignmentResponse, ToggleAssignmentRequest
 from app.services.assignment_service import bulk_assign, get_assignments, toggle_assignment, assign_all_to_all
 
@@ -16,7 +16,7 @@ router = APIRouter(tags=["assignments"])
 async def assign_users(
     receipt_id: uuid.UUID,
     body: BulkAssignRequest,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_receipt_member),
     db: AsyncSession = Depends(get_db),
 ):
     result = await bulk_assign(
@@ -37,7 +37,7 @@ async def assign_all_items(
     # For simplicity let's assume last-write-wins if version not provided, but good to have.
     # Let's use a simple body model or just ignore version for this button for now to avoid UI complexity,
     # as "Assign All" is a heavy override action.
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_receipt_member),
     db: AsyncSession = Depends(get_db),
 ):
     result = await assign_all_to_all(db, receipt_id, expected_version=None)
@@ -50,7 +50,7 @@ async def assign_all_items(
 async def toggle_user_assignment(
     receipt_id: uuid.UUID,
     body: ToggleAssignmentRequest,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_receipt_member),
     db: AsyncSession = Depends(get_db),
 ):
     """Fast toggle endpoint for optimistic UI updates. Only modifies one assignment."""
@@ -66,7 +66,7 @@ async def toggle_user_assignment(
 @router.get("/api/receipts/{receipt_id}/assignments", response_model=list[AssignmentResponse])
 async def get_receipt_assignments(
     receipt_id: uuid.UUID,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: UserSnapshot = Depends(require_receipt_member),
+    db: AsyncSession = Depends(get_read_db),
 ):
     return await get_assignments(db, receipt_id)
@@ -5,7 +5,7 @@ from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_user
+from app.core.auth import UserSnapshot, get_current_user, get_current_identity, invalidate_user
 from app.core.database import get_db
 from app.models.user import User
 
@@ -46,11 +46,12 @@ async def auth_callback(
         db.add(user)
 
     await db.commit()
+    invalidate_user(user_id)
     return {"status": "ok"}
 
 
 @router.get("/me")
-async def get_me(user: User = Depends(get_current_user)):
+async def get_me(user: UserSnapshot = Depends(get_current_identity)):
     return {
         "id": str(user.id),
         "email": user.email,
@@ -65,8 +66,13 @@ async def update_profile(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    from app.services.ledger_service import bump_user_groups_version
+
     user.display_name = body.display_name
+    # Cached balances and stats embed display names
+    await bump_user_groups_version(db, user.id)
     await db.commit()
+    invalidate_user(user.id)
     return {
         "id": str(user.id),
         "email": user.email,
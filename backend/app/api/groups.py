@@ -4,9 +4,9 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_user
-from app.core.database import get_db
-from app.models.user import User
+from app.core.auth import UserSnapshot, get_current_identity
+from app.core.database import get_db, get_read_db
+from app.core.membership import require_group_member, group_member_ids, invalidate_user_groups
 from app.schemas.group import GroupCreate, GroupUpdate, GroupResponse, GroupDetailResponse, GroupListResponse, InviteResponse
 from app.services.group_service import create_group, list_user_groups, get_group, update_group, join_group_by_code, delete_group
 
@@ -16,17 +16,18 @@ router = APIRouter(prefix="/api/groups", tags=["groups"])
 @router.post("", response_model=GroupResponse, status_code=201)
 async def create(
     body: GroupCreate,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(get_current_identity),
     db: AsyncSession = Depends(get_db),
 ):
     group = await create_group(db, body.name, user, base_currency=body.base_currency)
+    invalidate_user_groups(user.id)
     return group
 
 
 @router.get("", response_model=list[GroupListResponse])
 async def list_groups(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: UserSnapshot = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_read_db),
 ):
     return await list_user_groups(db, user.id)
 
@@ -35,16 +36,17 @@ async def list_groups(
 async def get(
     group_id: uuid.UUID,
     include: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    algorithm: str = Query("greedy", pattern="^(greedy|optimal)$"),
+    user: UserSnapshot = Depends(require_group_member),
+    db: AsyncSession = Depends(get_read_db),
 ):
     if include and "balances" in include.split(","):
-        from app.services.settlement_service import calculate_balances
+        from app.services.balance_cache import get_cached_balances
 
         group = await get_group(db, group_id)
         if not group:
             raise HTTPException(status_code=404, detail="Group not found")
-        bal = await calculate_balances(db, group_id)
+        bal = await get_cached_balances(db, group_id, algorithm=algorithm)
         return GroupDetailResponse.model_validate(
             group, from_attributes=True
         ).model_copy(update={
@@ -63,7 +65,7 @@ async def get(
 async def update(
     group_id: uuid.UUID,
     body: GroupUpdate,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_group_member),
     db: AsyncSession = Depends(get_db),
 ):
     group = await update_group(db, group_id, name=body.name, base_currency=body.base_currency)
@@ -75,19 +77,21 @@ async def update(
 @router.delete("/{group_id}", status_code=204)
 async def delete(
     group_id: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_group_member),
     db: AsyncSession = Depends(get_db),
 ):
+    member_ids = await group_member_ids(db, group_id)
     try:
         await delete_group(db, group_id, user.id)
     except ValueError as e:
         raise HTTPException(status_code=403, detail=str(e))
+    invalidate_user_groups(*member_ids)
 
 
 @router.post("/{group_id}/invite", response_model=InviteResponse)
 async def invite(
     group_id: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_group_member),
     db: AsyncSession = Depends(get_db),
 ):
     group = await get_group(db, group_id)
@@ -102,20 +106,21 @@ async def invite(
 @router.post("/join/{code}", response_model=GroupResponse)
 async def join(
     code: str,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(get_current_identity),
     db: AsyncSession = Depends(get_db),
 ):
     try:
         group = await join_group_by_code(db, code, user)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    invalidate_user_groups(user.id)
     return group
 
 
 @router.delete("/{group_id}/reset", status_code=200)
 async def reset(
     group_id: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_group_member),
     db: AsyncSession = Depends(get_db),
 ):
     # Optional: Verify user is owner? For now allow any member or just rely on service
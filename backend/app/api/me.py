@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import UserSnapshot, get_current_identity
+from app.core.database import get_read_db
+from app.core.query_counter import query_budget
+from app.schemas.payment import GroupBalanceSummary
+from app.services.ledger_service import get_user_group_balances
+
+router = APIRouter(prefix="/api/me", tags=["me"])
+
+
+# Auth lookup plus the one joined balances query
+@router.get("/balances", response_model=list[GroupBalanceSummary], dependencies=[Depends(query_budget(2))])
+async def my_balances(
+    user: UserSnapshot = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Net position in every group the user belongs to (positive = owed to them)."""
+    return await get_user_group_balances(db, user.id)
@@ -1,14 +1,14 @@
 import uuid
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_user
-from app.core.database import get_db
-from app.models.user import User
+from app.core.auth import UserSnapshot
+from app.core.database import get_db, get_read_db
+from app.core.membership import require_group_member, require_receipt_member, require_payment_member
 from app.schemas.payment import PaymentCreate, PaymentResponse, BalancesResponse, SettleRequest
 from app.services.payment_service import record_payment, update_payment, delete_payment, settle_debt, clear_group_settlements
-from app.services.settlement_service import calculate_balances
+from app.services.balance_cache import get_cached_balances
 
 router = APIRouter(tags=["payments"])
 
@@ -16,8 +16,8 @@ router = APIRouter(tags=["payments"])
 @router.get("/api/receipts/{receipt_id}/payments", response_model=list[PaymentResponse])
 async def list_payments(
     receipt_id: uuid.UUID,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: UserSnapshot = Depends(require_receipt_member),
+    db: AsyncSession = Depends(get_read_db),
 ):
     from app.services.payment_service import get_receipt_payments
     return await get_receipt_payments(db, receipt_id)
@@ -27,7 +27,7 @@ async def list_payments(
 async def create_payment(
     receipt_id: uuid.UUID,
     body: PaymentCreate,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_receipt_member),
     db: AsyncSession = Depends(get_db),
 ):
     from fastapi import HTTPException
@@ -41,7 +41,7 @@ async def create_payment(
 async def edit_payment(
     payment_id: uuid.UUID,
     body: PaymentCreate,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_payment_member),
     db: AsyncSession = Depends(get_db),
 ):
     from fastapi import HTTPException
@@ -57,7 +57,7 @@ async def edit_payment(
 @router.delete("/api/payments/{payment_id}", status_code=204)
 async def remove_payment(
     payment_id: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_payment_member),
     db: AsyncSession = Depends(get_db),
 ):
     from fastapi import HTTPException
@@ -68,10 +68,11 @@ async def remove_payment(
 @router.get("/api/groups/{group_id}/balances", response_model=BalancesResponse)
 async def get_balances(
     group_id: uuid.UUID,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    algorithm: str = Query("greedy", pattern="^(greedy|optimal)$"),
+    user: UserSnapshot = Depends(require_group_member),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    result = await calculate_balances(db, group_id)
+    result = await get_cached_balances(db, group_id, algorithm=algorithm)
     return BalancesResponse(**result)
 
 
@@ -79,7 +80,7 @@ async def get_balances(
 async def settle(
     group_id: uuid.UUID,
     body: SettleRequest,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_group_member),
     db: AsyncSession = Depends(get_db),
 ):
     await settle_debt(db, group_id, body.from_user, body.to_user, body.amount)
@@ -89,7 +90,7 @@ async def settle(
 @router.delete("/api/groups/{group_id}/reset")
 async def reset_group_data(
     group_id: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_group_member),
     db: AsyncSession = Depends(get_db),
 ):
     """Delete all receipts, payments, and settlements for a group."""
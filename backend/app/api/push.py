@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, invalidate_user
 from app.core.database import get_db
 from app.models.user import User
 
@@ -22,6 +22,7 @@ async def subscribe(
 ):
     user.push_subscription = body.model_dump()
     await db.commit()
+    invalidate_user(user.id)
     return {"status": "subscribed"}
 
 
@@ -32,4 +33,5 @@ async def unsubscribe(
 ):
     user.push_subscription = None
     await db.commit()
+    invalidate_user(user.id)
     return {"status": "unsubscribed"}
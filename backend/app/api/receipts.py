@@ -1,23 +1,23 @@
 import uuid
 from typing import Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_user
-from app.core.database import get_db
-from app.models.user import User
+from app.core.auth import UserSnapshot, get_current_identity
+from app.core.database import get_db, get_read_db
+from app.core.membership import require_group_member, require_receipt_member, require_item_member, forget_receipt
 from app.schemas.receipt import (
     ReceiptCreate, ManualReceiptCreate, ReceiptResponse, ReceiptDetailResponse, ReceiptUpdate, ReceiptListResponse,
     LineItemCreate, LineItemUpdate, LineItemResponse, BulkReceiptItemsUpdateRequest
 )
 from app.services.receipt_service import (
-    create_receipt, create_manual_receipt, list_receipts, get_receipt, update_receipt, delete_receipt, delete_all_receipts,
+    create_receipt, create_manual_receipt, list_receipts, list_receipts_page, get_receipt, load_receipt_detail, update_receipt, delete_receipt, delete_all_receipts,
     add_line_item, update_line_item, delete_line_item, bulk_update_receipt_items
 )
 
 from app.services.exchange_rate_service import get_exchange_rate
-from app.workers.ocr import process_receipt_ocr
+from app.services.ocr_queue_service import enqueue_ocr_job
 
 router = APIRouter(tags=["receipts"])
 
@@ -26,7 +26,7 @@ router = APIRouter(tags=["receipts"])
 async def fetch_exchange_rate(
     from_currency: str,
     to_currency: str,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(get_current_identity),
 ):
     try:
         rate = await get_exchange_rate(from_currency, to_currency)
@@ -39,12 +39,13 @@ async def fetch_exchange_rate(
 async def upload_receipt(
     group_id: uuid.UUID,
     body: ReceiptCreate,
-    background_tasks: BackgroundTasks,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_group_member),
     db: AsyncSession = Depends(get_db),
 ):
     receipt = await create_receipt(db, group_id, body.image_url, user, currency=body.currency)
-    background_tasks.add_task(process_receipt_ocr, receipt.id, body.currency)
+    # Picked up by the OCR worker (python -m app.workers.ocr)
+    await enqueue_ocr_job(db, receipt.id, body.currency)
+    await db.commit()
     return receipt
 
 
@@ -52,7 +53,7 @@ async def upload_receipt(
 async def create_manual(
     group_id: uuid.UUID,
     body: ManualReceiptCreate,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_group_member),
     db: AsyncSession = Depends(get_db),
 ):
     receipt = await create_manual_receipt(
@@ -74,11 +75,35 @@ async def create_manual(
 async def list_group_receipts(
     group_id: uuid.UUID,
     include: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    user: UserSnapshot = Depends(require_group_member),
+    db: AsyncSession = Depends(get_read_db),
 ):
+    """
+    Without `limit`/`cursor` this returns every receipt (a bare list, or with
+    include=group an object), as before. With them it returns
+    {"receipts", "next_cursor"} one page at a time; the group is only
+    included on the first page.
+    """
     includes = set(include.split(",")) if include else set()
 
+    if limit is not None or cursor is not None:
+        try:
+            receipts, next_cursor = await list_receipts_page(db, group_id, limit or 50, cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        page = {
+            "receipts": [ReceiptListResponse.model_validate(r, from_attributes=True) for r in receipts],
+            "next_cursor": next_cursor,
+        }
+        if "group" in includes and cursor is None:
+            from app.services.group_service import get_group as _get_group
+            from app.schemas.group import GroupResponse
+            group = await _get_group(db, group_id)
+            page["group"] = GroupResponse.model_validate(group, from_attributes=True).model_dump(mode="json") if group else None
+        return page
+
     if "group" in includes:
         from app.services.group_service import get_group as _get_group
         from app.schemas.group import GroupResponse
@@ -96,15 +121,15 @@ async def list_group_receipts(
 async def get_receipt_detail(
     receipt_id: uuid.UUID,
     include: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: UserSnapshot = Depends(require_receipt_member),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    receipt = await get_receipt(db, receipt_id)
+    receipt = await load_receipt_detail(db, receipt_id)
     if not receipt:
         raise HTTPException(status_code=404, detail="Receipt not found")
 
     includes = set(include.split(",")) if include else set()
-    result = ReceiptDetailResponse.model_validate(receipt, from_attributes=True)
+    result = ReceiptDetailResponse.model_validate(receipt)
 
     if "group" in includes or "payments" in includes:
         from app.services.group_service import get_group as _get_group
@@ -113,7 +138,7 @@ async def get_receipt_detail(
 
         updates = {}
         if "group" in includes:
-            group_result = await _get_group(db, receipt.group_id)
+            group_result = await _get_group(db, result.group_id)
             if group_result:
                 updates["group"] = GroupResponse.model_validate(group_result, from_attributes=True).model_dump(mode="json")
         if "payments" in includes:
@@ -129,7 +154,7 @@ async def get_receipt_detail(
 async def edit_receipt(
     receipt_id: uuid.UUID,
     body: ReceiptUpdate,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_receipt_member),
     db: AsyncSession = Depends(get_db),
 ):
     data = body.model_dump(exclude={"version"}, exclude_unset=True)
@@ -142,18 +167,19 @@ async def edit_receipt(
 @router.delete("/api/receipts/{receipt_id}", status_code=204)
 async def remove_receipt(
     receipt_id: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_receipt_member),
     db: AsyncSession = Depends(get_db),
 ):
     deleted = await delete_receipt(db, receipt_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Receipt not found")
+    forget_receipt(receipt_id)
 
 
 @router.delete("/api/groups/{group_id}/receipts", status_code=200)
 async def remove_all_receipts(
     group_id: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_group_member),
     db: AsyncSession = Depends(get_db),
 ):
     count = await delete_all_receipts(db, group_id)
@@ -163,7 +189,7 @@ async def remove_all_receipts(
 @router.post("/api/receipts/{receipt_id}/confirm", response_model=ReceiptResponse)
 async def confirm_receipt(
     receipt_id: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_receipt_member),
     db: AsyncSession = Depends(get_db),
 ):
     receipt = await get_receipt(db, receipt_id)
@@ -178,8 +204,7 @@ async def confirm_receipt(
 @router.post("/api/receipts/{receipt_id}/retry-ocr", response_model=ReceiptResponse)
 async def retry_ocr(
     receipt_id: uuid.UUID,
-    background_tasks: BackgroundTasks,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_receipt_member),
     db: AsyncSession = Depends(get_db),
 ):
     receipt = await get_receipt(db, receipt_id)
@@ -192,7 +217,8 @@ async def retry_ocr(
         raise HTTPException(status_code=409, detail="Version conflict")
     
     # Trigger OCR again
-    background_tasks.add_task(process_receipt_ocr, receipt.id, receipt.currency)
+    await enqueue_ocr_job(db, receipt.id, receipt.currency)
+    await db.commit()
     
     return updated
 
@@ -201,7 +227,7 @@ async def retry_ocr(
 async def create_item(
     receipt_id: uuid.UUID,
     body: LineItemCreate,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_receipt_member),
     db: AsyncSession = Depends(get_db),
 ):
     item = await add_line_item(db, receipt_id, body.description, body.amount, body.quantity)
@@ -214,7 +240,7 @@ async def create_item(
 async def bulk_update_items(
     receipt_id: uuid.UUID,
     body: BulkReceiptItemsUpdateRequest,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_receipt_member),
     db: AsyncSession = Depends(get_db),
 ):
     updated_receipt = await bulk_update_receipt_items(db, receipt_id, body.model_dump(exclude_unset=True))
@@ -229,7 +255,7 @@ async def bulk_update_items(
 async def update_item(
     item_id: uuid.UUID,
     body: LineItemUpdate,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_item_member),
     db: AsyncSession = Depends(get_db),
 ):
     data = body.model_dump(exclude_unset=True)
@@ -242,7 +268,7 @@ async def update_item(
 @router.delete("/api/items/{item_id}", status_code=204)
 async def delete_item(
     item_id: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_item_member),
     db: AsyncSession = Depends(get_db),
 ):
     deleted = await delete_line_item(db, item_id)
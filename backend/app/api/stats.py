@@ -1,12 +1,14 @@
 import uuid
+from datetime import date
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_user
-from app.core.database import get_db
-from app.models.user import User
-from app.services.stats_service import get_group_stats
+from app.core.auth import UserSnapshot
+from app.core.database import get_read_db
+from app.core.membership import require_group_member
+from app.services.balance_cache import get_cached_group_stats, get_cached_spend_series
 
 router = APIRouter(tags=["stats"])
 
@@ -14,7 +16,20 @@ router = APIRouter(tags=["stats"])
 @router.get("/api/groups/{group_id}/stats")
 async def group_stats(
     group_id: uuid.UUID,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    since: Optional[date] = Query(None),
+    until: Optional[date] = Query(None),
+    date_field: str = Query("receipt_date", pattern="^(receipt_date|created_at)$"),
+    cursor: Optional[str] = Query(None),
+    series: Optional[str] = Query(None, pattern="^(day|month)$"),
+    user: UserSnapshot = Depends(require_group_member),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await get_group_stats(db, group_id)
+    """
+    Stats over [since, until) on `date_field`; pass a previous `cursor` for a delta.
+    With `series=day|month`, returns the spend time series from the daily rollup instead.
+    """
+    if series:
+        return await get_cached_spend_series(db, group_id, granularity=series, since=since, until=until)
+    return await get_cached_group_stats(
+        db, group_id, since=since, until=until, date_field=date_field, cursor=cursor
+    )
@@ -1,4 +1,8 @@
+import asyncio
+import hashlib
+import time
 import uuid
+from typing import NamedTuple
 
 import httpx
 import jwt as pyjwt
@@ -10,60 +14,166 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.http_client import http_clients
 from app.models.user import User
+from app.utils.lru_cache import LRUCache
 
 security = HTTPBearer()
 
-_jwks_cache: list | None = None
+_jwks_cache: dict[str, PyJWK] | None = None
+_jwks_fetched_at = 0.0
+# Last failed fetch; no new attempt for jwks_min_refresh_seconds after it
+_jwks_failed_at = float("-inf")
+_jwks_lock = asyncio.Lock()
 
+# sha256(token) -> verified claims; entries are dropped once the token's exp passes
+_token_cache = LRUCache(settings.token_cache_size)
 
-async def _get_jwks() -> list:
-    global _jwks_cache
-    if _jwks_cache is not None:
-        return _jwks_cache
+
+class UserSnapshot(NamedTuple):
+    """Read-only view of a user for handlers that only need who is calling."""
+    id: uuid.UUID
+    display_name: str
+    email: str
+    avatar_url: str | None
+
+
+# user_id -> (monotonic expiry, UserSnapshot)
+_user_cache = LRUCache(settings.user_cache_size)
+
+
+def invalidate_user(user_id: uuid.UUID) -> None:
+    """Drop a cached snapshot after the user row changes (this process only)."""
+    _user_cache.pop(user_id)
+
+
+async def _fetch_jwks() -> dict[str, PyJWK]:
     jwks_url = f"{settings.supabase_url}/auth/v1/.well-known/jwks.json"
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(jwks_url)
-        resp.raise_for_status()
-        keys = resp.json().get("keys", [])
-        _jwks_cache = [PyJWK(k) for k in keys]
+    resp = await http_clients.client(jwks_url).get(jwks_url)
+    resp.raise_for_status()
+    keys = resp.json().get("keys", [])
+    return {k.get("kid"): PyJWK(k) for k in keys}
+
+
+async def _get_jwks(refresh: bool = False) -> dict[str, PyJWK]:
+    """
+    Signing keys by kid. Refetched when older than jwks_ttl_seconds, or on
+    `refresh` (unknown kid, e.g. after a key rotation) unless the keys are
+    younger than jwks_min_refresh_seconds. Concurrent callers share one fetch,
+    and after a failed fetch no caller retries for jwks_min_refresh_seconds.
+    """
+    global _jwks_cache, _jwks_fetched_at, _jwks_failed_at
+
+    def cached() -> dict[str, PyJWK] | None:
+        """The keys to use without fetching, if any; raises while backing off with none."""
+        now = time.monotonic()
+        max_age = settings.jwks_min_refresh_seconds if refresh else settings.jwks_ttl_seconds
+        if _jwks_cache is not None and now - _jwks_fetched_at < max_age:
+            return _jwks_cache
+        if now - _jwks_failed_at < settings.jwks_min_refresh_seconds:
+            if _jwks_cache is None:
+                raise httpx.HTTPError("JWKS unavailable, backing off after a failed fetch")
+            return _jwks_cache
+        return None
+
+    keys = cached()
+    if keys is not None:
+        return keys
+
+    async with _jwks_lock:
+        # Another request may have fetched (or failed to) while this one waited
+        keys = cached()
+        if keys is not None:
+            return keys
+        try:
+            _jwks_cache = await _fetch_jwks()
+            _jwks_fetched_at = time.monotonic()
+        except httpx.HTTPError:
+            _jwks_failed_at = time.monotonic()
+            if _jwks_cache is None:
+                raise
+            # Keep serving the old keys until the backoff lets a retry through
         return _jwks_cache
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db),
-) -> User:
-    token = credentials.credentials
+async def _verify_token(token: str) -> dict:
+    """Claims of a valid token, verifying the signature only on a cache miss."""
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = _token_cache.get(digest)
+    if payload is not None:
+        if payload.get("exp", 0) > time.time():
+            return payload
+        _token_cache.pop(digest)
+
+    kid = pyjwt.get_unverified_header(token).get("kid")
+    key = (await _get_jwks()).get(kid)
+    if key is None:
+        key = (await _get_jwks(refresh=True)).get(kid)
+    if key is None:
+        raise pyjwt.InvalidTokenError("No matching key found")
+
+    payload = pyjwt.decode(
+        token,
+        key,
+        algorithms=["ES256"],
+        audience="authenticated",
+        options={"require": ["exp"]},
+    )
+    _token_cache.set(digest, payload)
+    return payload
+
+
+async def _authenticated_user_id(credentials: HTTPAuthorizationCredentials) -> uuid.UUID:
     try:
-        jwks = await _get_jwks()
-        header = pyjwt.get_unverified_header(token)
-        kid = header.get("kid")
-
-        key = None
-        for k in jwks:
-            if k.key_id == kid:
-                key = k
-                break
-        if key is None:
-            raise pyjwt.InvalidTokenError("No matching key found")
-
-        payload = pyjwt.decode(
-            token,
-            key,
-            algorithms=["ES256"],
-            audience="authenticated",
-        )
+        payload = await _verify_token(credentials.credentials)
     except pyjwt.InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return uuid.UUID(user_id)
 
-    result = await db.execute(select(User).where(User.id == uuid.UUID(user_id)))
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """The caller as a live ORM User, for handlers that modify it."""
+    user_id = await _authenticated_user_id(credentials)
+    result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
     return user
+
+
+async def get_current_identity(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> UserSnapshot:
+    """The caller as a cached UserSnapshot; only queries users on a miss or after the TTL."""
+    user_id = await _authenticated_user_id(credentials)
+    cached = _user_cache.get(user_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    result = await db.execute(
+        select(User.id, User.display_name, User.email, User.avatar_url).where(User.id == user_id)
+    )
+    row = result.one_or_none()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+    snapshot = UserSnapshot(*row)
+    _user_cache.set(user_id, (time.monotonic() + settings.user_cache_ttl_seconds, snapshot))
+    return snapshot
+
+
+async def get_admin_user(user: UserSnapshot = Depends(get_current_identity)) -> UserSnapshot:
+    """The current user, if their email is listed in settings.admin_emails."""
+    admins = {e.strip().lower() for e in settings.admin_emails.split(",") if e.strip()}
+    if user.email.lower() not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user
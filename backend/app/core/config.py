@@ -15,6 +15,87 @@ class Settings(BaseSettings):
     vapid_claims_email: str
     llm_model_name: str = Field(default="gemini/gemini-2.5-flash-lite", validation_alias=AliasChoices('llm_model_name', 'google_model_name'))
     cors_origins: str = "http://localhost:3000"
+    # "null": no client-side pool, for pgBouncer transaction mode on database_url.
+    # "queue": pooled connections with prepared-statement caching, on direct_database_url
+    # (or a session-mode pooler); falls back to database_url when that is unset.
+    db_pool_mode: str = "null"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_statement_cache_size: int = 100
+    # Pool checkouts slower than this count as waits in /api/health/db
+    db_pool_wait_threshold_ms: float = 5.0
+    # Optional replica for GET handlers, and how long a client's reads stay on the
+    # primary after its own write (read-your-writes)
+    read_replica_url: str = ""
+    read_pin_seconds: int = 5
+    # Raise QueryBudgetExceeded when a route runs more statements than its
+    # query_budget() (meant for tests); otherwise overruns are only logged
+    query_budget_strict: bool = False
+    # Log a statement run this many times in one request (likely an N+1 loop)
+    query_repeat_threshold: int = 5
+    # Record statements slower than this (0 = off) in a ring of slow_query_ring_size
+    # entries, appended to slow_query_log_path as JSONL when set
+    slow_query_ms: int = 0
+    slow_query_ring_size: int = 200
+    slow_query_log_path: str = ""
+    slow_query_explain: bool = True
+    # Verified bearer tokens kept (by digest) so repeat requests skip ES256 verification
+    token_cache_size: int = 1024
+    # JWKS is refetched after this long, or sooner when a token names an unknown
+    # kid, but never more often than jwks_min_refresh_seconds
+    jwks_ttl_seconds: int = 3600
+    jwks_min_refresh_seconds: int = 30
+    # Users' identity (id, name, email, avatar) kept per process for routes that
+    # don't need a live ORM User; invalidated on profile and push changes
+    user_cache_ttl_seconds: int = 60
+    user_cache_size: int = 2048
+    # Per-process membership cache behind require_group_member / require_receipt_member
+    membership_cache_ttl_seconds: int = 300
+    membership_cache_size: int = 4096
+    # Outbound HTTP (app.core.http_client): hosts with their own pool (the
+    # Supabase host is always one; any other host shares a single client),
+    # default timeout and overrides by hostname, e.g. HTTP_HOST_TIMEOUTS='{"open.er-api.com": 5}'
+    http_pooled_hosts: list[str] = ["open.er-api.com", "api.exchangerate-api.com"]
+    http_timeout_seconds: float = 10.0
+    http_host_timeouts: dict[str, float] = {}
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    # OCR job queue (python -m app.workers.ocr): jobs run at once per worker, lease
+    # length (renewed by heartbeats at a third of it), attempts before the receipt
+    # is marked failed, base retry delay, idle poll interval, and how long a
+    # receipt may sit in 'processing' without a job before it is requeued.
+    # ocr_worker_in_web runs one worker inside the API process instead.
+    ocr_worker_concurrency: int = 4
+    ocr_job_lease_seconds: int = 120
+    ocr_job_max_attempts: int = 3
+    ocr_job_retry_delay_seconds: int = 30
+    ocr_poll_seconds: float = 2.0
+    ocr_stuck_receipt_seconds: int = 600
+    ocr_worker_in_web: bool = False
+    # Comma-separated emails allowed on /api/admin endpoints
+    admin_emails: str = ""
+    # Receipts deleted per transaction when clearing a whole group
+    delete_chunk_size: int = 500
+    # "ledger" reads the incrementally maintained group_ledger; "sql" aggregates in Postgres;
+    # "stream" recomputes from raw rows through a server-side cursor; "scan" recomputes
+    # from raw rows loaded in full
+    financials_engine: str = "ledger"
+    # Rows fetched per round trip by the "stream" engine
+    financials_stream_batch: int = 2000
+    # "orm" toggles an assignment step by step through the session; "sql" does the
+    # version bump, row change and share split in one toggle_line_item_assignment()
+    # call (ledger deltas and the commit still follow). Compare with
+    # scripts/benchmark_toggle.py before switching
+    assignment_toggle_mode: str = "orm"
+    # Remainder-cent ordering for new receipts (see currency_utils.SPLIT_ORDER_*)
+    split_order_version: int = 2
+    # Entries in the in-process balances/stats cache (keyed on groups.ledger_version)
+    balance_cache_size: int = 512
+    # ?algorithm=optimal search limits; larger or slower groups fall back to greedy
+    settlement_optimal_budget_ms: int = 250
+    settlement_optimal_max_members: int = 18
 
 
 settings = Settings()
@@ -1,14 +1,19 @@
+import time
 import uuid
 import asyncpg
+from fastapi import Request
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 class CachingDisabledConnection(asyncpg.Connection):
     def _get_unique_id(self, prefix: str) -> str:
         return f"__asyncpg_{uuid.uuid4()}__"
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core import slow_query_log
+from app.core.query_counter import instrument_engine
 
 
 def _get_async_url(url: str) -> str:
@@ -19,22 +24,113 @@ def _get_async_url(url: str) -> str:
         return url.replace("postgres://", "postgresql+asyncpg://", 1)
     return url
 
-_db_url = _get_async_url(settings.database_url)
-
-# NullPool required for Supabase pgBouncer (transaction mode) — pgBouncer handles
-# connection pooling server-side. SQLAlchemy-level pooling conflicts with pgBouncer
-# because pooled connections get reassigned, invalidating prepared statements.
-engine = create_async_engine(
-    _db_url,
-    echo=False,
-    poolclass=NullPool,
-    connect_args={
-        "statement_cache_size": 0,
-        "connection_class": CachingDisabledConnection,
-    },
-)
+
+_stats = {"connects": 0, "checkouts": 0, "waits": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+
+
+def _record_checkout_time(ms: float) -> None:
+    """Count a checkout as a wait only if it took longer than the threshold."""
+    _stats["wait_ms_max"] = max(_stats["wait_ms_max"], ms)
+    if ms >= settings.db_pool_wait_threshold_ms:
+        _stats["waits"] += 1
+        _stats["wait_ms_total"] += ms
+
+
+class _TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _record_checkout_time((time.perf_counter() - t0) * 1000)
+
+
+def _create_engine(url: str | None = None):
+    if settings.db_pool_mode == "queue":
+        # Session-mode connection (direct, or pgBouncer session mode): connections stay
+        # bound to this process, so pooling them and caching prepared statements is safe.
+        return create_async_engine(
+            _get_async_url(url or settings.direct_database_url or settings.database_url),
+            echo=False,
+            poolclass=_TimedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True,
+            connect_args={"statement_cache_size": settings.db_statement_cache_size},
+        )
+
+    # NullPool required for Supabase pgBouncer (transaction mode) — pgBouncer handles
+    # connection pooling server-side. SQLAlchemy-level pooling conflicts with pgBouncer
+    # because pooled connections get reassigned, invalidating prepared statements.
+    return create_async_engine(
+        _get_async_url(url or settings.database_url),
+        echo=False,
+        poolclass=NullPool,
+        connect_args={
+            "statement_cache_size": 0,
+            "connection_class": CachingDisabledConnection,
+        },
+    )
+
+
+engine = _create_engine()
 async_session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Optional read replica for GET handlers; without one, reads share the primary
+if settings.read_replica_url:
+    read_engine = _create_engine(settings.read_replica_url)
+    read_session_factory = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+else:
+    read_engine = engine
+    read_session_factory = async_session_factory
+
+READ_PIN_COOKIE = "read_pin"
+READ_PIN_HEADER = "X-Read-Pin"
+
+
+def _on_connect(dbapi_connection, connection_record):
+    _stats["connects"] += 1
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    _stats["checkouts"] += 1
+
+
+for _engine in {engine, read_engine}:
+    instrument_engine(_engine.sync_engine)
+    slow_query_log.instrument_engine(_engine.sync_engine)
+    event.listen(_engine.sync_engine, "connect", _on_connect)
+    event.listen(_engine.sync_engine, "checkout", _on_checkout)
+
+
+def _pool_state(pool) -> dict:
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "idle": pool.checkedin(),
+    }
+
+
+def pool_stats() -> dict:
+    """
+    Connection counters since startup (primary and replica together) plus each
+    pool's current state. "waits" only counts checkouts slower than
+    db_pool_wait_threshold_ms; "wait_ms_max" covers every checkout.
+    """
+    stats = {"mode": settings.db_pool_mode, **_stats}
+    stats["wait_ms_avg"] = stats["wait_ms_total"] / stats["waits"] if stats["waits"] else 0.0
+    stats.update(_pool_state(engine.pool))
+    if read_engine is not engine:
+        stats["read"] = _pool_state(read_engine.pool)
+    return stats
+
 
 class Base(DeclarativeBase):
     pass
@@ -43,3 +139,27 @@ class Base(DeclarativeBase):
 async def get_db():
     async with async_session_factory() as session:
         yield session
+
+
+def is_read_pinned(request: Request) -> bool:
+    """
+    True while the client is inside the read-your-writes window after its own
+    write. The pin is a unix expiry time, sent back as a cookie or header;
+    one further out than a fresh pin would be is forged and ignored.
+    """
+    pin = request.headers.get(READ_PIN_HEADER) or request.cookies.get(READ_PIN_COOKIE)
+    if pin is None:
+        return False
+    try:
+        expiry = float(pin)
+    except ValueError:
+        return False
+    now = time.time()
+    return now < expiry <= now + settings.read_pin_seconds
+
+
+async def get_read_db(request: Request):
+    """Session for read-only handlers: the replica unless the client is pinned to the primary."""
+    factory = async_session_factory if is_read_pinned(request) else read_session_factory
+    async with factory() as session:
+        yield session
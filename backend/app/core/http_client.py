@@ -0,0 +1,103 @@
+"""
+Shared outbound HTTP clients, one pooled httpx.AsyncClient per known host.
+
+Call sites ask http_clients.client(url) instead of opening their own client,
+so DNS, TCP and TLS setup is paid once per connection rather than per call.
+Known hosts are Supabase and settings.http_pooled_hosts; any other host (e.g.
+a user-supplied image URL) goes through one shared client, so the registry
+cannot grow with user input. main.lifespan closes the pools on shutdown. Per
+pool we count requests, new connections (the rest reused a pooled one) and
+response latency.
+"""
+
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # optional: without h2 the clients speak HTTP/1.1
+    h2 = None
+
+
+# Pool key for hosts outside the known set
+OTHER_HOSTS = "*"
+
+
+def _zero_stats() -> dict:
+    return {"requests": 0, "responses": 0, "new_connections": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+
+class HttpClientRegistry:
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport | None = None,
+        hosts: list[str] | None = None,
+    ):
+        self._transport = transport
+        if hosts is None:
+            hosts = [urlsplit(settings.supabase_url).hostname, *settings.http_pooled_hosts]
+        self._hosts = frozenset(h for h in hosts if h)
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._stats: dict[str, dict] = defaultdict(_zero_stats)
+
+    def client(self, url: str) -> httpx.AsyncClient:
+        """The pooled client for url's host (or the shared one), created on first use."""
+        host = urlsplit(url).hostname or ""
+        if host not in self._hosts:
+            host = OTHER_HOSTS
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = self._clients[host] = self._create(host)
+        return client
+
+    def _create(self, host: str) -> httpx.AsyncClient:
+        stats = self._stats[host]
+
+        async def on_connection_event(event_name: str, info: dict) -> None:
+            if event_name == "connection.connect_tcp.started":
+                stats["new_connections"] += 1
+
+        async def on_request(request: httpx.Request) -> None:
+            stats["requests"] += 1
+            request.extensions["trace"] = on_connection_event
+            request.extensions["started_at"] = time.perf_counter()
+
+        async def on_response(response: httpx.Response) -> None:
+            ms = (time.perf_counter() - response.request.extensions["started_at"]) * 1000
+            stats["responses"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+
+        return httpx.AsyncClient(
+            http2=h2 is not None,
+            timeout=settings.http_host_timeouts.get(host, settings.http_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+            ),
+            transport=self._transport,
+            event_hooks={"request": [on_request], "response": [on_response]},
+        )
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def stats(self) -> dict:
+        result = {}
+        for host, s in self._stats.items():
+            result[host] = {
+                **s,
+                "reused_connections": max(s["requests"] - s["new_connections"], 0),
+                "avg_ms": s["total_ms"] / s["responses"] if s["responses"] else 0.0,
+            }
+        return {"http2": h2 is not None, "hosts": result}
+
+
+http_clients = HttpClientRegistry()
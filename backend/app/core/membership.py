@@ -0,0 +1,133 @@
+"""
+Group membership checks for group- and receipt-scoped routes.
+
+Memberships (user_id -> group ids) and the owning group of receipts, line
+items and payments are cached per process, so the check usually costs no query. Memberships
+expire after membership_cache_ttl_seconds to bound staleness on other
+workers; this worker drops them itself on create, join and delete. A miss
+on a cached set is re-checked against the database before refusing, so a
+join made through another worker is never rejected.
+"""
+
+import time
+import uuid
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import UserSnapshot, get_current_identity
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.group import GroupMember
+from app.models.payment import Payment
+from app.models.receipt import Receipt, LineItem
+from app.utils.lru_cache import LRUCache
+
+# user_id -> (monotonic expiry, frozenset of group ids)
+_user_groups = LRUCache(settings.membership_cache_size)
+# receipt_id / item_id / payment_id -> group_id; none of them ever changes group
+_receipt_groups = LRUCache(settings.membership_cache_size)
+_item_groups = LRUCache(settings.membership_cache_size)
+_payment_groups = LRUCache(settings.membership_cache_size)
+
+
+async def _load_user_groups(db: AsyncSession, user_id: uuid.UUID) -> frozenset:
+    result = await db.execute(select(GroupMember.group_id).where(GroupMember.user_id == user_id))
+    group_ids = frozenset(result.scalars().all())
+    _user_groups.set(user_id, (time.monotonic() + settings.membership_cache_ttl_seconds, group_ids))
+    return group_ids
+
+
+async def is_group_member(db: AsyncSession, user_id: uuid.UUID, group_id: uuid.UUID) -> bool:
+    cached = _user_groups.get(user_id)
+    if cached is not None and cached[0] > time.monotonic() and group_id in cached[1]:
+        return True
+    # Not cached, expired, or possibly joined since: confirm with the database
+    return group_id in await _load_user_groups(db, user_id)
+
+
+async def _owning_group(cache: LRUCache, key: uuid.UUID, db: AsyncSession, stmt) -> uuid.UUID | None:
+    group_id = cache.get(key)
+    if group_id is None:
+        result = await db.execute(stmt)
+        group_id = result.scalar_one_or_none()
+        if group_id is not None:
+            cache.set(key, group_id)
+    return group_id
+
+
+async def receipt_group_id(db: AsyncSession, receipt_id: uuid.UUID) -> uuid.UUID | None:
+    stmt = select(Receipt.group_id).where(Receipt.id == receipt_id)
+    return await _owning_group(_receipt_groups, receipt_id, db, stmt)
+
+
+async def item_group_id(db: AsyncSession, item_id: uuid.UUID) -> uuid.UUID | None:
+    stmt = select(Receipt.group_id).join(LineItem, LineItem.receipt_id == Receipt.id).where(LineItem.id == item_id)
+    return await _owning_group(_item_groups, item_id, db, stmt)
+
+
+async def payment_group_id(db: AsyncSession, payment_id: uuid.UUID) -> uuid.UUID | None:
+    stmt = select(Receipt.group_id).join(Payment, Payment.receipt_id == Receipt.id).where(Payment.id == payment_id)
+    return await _owning_group(_payment_groups, payment_id, db, stmt)
+
+
+async def group_member_ids(db: AsyncSession, group_id: uuid.UUID) -> list[uuid.UUID]:
+    result = await db.execute(select(GroupMember.user_id).where(GroupMember.group_id == group_id))
+    return list(result.scalars().all())
+
+
+def invalidate_user_groups(*user_ids: uuid.UUID) -> None:
+    """Forget cached memberships after users join, create or lose a group."""
+    for user_id in user_ids:
+        _user_groups.pop(user_id)
+
+
+def forget_receipt(receipt_id: uuid.UUID) -> None:
+    _receipt_groups.pop(receipt_id)
+
+
+async def require_group_member(
+    group_id: uuid.UUID,
+    user: UserSnapshot = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db),
+) -> UserSnapshot:
+    """Route dependency: the caller, if they belong to the path's group_id."""
+    if not await is_group_member(db, user.id, group_id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this group")
+    return user
+
+
+async def _require_owner_member(db: AsyncSession, user: UserSnapshot, group_id: uuid.UUID | None, what: str) -> UserSnapshot:
+    if group_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{what} not found")
+    if not await is_group_member(db, user.id, group_id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this group")
+    return user
+
+
+async def require_receipt_member(
+    receipt_id: uuid.UUID,
+    user: UserSnapshot = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db),
+) -> UserSnapshot:
+    """Route dependency: the caller, if they belong to the group owning the path's receipt_id."""
+    return await _require_owner_member(db, user, await receipt_group_id(db, receipt_id), "Receipt")
+
+
+async def require_item_member(
+    item_id: uuid.UUID,
+    user: UserSnapshot = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db),
+) -> UserSnapshot:
+    """Route dependency: the caller, if they belong to the group owning the path's item_id."""
+    return await _require_owner_member(db, user, await item_group_id(db, item_id), "Item")
+
+
+async def require_payment_member(
+    payment_id: uuid.UUID,
+    user: UserSnapshot = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db),
+) -> UserSnapshot:
+    """Route dependency: the caller, if they belong to the group owning the path's payment_id."""
+    return await _require_owner_member(db, user, await payment_group_id(db, payment_id), "Payment")
@@ -0,0 +1,107 @@
+"""
+Per-request SQL statement counting.
+
+TimingMiddleware opens a tracker for every request; engine events add each
+statement and its time to it. Routes can declare a budget with
+Depends(query_budget(n)); with query_budget_strict on (tests), the statement
+that goes over it raises QueryBudgetExceeded instead of just being logged.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class QueryStats:
+    """Statements run (and time spent in them) inside one tracked block."""
+
+    def __init__(self, budget: int | None = None):
+        self.count = 0
+        self.total_ms = 0.0
+        self.budget = budget
+        self.statements: Counter[str] = Counter()
+
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def repeated(self, threshold: int | None = None) -> list[tuple[str, int]]:
+        """Statements run at least `threshold` times: the usual sign of an N+1 loop."""
+        threshold = threshold or settings.query_repeat_threshold
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> QueryStats | None:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(budget: int | None = None):
+    """Count statements issued inside the block (e.g. around a request, or in a test)."""
+    stats = QueryStats(budget)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _check_budget(stats: QueryStats) -> None:
+    if stats.over_budget() and settings.query_budget_strict:
+        raise QueryBudgetExceeded(f"{stats.count} queries, budget is {stats.budget}")
+
+
+def query_budget(limit: int):
+    """Route dependency declaring the most statements one request may issue."""
+    async def _declare():
+        stats = _current.get()
+        if stats is not None:
+            stats.budget = limit
+            _check_budget(stats)
+    return _declare
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.count += 1
+    stats.statements[statement] += 1
+    _check_budget(stats)
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    start = conn.info.pop("query_start", None)
+    if stats is None or start is None:
+        return
+    stats.total_ms += (time.perf_counter() - start) * 1000
+
+
+def instrument_engine(engine) -> None:
+    """Attach the counters to an engine (the sync_engine of an async one)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def log_request_queries(method: str, path: str, stats: QueryStats) -> None:
+    """Warn about requests over their budget or repeating a statement."""
+    if stats.over_budget():
+        logger.warning(f"{method} {path} ran {stats.count} queries, budget is {stats.budget}")
+    for sql, n in stats.repeated():
+        logger.warning(f"{method} {path} ran the same statement {n}x: {' '.join(sql.split())[:200]}")
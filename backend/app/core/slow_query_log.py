@@ -0,0 +1,173 @@
+"""
+Opt-in slow-query recorder (slow_query_ms > 0).
+
+Statements slower than the threshold are kept in a bounded in-memory ring
+and, if slow_query_log_path is set, appended to a JSONL file by a background
+thread, so the event loop never waits on disk. Parameter
+values are never recorded, only their types. When slow_query_explain is on
+the plan is captured with EXPLAIN (ANALYZE off), so the statement is not re-run.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+
+_ring: deque = deque(maxlen=settings.slow_query_ring_size)
+
+# (path, JSONL line) pairs waiting for the writer thread
+_pending: queue.Queue = queue.Queue()
+_writer: threading.Thread | None = None
+_writer_lock = threading.Lock()
+
+
+def _write_loop() -> None:
+    while True:
+        batch = [_pending.get()]
+        while True:
+            try:
+                batch.append(_pending.get_nowait())
+            except queue.Empty:
+                break
+        by_path: dict[str, list[str]] = {}
+        for path, line in batch:
+            by_path.setdefault(path, []).append(line)
+        for path, lines in by_path.items():
+            try:
+                with open(path, "a") as f:
+                    f.writelines(lines)
+            except OSError as e:
+                logger.warning(f"Could not write slow query log: {e}")
+        for _ in batch:
+            _pending.task_done()
+
+
+def _enqueue_write(path: str, line: str) -> None:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_write_loop, name="slow-query-log", daemon=True)
+                _writer.start()
+    _pending.put((path, line))
+
+
+def flush() -> None:
+    """Block until every queued entry has been written to the JSONL file."""
+    _pending.join()
+
+
+def _redact(parameters):
+    """Keep the shape of the bound parameters but none of their values."""
+    if isinstance(parameters, dict):
+        return {k: _redact(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact(v) for v in parameters]
+    if parameters is None:
+        return None
+    return type(parameters).__name__
+
+
+def _explain(conn, statement, parameters) -> list[str] | None:
+    """
+    Plan for a just-run statement, on a fresh cursor so the caller's results
+    stay intact. It runs inside the caller's transaction, so a savepoint keeps
+    a failed EXPLAIN from aborting it.
+    """
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE off) {statement}", parameters)
+            plan = [row[0] for row in cursor.fetchall()]
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    except Exception as e:
+        logger.warning(f"EXPLAIN for slow query failed: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["slow_query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("slow_query_start", None)
+    if start is None:
+        return
+    ms = (time.perf_counter() - start) * 1000
+    if ms < settings.slow_query_ms:
+        return
+
+    plan = None
+    streaming = context is not None and context.execution_options.get("stream_results")
+    if (
+        settings.slow_query_explain
+        and not executemany
+        and not streaming
+        and statement.lstrip().lower().startswith(_EXPLAINABLE)
+    ):
+        plan = _explain(conn, statement, parameters)
+
+    record(statement, parameters if not executemany else None, ms, plan)
+
+
+def record(statement: str, parameters, ms: float, plan: list[str] | None = None) -> dict:
+    entry = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "ms": round(ms, 1),
+        "statement": " ".join(statement.split()),
+        "parameters": _redact(parameters),
+        "plan": plan,
+    }
+    _ring.append(entry)
+    if settings.slow_query_log_path:
+        _enqueue_write(settings.slow_query_log_path, json.dumps(entry) + "\n")
+    return entry
+
+
+def instrument_engine(engine) -> None:
+    """Attach the recorder to an engine (the sync_engine of an async one) if enabled."""
+    if settings.slow_query_ms <= 0:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def worst_queries(limit: int = 20) -> dict:
+    """Slowest recorded executions, and recorded statements ranked by total time."""
+    by_statement: dict[str, dict] = {}
+    for entry in _ring:
+        agg = by_statement.setdefault(
+            entry["statement"], {"statement": entry["statement"], "count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        )
+        agg["count"] += 1
+        agg["total_ms"] = round(agg["total_ms"] + entry["ms"], 1)
+        agg["max_ms"] = max(agg["max_ms"], entry["ms"])
+
+    return {
+        "threshold_ms": settings.slow_query_ms,
+        "recorded": len(_ring),
+        "slowest": sorted(_ring, key=lambda e: e["ms"], reverse=True)[:limit],
+        "by_statement": sorted(by_statement.values(), key=lambda a: a["total_ms"], reverse=True)[:limit],
+    }
+
+
+def clear() -> None:
+    _ring.clear()
@@ -2,7 +2,7 @@ import asyncio
 import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.auth import router as auth_router
@@ -12,6 +12,9 @@ from app.api.assignments import router as assignments_router
 from app.api.payments import router as payments_router
 from app.api.stats import router as stats_router
 from app.api.push import router as push_router
+from app.api.me import router as me_router
+from app.api.admin import router as admin_router
+from app.core.auth import UserSnapshot, get_admin_user
 from app.workers.reminders import send_overdue_reminders
 
 
@@ -26,9 +29,23 @@ async def reminder_loop():
 
 @asynccontextmanager
 async def lifespan(app):
+    from app.core import slow_query_log
+    from app.core.http_client import http_clients
+
     task = asyncio.create_task(reminder_loop())
+    ocr_stop = asyncio.Event()
+    ocr_task = None
+    if settings.ocr_worker_in_web:
+        from app.workers.ocr import run_worker
+
+        ocr_task = asyncio.create_task(run_worker(stop=ocr_stop))
     yield
     task.cancel()
+    if ocr_task:
+        ocr_stop.set()
+        await ocr_task
+    await http_clients.aclose()
+    await asyncio.to_thread(slow_query_log.flush)
 
 
 app = FastAPI(title="Splitify API", version="0.1.0", lifespan=lifespan)
@@ -38,6 +55,7 @@ from app.core.config import settings
 cors_origins = settings.cors_origins.split(",")
 
 from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.query_counter import track_queries, log_request_queries
 
 class TimingMiddleware:
     """Lightweight ASGI middleware — no BaseHTTPMiddleware overhead."""
@@ -51,28 +69,72 @@ class TimingMiddleware:
         t0 = time.perf_counter()
         status_code = 0
 
-        async def send_wrapper(message):
-            nonlocal status_code
-            if message["type"] == "http.response.start":
-                status_code = message["status"]
-            await send(message)
+        with track_queries() as queries:
+            async def send_wrapper(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-db-queries", str(queries.count).encode()),
+                        (b"x-db-time-ms", f"{queries.total_ms:.1f}".encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
 
-        await self.app(scope, receive, send_wrapper)
         ms = int((time.perf_counter() - t0) * 1000)
         method = scope.get("method", "?")
         path = scope.get("path", "?")
         qs = scope.get("query_string", b"").decode()
         qs_str = f"?{qs}" if qs else ""
-        print(f"TIMING: {method} {path}{qs_str} -> {status_code} in {ms}ms")
+        print(f"TIMING: {method} {path}{qs_str} -> {status_code} in {ms}ms, {queries.count} queries in {queries.total_ms:.0f}ms")
+        log_request_queries(method, path, queries)
+
+
+class ReadPinMiddleware:
+    """
+    After a successful write, pin the client's reads to the primary for
+    read_pin_seconds so it sees its own changes despite replica lag. The pin
+    (a unix expiry) is set as a cookie and also returned in a header for
+    clients that prefer to echo it back themselves.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope.get("method") in ("GET", "HEAD", "OPTIONS"):
+            return await self.app(scope, receive, send)
+
+        from app.core.database import READ_PIN_COOKIE, READ_PIN_HEADER
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                pin = str(int(time.time()) + settings.read_pin_seconds)
+                cookie = (
+                    f"{READ_PIN_COOKIE}={pin}; Max-Age={settings.read_pin_seconds}; "
+                    "Path=/; HttpOnly; SameSite=None; Secure"
+                )
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (READ_PIN_HEADER.lower().encode(), pin.encode()),
+                    (b"set-cookie", cookie.encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
 
 
 app.add_middleware(TimingMiddleware)
+if settings.read_replica_url:
+    app.add_middleware(ReadPinMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Read-Pin", "X-DB-Queries", "X-DB-Time-Ms"],
 )
 
 
@@ -83,8 +145,29 @@ app.include_router(assignments_router)
 app.include_router(payments_router)
 app.include_router(stats_router)
 app.include_router(push_router)
+app.include_router(me_router)
+app.include_router(admin_router)
 
 
 @app.get("/api/health")
 async def health():
     return {"status": "ok"}
+
+
+# Internal counters, for admins only (like /api/admin/slow-queries)
+@app.get("/api/health/cache")
+async def health_cache(user: UserSnapshot = Depends(get_admin_user)):
+    from app.services.balance_cache import cache_stats
+    return cache_stats()
+
+
+@app.get("/api/health/http")
+async def health_http(user: UserSnapshot = Depends(get_admin_user)):
+    from app.core.http_client import http_clients
+    return http_clients.stats()
+
+
+@app.get("/api/health/db")
+async def health_db(user: UserSnapshot = Depends(get_admin_user)):
+    from app.core.database import pool_stats
+    return pool_stats()
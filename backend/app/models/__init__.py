@@ -2,9 +2,12 @@ from app.models.user import User
 from app.models.group import Group, GroupMember, GroupRole
 from app.models.receipt import Receipt, LineItem, LineItemAssignment, ReceiptStatus
 from app.models.payment import Payment, Settlement
+from app.models.ledger import GroupLedger, GroupDailySpend
+from app.models.ocr_job import OcrJob, OcrJobStatus
 
 __all__ = [
     "User", "Group", "GroupMember", "GroupRole",
     "Receipt", "LineItem", "LineItemAssignment", "ReceiptStatus",
-    "Payment", "Settlement",
+    "Payment", "Settlement", "GroupLedger", "GroupDailySpend",
+    "OcrJob", "OcrJobStatus",
 ]
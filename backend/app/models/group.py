@@ -4,7 +4,7 @@ import string
 from datetime import datetime, timezone
 import enum
 
-from sqlalchemy import String, DateTime, ForeignKey, Enum as SAEnum, UniqueConstraint
+from sqlalchemy import BigInteger, String, DateTime, ForeignKey, Enum as SAEnum, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -27,6 +27,10 @@ class Group(Base):
     )
     created_by: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), index=True, nullable=False)
     base_currency: Mapped[str] = mapped_column(String(3), default="SGD")
+    # Sum of floor(amount * rate * 100) over assigned line items; see GroupLedger
+    ledger_spent_cents: Mapped[int] = mapped_column(BigInteger, default=0)
+    # Bumped by every write that can change balances or stats; keys the balance cache
+    ledger_version: Mapped[int] = mapped_column(BigInteger, default=0)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
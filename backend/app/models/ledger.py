@@ -0,0 +1,43 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, Date, Integer, Numeric, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class GroupLedger(Base):
+    """
+    Running per-user money totals for a group, kept in step with every write
+    that touches assignments, payments or settlements.
+
+    spent is the exact (unrounded) base-currency share; remainder cents are
+    distributed at read time against groups.ledger_spent_cents, exactly like
+    calculation_service.get_group_financials does.
+    """
+    __tablename__ = "group_ledger"
+
+    group_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("groups.id"), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    spent: Mapped[Decimal] = mapped_column(Numeric, nullable=False, default=Decimal("0"))
+    assignment_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    paid: Mapped[Decimal] = mapped_column(Numeric, nullable=False, default=Decimal("0"))
+    settled_out: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, default=Decimal("0"))
+    settled_in: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, default=Decimal("0"))
+
+
+class GroupDailySpend(Base):
+    """
+    Per-user base-currency spend per day (receipt_date, else the day the receipt
+    was created), maintained alongside GroupLedger. Each receipt's share is
+    rounded to cents on its own, so the rollup is for charts, not balances.
+    """
+    __tablename__ = "group_daily_spend"
+
+    group_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("groups.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,57 @@
+import uuid
+import enum
+from datetime import datetime, timezone
+
+from sqlalchemy import String, Text, DateTime, Integer, ForeignKey, Enum as SAEnum, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class OcrJobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class OcrJob(Base):
+    """
+    A receipt waiting for (or undergoing) OCR. Workers claim queued rows with
+    FOR UPDATE SKIP LOCKED and hold them under a lease they keep renewing;
+    a running job whose lease lapsed (crashed worker) is claimed again.
+    """
+    __tablename__ = "ocr_jobs"
+    __table_args__ = (
+        # Claim order for workers
+        Index("ix_ocr_jobs_queued_run_after", "run_after", postgresql_where=text("status = 'queued'")),
+        Index("ix_ocr_jobs_running_lease", "lease_expires_at", postgresql_where=text("status = 'running'")),
+        # At most one live job per receipt, so re-enqueueing is a no-op
+        Index(
+            "uq_ocr_jobs_live_receipt", "receipt_id", unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    receipt_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("receipts.id", ondelete="CASCADE"), index=True, nullable=False
+    )
+    # Currency the uploader chose, which overrides the one OCR reads
+    currency: Mapped[str | None] = mapped_column(String(3), nullable=True)
+    status: Mapped[OcrJobStatus] = mapped_column(
+        SAEnum(OcrJobStatus), nullable=False, default=OcrJobStatus.queued
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    locked_by: Mapped[str | None] = mapped_column(String, nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
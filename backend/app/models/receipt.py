@@ -5,11 +5,12 @@ from decimal import Decimal
 
 from sqlalchemy import (
     String, Date, DateTime, Integer, Numeric, ForeignKey,
-    Enum as SAEnum, UniqueConstraint
+    Enum as SAEnum, UniqueConstraint, Index, text
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.config import settings
 from app.core.database import Base
 
 
@@ -22,6 +23,17 @@ class ReceiptStatus(str, enum.Enum):
 
 class Receipt(Base):
     __tablename__ = "receipts"
+    __table_args__ = (
+        # Date-ranged financials and stats
+        Index("ix_receipts_group_id_receipt_date", "group_id", "receipt_date"),
+        # Also the keyset order for receipt listing pages
+        Index("ix_receipts_group_id_created_at_id", "group_id", text("created_at DESC"), text("id DESC")),
+        # list_processing_receipts
+        Index(
+            "ix_receipts_pending_group_id_created_at", "group_id", text("created_at DESC"),
+            postgresql_where=text("status IN ('processing', 'failed')"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     group_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("groups.id"), index=True, nullable=False)
@@ -40,12 +52,14 @@ class Receipt(Base):
     )
     raw_llm_response: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     version: Mapped[int] = mapped_column(Integer, default=1)
+    # Remainder-cent ordering used for this receipt's shares (currency_utils.SPLIT_ORDER_*)
+    split_version: Mapped[int] = mapped_column(Integer, default=lambda: settings.split_order_version)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
 
-    line_items: Mapped[list["LineItem"]] = relationship(back_populates="receipt", lazy="selectin", order_by="LineItem.sort_order", cascade="all, delete-orphan")
-    payments: Mapped[list["Payment"]] = relationship(cascade="all, delete-orphan", lazy="noload")
+    line_items: Mapped[list["LineItem"]] = relationship(back_populates="receipt", lazy="selectin", order_by="LineItem.sort_order", cascade="all, delete-orphan", passive_deletes=True)
+    payments: Mapped[list["Payment"]] = relationship(cascade="all, delete-orphan", lazy="noload", passive_deletes=True)
     uploader: Mapped["User"] = relationship(lazy="selectin")
 
 
@@ -53,7 +67,7 @@ class LineItem(Base):
     __tablename__ = "line_items"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    receipt_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("receipts.id"), index=True, nullable=False)
+    receipt_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("receipts.id", ondelete="CASCADE"), index=True, nullable=False)
     description: Mapped[str] = mapped_column(String, nullable=False)
     quantity: Mapped[Decimal] = mapped_column(Numeric(10, 3), nullable=False, default=Decimal("1"))
     unit_price: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
@@ -61,7 +75,7 @@ class LineItem(Base):
     sort_order: Mapped[int] = mapped_column(Integer, default=0)
 
     receipt: Mapped["Receipt"] = relationship(back_populates="line_items")
-    assignments: Mapped[list["LineItemAssignment"]] = relationship(back_populates="line_item", lazy="selectin", cascade="all, delete-orphan")
+    assignments: Mapped[list["LineItemAssignment"]] = relationship(back_populates="line_item", lazy="selectin", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class LineItemAssignment(Base):
@@ -69,7 +83,7 @@ class LineItemAssignment(Base):
     __table_args__ = (UniqueConstraint("line_item_id", "user_id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    line_item_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("line_items.id"), index=True, nullable=False)
+    line_item_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("line_items.id", ondelete="CASCADE"), index=True, nullable=False)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), index=True, nullable=False)
     share_amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
 
@@ -33,6 +33,15 @@ class BalancesResponse(BaseModel):
     total_paid: Decimal = Decimal("0")
 
 
+class GroupBalanceSummary(BaseModel):
+    group_id: uuid.UUID
+    name: str
+    base_currency: str
+    spent: Decimal
+    paid: Decimal
+    net_balance: Decimal
+
+
 class SettleRequest(BaseModel):
     from_user: uuid.UUID
     to_user: uuid.UUID
@@ -1,13 +1,16 @@
 import uuid
 from decimal import Decimal
 
-from sqlalchemy import select, delete, update
+from sqlalchemy import select, delete, update, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.models.receipt import Receipt, LineItem, LineItemAssignment
 
 
-from app.utils.currency_utils import compute_shares
+from app.utils.currency_utils import compute_shares, compute_shares_batch
+from app.services.ledger_service import snapshot_receipt, record_receipt_change, record_assignment_toggle
+from app.services.bulk_write_service import insert_assignments
 
 
 async def bulk_assign(
@@ -15,7 +18,7 @@ async def bulk_assign(
     receipt_id: uuid.UUID,
     assignments: list[dict],
     expected_version: int | None = None,
-) -> list[LineItemAssignment] | None:
+) -> list[dict] | None:
     """
     Replace all assignments for the given receipt.
     Each assignment: {line_item_id, user_ids}
@@ -27,12 +30,15 @@ async def bulk_assign(
     stmt = update(Receipt).where(Receipt.id == receipt_id)
     if expected_version is not None:
         stmt = stmt.where(Receipt.version == expected_version)
-    stmt = stmt.values(version=Receipt.version + 1).returning(Receipt.id)
+    stmt = stmt.values(version=Receipt.version + 1).returning(Receipt.id, Receipt.split_version)
 
     result = await db.execute(stmt)
-    if not result.scalar_one_or_none():
+    row = result.one_or_none()
+    if not row:
         return None  # version conflict
 
+    ledger_before = await snapshot_receipt(db, receipt_id)
+
     # Delete existing assignments for this receipt's line items
     line_item_ids = [a["line_item_id"] for a in assignments]
     if line_item_ids:
@@ -48,23 +54,20 @@ async def bulk_assign(
     )
     line_items_map = {li.id: li for li in result.scalars().all()}
 
-    new_assignments = []
+    shares_by_item = []
     for a in assignments:
         li = line_items_map.get(a["line_item_id"])
         if not li or not a["user_ids"]:
             continue
 
-        shares = compute_shares(li.amount, a["user_ids"], seed=str(li.id))
-        for user_id in a["user_ids"]:
-            new_assignments.append(LineItemAssignment(
-                line_item_id=a["line_item_id"],
-                user_id=user_id,
-                share_amount=shares[user_id],
-            ))
+        shares = compute_shares(
+            li.amount, a["user_ids"], seed=str(li.id), order_version=row.split_version
+        )
+        shares_by_item.append((li.id, {user_id: shares[user_id] for user_id in a["user_ids"]}))
 
-    if new_assignments:
-        db.add_all(new_assignments)
+    new_assignments = await insert_assignments(db, shares_by_item)
 
+    await record_receipt_change(db, ledger_before)
     await db.commit()
     return new_assignments
 
@@ -82,16 +85,20 @@ async def toggle_assignment(
     the line item amount.
     Returns dict with {assigned: bool, new_version: int, assignments: list} or None if version conflict.
     """
+    if settings.assignment_toggle_mode == "sql":
+        return await _toggle_assignment_sql(db, receipt_id, line_item_id, user_id, expected_version)
+
     # Version check and increment
     stmt = update(Receipt).where(Receipt.id == receipt_id)
     if expected_version is not None:
         stmt = stmt.where(Receipt.version == expected_version)
-    stmt = stmt.values(version=Receipt.version + 1).returning(Receipt.version)
+    stmt = stmt.values(version=Receipt.version + 1).returning(Receipt.version, Receipt.split_version)
 
     result = await db.execute(stmt)
-    new_ver = result.scalar_one_or_none()
-    if new_ver is None:
+    row = result.one_or_none()
+    if row is None:
         return None  # version conflict or receipt not found
+    new_ver = row.version
 
     # Fetch line item amount
     line_item_result = await db.execute(
@@ -102,6 +109,8 @@ async def toggle_assignment(
         await db.rollback()
         return None
 
+    ledger_before = await snapshot_receipt(db, receipt_id)
+
     # Fetch all current assignments for this line item
     current_result = await db.execute(
         select(LineItemAssignment).where(
@@ -132,10 +141,13 @@ async def toggle_assignment(
 
     # Recompute shares for all remaining assignments so they sum exactly to amount
     all_user_ids = [a.user_id for a in remaining]
-    shares = compute_shares(line_item.amount, all_user_ids, seed=str(line_item_id))
+    shares = compute_shares(
+        line_item.amount, all_user_ids, seed=str(line_item_id), order_version=row.split_version
+    )
     for a in remaining:
         a.share_amount = shares[a.user_id]
 
+    await record_receipt_change(db, ledger_before)
     await db.commit()
     
     # Return the updated assignments for this line item so the frontend doesn't need to refetch
@@ -146,6 +158,50 @@ async def toggle_assignment(
     return {"assigned": assigned, "new_version": new_ver, "assignments": updated_assignments}
 
 
+async def _toggle_assignment_sql(
+    db: AsyncSession,
+    receipt_id: uuid.UUID,
+    line_item_id: uuid.UUID,
+    user_id: uuid.UUID,
+    expected_version: int | None,
+) -> dict | None:
+    """
+    toggle_assignment with the assignment change done server-side.
+    toggle_line_item_assignment() bumps the version, adds or removes the row
+    and rewrites the item's shares as compute_shares would, then returns the
+    receipt's assignment rows, from which the ledger delta is worked out
+    without another read. The ledger upserts and the commit are separate
+    round trips.
+    """
+    result = await db.execute(
+        text(
+            "SELECT * FROM toggle_line_item_assignment("
+            ":receipt_id, :line_item_id, :user_id, :expected_version, :new_id)"
+        ),
+        {
+            "receipt_id": receipt_id,
+            "line_item_id": line_item_id,
+            "user_id": user_id,
+            "expected_version": expected_version,
+            "new_id": uuid.uuid4(),
+        },
+    )
+    rows = result.all()
+    if not rows:
+        return None  # version conflict, or receipt / line item not found
+    assigned = rows[0].assigned
+
+    await record_assignment_toggle(db, rows, line_item_id, user_id, assigned)
+    await db.commit()
+
+    updated_assignments = [
+        {"id": r.assignment_id, "line_item_id": r.line_item_id, "user_id": r.user_id, "share_amount": r.share_amount}
+        for r in rows
+        if r.line_item_id == line_item_id and r.user_id is not None
+    ]
+    return {"assigned": assigned, "new_version": rows[0].new_version, "assignments": updated_assignments}
+
+
 async def get_assignments(db: AsyncSession, receipt_id: uuid.UUID) -> list[LineItemAssignment]:
     result = await db.execute(
         select(LineItemAssignment)
@@ -161,16 +217,18 @@ async def assign_all_to_all(
     db: AsyncSession,
     receipt_id: uuid.UUID,
     expected_version: int | None = None,
-) -> list[LineItemAssignment] | None:
+) -> list[dict] | None:
     """
     Assign ALL line items in the receipt to ALL group members.
-    Splits amounts evenly using compute_shares.
+    Splits amounts evenly using compute_shares_batch.
     """
     # 1. Update Receipt Version (Optimistic Locking)
     stmt = update(Receipt).where(Receipt.id == receipt_id)
     if expected_version is not None:
         stmt = stmt.where(Receipt.version == expected_version)
-    stmt = stmt.values(version=Receipt.version + 1).returning(Receipt.id, Receipt.group_id)
+    stmt = stmt.values(version=Receipt.version + 1).returning(
+        Receipt.id, Receipt.group_id, Receipt.split_version
+    )
     
     result = await db.execute(stmt)
     row = result.one_or_none()
@@ -196,6 +254,8 @@ async def assign_all_to_all(
         await db.commit()
         return []
 
+    ledger_before = await snapshot_receipt(db, receipt_id)
+
     # 4. Delete existing assignments for these items
     line_item_ids = [li.id for li in line_items]
     await db.execute(
@@ -205,18 +265,17 @@ async def assign_all_to_all(
     )
 
     # 5. Create new assignments
-    new_assignments = []
-    for li in line_items:
-        shares = compute_shares(li.amount, member_ids, seed=str(li.id))
-        for uid, share in shares.items():
-            new_assignments.append(LineItemAssignment(
-                line_item_id=li.id,
-                user_id=uid,
-                share_amount=share,
-            ))
-            
-    if new_assignments:
-        db.add_all(new_assignments)
+    all_shares = compute_shares_batch(
+        [li.amount for li in line_items],
+        member_ids,
+        [[True] * len(member_ids) for _ in line_items],
+        seeds=[str(li.id) for li in line_items],
+        order_version=row.split_version,
+    )
+    new_assignments = await insert_assignments(
+        db, [(li.id, shares) for li, shares in zip(line_items, all_shares)]
+    )
 
+    await record_receipt_change(db, ledger_before)
     await db.commit()
     return new_assignments
@@ -0,0 +1,107 @@
+import uuid
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.group import Group
+from app.utils.lru_cache import LRUCache
+
+# Entries are keyed by (kind, group_id, ledger_version, options). Any money-affecting write
+# bumps groups.ledger_version, so stale entries are simply never asked for again
+# and age out of the LRU.
+_cache = LRUCache(maxsize=settings.balance_cache_size)
+
+
+async def get_ledger_version(db: AsyncSession, group_id: uuid.UUID) -> int | None:
+    result = await db.execute(select(Group.ledger_version).where(Group.id == group_id))
+    return result.scalar_one_or_none()
+
+
+def _key(kind: str, group_id: uuid.UUID, version: int, options: dict) -> tuple:
+    return (kind, group_id, version, *sorted(options.items()))
+
+
+async def _cached(kind: str, db: AsyncSession, group_id: uuid.UUID, compute, **kwargs) -> tuple[int | None, dict]:
+    """Returns (ledger_version, value); version is None for an unknown group."""
+    version = await get_ledger_version(db, group_id)
+    if version is None:
+        return None, await compute(db, group_id, **kwargs)
+
+    key = _key(kind, group_id, version, kwargs)
+    value = _cache.get(key)
+    if value is None:
+        value = await compute(db, group_id, **kwargs)
+        _cache.set(key, value)
+    return version, value
+
+
+async def get_cached_balances(db: AsyncSession, group_id: uuid.UUID, algorithm: str = "greedy") -> dict:
+    from app.services.settlement_service import calculate_balances
+    _, value = await _cached("balances", db, group_id, calculate_balances, algorithm=algorithm)
+    return value
+
+
+async def get_cached_spend_series(
+    db: AsyncSession,
+    group_id: uuid.UUID,
+    granularity: str = "day",
+    since: date | None = None,
+    until: date | None = None,
+) -> dict:
+    from app.services.stats_service import get_spend_series
+    _, value = await _cached(
+        "series", db, group_id, get_spend_series, granularity=granularity, since=since, until=until
+    )
+    return value
+
+
+def _stats_delta(previous: dict, current: dict) -> dict:
+    """Group-level figures plus only the spending_by_user entries that differ from `previous`."""
+    old_users = {u["user_id"]: u for u in previous["spending_by_user"]}
+    new_ids = {u["user_id"] for u in current["spending_by_user"]}
+    return {
+        **current,
+        "spending_by_user": [u for u in current["spending_by_user"] if old_users.get(u["user_id"]) != u],
+        "removed_user_ids": [uid for uid in old_users if uid not in new_ids],
+    }
+
+
+async def get_cached_group_stats(
+    db: AsyncSession,
+    group_id: uuid.UUID,
+    since: date | None = None,
+    until: date | None = None,
+    date_field: str = "receipt_date",
+    cursor: str | None = None,
+) -> dict:
+    """
+    Group stats tagged with a `cursor` (the group's ledger_version). Passing a
+    previous cursor back returns {"changed": False} when nothing moved, or only
+    the users whose figures changed ("full": False) while the stats for that
+    cursor are still cached; otherwise the full stats ("full": True).
+    """
+    from app.services.stats_service import get_group_stats
+
+    options = {"since": since, "until": until, "date_field": date_field}
+    version, stats = await _cached("stats", db, group_id, get_group_stats, **options)
+    if version is None:
+        return stats
+
+    current_cursor = str(version)
+    if cursor is None:
+        return {**stats, "cursor": current_cursor}
+    if cursor == current_cursor:
+        return {"cursor": current_cursor, "changed": False}
+
+    previous = None
+    if cursor.isdigit():
+        previous = _cache.peek(_key("stats", group_id, int(cursor), options))
+    if previous is None:
+        return {**stats, "cursor": current_cursor, "changed": True, "full": True}
+    return {**_stats_delta(previous, stats), "cursor": current_cursor, "changed": True, "full": False}
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
@@ -0,0 +1,68 @@
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# One statement per call whatever the row count: each column travels as a single
+# array parameter and unnest() turns them back into rows. IDs are generated here,
+# so nothing needs to come back from the database. (COPY would be faster still,
+# but needs the raw asyncpg connection outside the session's statement flow.)
+_INSERT_LINE_ITEMS = text("""
+    INSERT INTO line_items (id, receipt_id, description, quantity, unit_price, amount, sort_order)
+    SELECT id, CAST(:receipt_id AS uuid), description, quantity, unit_price, amount, sort_order
+    FROM unnest(
+        CAST(:ids AS uuid[]), CAST(:descriptions AS varchar[]), CAST(:quantities AS numeric[]),
+        CAST(:unit_prices AS numeric[]), CAST(:amounts AS numeric[]), CAST(:sort_orders AS integer[])
+    ) AS t(id, description, quantity, unit_price, amount, sort_order)
+""")
+
+_INSERT_ASSIGNMENTS = text("""
+    INSERT INTO line_item_assignments (id, line_item_id, user_id, share_amount)
+    SELECT * FROM unnest(
+        CAST(:ids AS uuid[]), CAST(:line_item_ids AS uuid[]),
+        CAST(:user_ids AS uuid[]), CAST(:shares AS numeric[])
+    )
+""")
+
+
+async def insert_line_items(db: AsyncSession, receipt_id: uuid.UUID, items: list[dict]) -> list[dict]:
+    """
+    Insert line items for one receipt in a single statement.
+    Each item: {description, quantity, unit_price, amount, sort_order}.
+    Returns the items with their new "id".
+    """
+    rows = [{**item, "id": uuid.uuid4()} for item in items]
+    if rows:
+        await db.execute(_INSERT_LINE_ITEMS, {
+            "receipt_id": receipt_id,
+            "ids": [r["id"] for r in rows],
+            "descriptions": [r["description"] for r in rows],
+            "quantities": [r["quantity"] for r in rows],
+            "unit_prices": [r["unit_price"] for r in rows],
+            "amounts": [r["amount"] for r in rows],
+            "sort_orders": [r["sort_order"] for r in rows],
+        })
+    return rows
+
+
+async def insert_assignments(
+    db: AsyncSession, shares_by_item: list[tuple[uuid.UUID, dict[uuid.UUID, Decimal]]]
+) -> list[dict]:
+    """
+    Insert assignments from [(line_item_id, {user_id: share_amount})] in a
+    single statement. Returns AssignmentResponse-shaped dicts.
+    """
+    rows = [
+        {"id": uuid.uuid4(), "line_item_id": line_item_id, "user_id": user_id, "share_amount": share}
+        for line_item_id, shares in shares_by_item
+        for user_id, share in shares.items()
+    ]
+    if rows:
+        await db.execute(_INSERT_ASSIGNMENTS, {
+            "ids": [r["id"] for r in rows],
+            "line_item_ids": [r["line_item_id"] for r in rows],
+            "user_ids": [r["user_id"] for r in rows],
+            "shares": [r["share_amount"] for r in rows],
+        })
+    return rows
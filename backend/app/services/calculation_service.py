@@ -1,25 +1,130 @@
 import uuid
 from collections import defaultdict
-from decimal import Decimal
+from datetime import date
+from decimal import Context, Decimal
 
-from sqlalchemy import select
+from sqlalchemy import select, func, true, union, Numeric
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.models.receipt import Receipt, LineItem, LineItemAssignment
 from app.models.payment import Payment, Settlement
 from app.models.user import User
 
 
+# Shares are rounded to 28 digits like any Decimal op, but their per-user sums
+# are kept exact: Postgres adds numerics exactly, so every engine (Python,
+# SQL, ledger) reaches the same totals whatever order the rows arrive in.
+_EXACT = Context(prec=200)
+
+
+def exact_add(total: Decimal, share: Decimal) -> Decimal:
+    return _EXACT.add(total, share)
+
+
+def exact_sub(a: Decimal, b: Decimal) -> Decimal:
+    return _EXACT.subtract(a, b)
+
+
+def exact_cents(amount: Decimal) -> Decimal:
+    """amount * 100 without rounding a long exact sum back to 28 digits."""
+    return _EXACT.multiply(amount, Decimal("100"))
+
+
+def distribute_group_cents(
+    group_exact_totals: dict[uuid.UUID, Decimal],
+    total_group_cents: int,
+) -> dict[uuid.UUID, Decimal]:
+    """
+    Round each user's exact spent down to whole cents, then hand the group's
+    leftover cents out one at a time in user-id order so the rounded shares
+    sum exactly to total_group_cents.
+    """
+    if not group_exact_totals:
+        return {}
+
+    base_user_cents = {}
+    total_base_cents = 0
+    all_users = list(group_exact_totals.keys())
+
+    for uid in all_users:
+        cents_exact = exact_cents(group_exact_totals[uid])
+        base_cents = int(cents_exact.to_integral_value(rounding="ROUND_DOWN"))
+        base_user_cents[uid] = base_cents
+        total_base_cents += base_cents
+
+    extra_count = total_group_cents - total_base_cents
+
+    # We don't need a deterministic hash here because order doesn't matter
+    # as much when it's done once per group, but we can just use the UUID string
+    sorted_ids = sorted(all_users, key=str)
+
+    spent = {}
+    for i, uid in enumerate(sorted_ids):
+        cents = base_user_cents[uid] + (1 if i < extra_count else 0)
+        spent[uid] = Decimal(cents) / Decimal("100")
+    return spent
+
+
+DATE_FIELDS = ("receipt_date", "created_at")
+
+
+def date_range_criteria(since: date | None, until: date | None, date_field: str) -> tuple[list, list]:
+    """
+    Half-open [since, until) filters for receipt-derived rows and for settlements.
+    Receipts are bounded on `date_field`; settlements on when they were settled.
+    """
+    column = Receipt.receipt_date if date_field == "receipt_date" else Receipt.created_at
+    receipt_criteria, settlement_criteria = [], []
+    if since is not None:
+        receipt_criteria.append(column >= since)
+        settlement_criteria.append(Settlement.settled_at >= since)
+    if until is not None:
+        receipt_criteria.append(column < until)
+        settlement_criteria.append(Settlement.settled_at < until)
+    return receipt_criteria, settlement_criteria
+
+
+async def load_group_financials(
+    db: AsyncSession,
+    group_id: uuid.UUID,
+    since: date | None = None,
+    until: date | None = None,
+    date_field: str = "receipt_date",
+) -> dict[uuid.UUID, dict]:
+    """
+    Group financials from the engine selected by settings.financials_engine.
+    Date-ranged requests always recompute from raw rows, since the ledger only
+    holds all-time totals.
+    """
+    if since is not None or until is not None:
+        return await get_group_financials(db, group_id, since, until, date_field)
+    if settings.financials_engine == "ledger":
+        from app.services.ledger_service import get_ledger_financials
+        return await get_ledger_financials(db, group_id)
+    if settings.financials_engine == "sql":
+        return await get_group_financials_sql(db, group_id)
+    if settings.financials_engine == "stream":
+        return await get_group_financials_stream(db, group_id)
+    return await get_group_financials(db, group_id)
+
+
 async def get_group_financials(
     db: AsyncSession,
     group_id: uuid.UUID,
+    since: date | None = None,
+    until: date | None = None,
+    date_field: str = "receipt_date",
 ) -> dict[uuid.UUID, dict]:
     """
-    Returns complete per-user financial picture for a group (all-time).
+    Returns complete per-user financial picture for a group (all-time, or
+    limited to [since, until) on the receipts' `date_field`).
     Keys per user: spent, paid, settled_out, settled_in, net_balance, display_name.
     net_balance = paid - spent + settled_out - settled_in.
     Positive net_balance = owed by others; negative = owes others.
     """
+    receipt_range, settlement_range = date_range_criteria(since, until, date_field)
+
     assignments_result = await db.execute(
         select(
             Receipt.id.label("receipt_id"),
@@ -32,7 +137,7 @@ async def get_group_financials(
         .join(LineItem, LineItem.id == LineItemAssignment.line_item_id)
         .join(Receipt, Receipt.id == LineItem.receipt_id)
         .outerjoin(User, User.id == LineItemAssignment.user_id)
-        .where(Receipt.group_id == group_id)
+        .where(Receipt.group_id == group_id, *receipt_range)
     )
 
     payments_result = await db.execute(
@@ -45,7 +150,7 @@ async def get_group_financials(
         .select_from(Payment)
         .join(Receipt, Receipt.id == Payment.receipt_id)
         .outerjoin(User, User.id == Payment.paid_by)
-        .where(Receipt.group_id == group_id)
+        .where(Receipt.group_id == group_id, *receipt_range)
     )
 
     settlements_result = await db.execute(
@@ -53,6 +158,7 @@ async def get_group_financials(
         .where(
             Settlement.group_id == group_id,
             Settlement.is_settled == True,
+            *settlement_range,
         )
     )
 
@@ -88,8 +194,6 @@ async def get_group_financials(
         if row.display_name and not financials[uid]["display_name"]:
             financials[uid]["display_name"] = row.display_name
 
-    from app.utils.currency_utils import compute_receipt_shares
-    
     # Track unrounded exact fractions for the entire group
     group_exact_totals = {}
     total_group_cents = 0
@@ -114,33 +218,15 @@ async def get_group_financials(
             for uid in user_ids:
                 if uid not in group_exact_totals:
                     group_exact_totals[uid] = Decimal("0")
-                group_exact_totals[uid] += exact_share
+                group_exact_totals[uid] = exact_add(group_exact_totals[uid], exact_share)
             
             receipt_cents += int((amount * rate * Decimal("100")).to_integral_value(rounding="ROUND_DOWN"))
             
         total_group_cents += receipt_cents
         
     # Distribute group-level remaining cents perfectly among the users
-    if group_exact_totals:
-        base_user_cents = {}
-        total_base_cents = 0
-        all_users = list(group_exact_totals.keys())
-        
-        for uid in all_users:
-            cents_exact = group_exact_totals[uid] * Decimal("100")
-            base_cents = int(cents_exact.to_integral_value(rounding="ROUND_DOWN"))
-            base_user_cents[uid] = base_cents
-            total_base_cents += base_cents
-
-        extra_count = total_group_cents - total_base_cents
-        
-        # We don't need a deterministic hash here because order doesn't matter
-        # as much when it's done once per group, but we can just use the UUID string
-        sorted_ids = sorted(all_users, key=str)
-        
-        for i, uid in enumerate(sorted_ids):
-            cents = base_user_cents[uid] + (1 if i < extra_count else 0)
-            financials[uid]["spent"] += Decimal(cents) / Decimal("100")
+    for uid, spent in distribute_group_cents(group_exact_totals, total_group_cents).items():
+        financials[uid]["spent"] += spent
 
     for user_id, amount, rate, name in payments_result.all():
         effective_rate = rate if rate is not None else Decimal("1")
@@ -159,3 +245,233 @@ async def get_group_financials(
         )
 
     return dict(financials)
+
+
+async def get_group_financials_stream(
+    db: AsyncSession,
+    group_id: uuid.UUID,
+) -> dict[uuid.UUID, dict]:
+    """
+    Same result as get_group_financials, reading rows through a server-side
+    cursor instead of materialising them. Assignment rows arrive ordered by
+    receipt and line item, so each line item is folded into the running
+    per-user totals as soon as its last row is seen and then dropped; memory
+    stays proportional to the number of users, not receipts.
+    """
+    batch = settings.financials_stream_batch
+
+    assignments_stream = await db.stream(
+        select(
+            Receipt.exchange_rate,
+            LineItem.id.label("line_item_id"),
+            LineItem.amount.label("amount"),
+            LineItemAssignment.user_id,
+            User.display_name,
+        )
+        .join(LineItem, LineItem.id == LineItemAssignment.line_item_id)
+        .join(Receipt, Receipt.id == LineItem.receipt_id)
+        .outerjoin(User, User.id == LineItemAssignment.user_id)
+        .where(Receipt.group_id == group_id)
+        .order_by(Receipt.id, LineItem.id)
+        .execution_options(yield_per=batch)
+    )
+
+    financials: dict = defaultdict(lambda: {
+        "spent": Decimal("0"),
+        "paid": Decimal("0"),
+        "settled_out": Decimal("0"),
+        "settled_in": Decimal("0"),
+        "display_name": None,
+    })
+    group_exact_totals: dict = defaultdict(lambda: Decimal("0"))
+    total_group_cents = 0
+
+    current_item = None
+    amount = rate = None
+    user_ids: list = []
+
+    def fold_item():
+        nonlocal total_group_cents
+        exact_share = (amount / Decimal(len(user_ids))) * rate
+        for uid in user_ids:
+            group_exact_totals[uid] = exact_add(group_exact_totals[uid], exact_share)
+        total_group_cents += int((amount * rate * Decimal("100")).to_integral_value(rounding="ROUND_DOWN"))
+
+    async for row in assignments_stream:
+        if row.line_item_id != current_item:
+            if current_item is not None:
+                fold_item()
+            current_item = row.line_item_id
+            amount = row.amount
+            rate = row.exchange_rate if row.exchange_rate is not None else Decimal("1")
+            user_ids = []
+        user_ids.append(row.user_id)
+        if row.display_name and not financials[row.user_id]["display_name"]:
+            financials[row.user_id]["display_name"] = row.display_name
+    if current_item is not None:
+        fold_item()
+
+    for uid, spent in distribute_group_cents(dict(group_exact_totals), total_group_cents).items():
+        financials[uid]["spent"] += spent
+
+    payments_stream = await db.stream(
+        select(
+            Payment.paid_by,
+            Payment.amount,
+            Receipt.exchange_rate,
+            User.display_name,
+        )
+        .select_from(Payment)
+        .join(Receipt, Receipt.id == Payment.receipt_id)
+        .outerjoin(User, User.id == Payment.paid_by)
+        .where(Receipt.group_id == group_id)
+        .execution_options(yield_per=batch)
+    )
+    async for user_id, paid_amount, paid_rate, name in payments_stream:
+        financials[user_id]["paid"] += paid_amount * (paid_rate if paid_rate is not None else Decimal("1"))
+        if name and not financials[user_id]["display_name"]:
+            financials[user_id]["display_name"] = name
+
+    settlements_stream = await db.stream(
+        select(Settlement.from_user, Settlement.to_user, Settlement.amount)
+        .where(
+            Settlement.group_id == group_id,
+            Settlement.is_settled == True,
+        )
+        .execution_options(yield_per=batch)
+    )
+    async for from_user, to_user, settled_amount in settlements_stream:
+        financials[from_user]["settled_out"] += settled_amount
+        financials[to_user]["settled_in"] += settled_amount
+
+    for data in financials.values():
+        data["net_balance"] = (
+            data["paid"] - data["spent"] + data["settled_out"] - data["settled_in"]
+        )
+
+    return dict(financials)
+
+
+def _py_decimal(expr):
+    """Round like Python's default Decimal context (28 significant digits, half-even)."""
+    return func.py_decimal28(expr)
+
+
+async def get_group_financials_sql(
+    db: AsyncSession,
+    group_id: uuid.UUID,
+) -> dict[uuid.UUID, dict]:
+    """
+    Same result as get_group_financials, aggregated by Postgres in one
+    set-based query returning a row per user.
+
+    Each share is (amount / n_users) * rate rounded through py_decimal28()
+    exactly as Python's Decimal would round it. Postgres sums them exactly,
+    which the Python engines match through exact_add(); only the
+    remainder-cent distribution happens here.
+    """
+    rate = func.coalesce(Receipt.exchange_rate, 1)
+    n_users = func.count().over(partition_by=LineItem.id)
+
+    shares = (
+        select(
+            LineItemAssignment.user_id,
+            _py_decimal(
+                _py_decimal(LineItem.amount.cast(Numeric(60, 40)) / n_users) * rate
+            ).label("share"),
+            func.trunc(LineItem.amount * rate * 100).label("item_cents"),
+            func.row_number().over(partition_by=LineItem.id).label("item_row"),
+        )
+        .join(LineItem, LineItem.id == LineItemAssignment.line_item_id)
+        .join(Receipt, Receipt.id == LineItem.receipt_id)
+        .where(Receipt.group_id == group_id)
+        .cte("shares")
+    )
+    spent = (
+        select(shares.c.user_id, func.sum(shares.c.share).label("spent"))
+        .group_by(shares.c.user_id)
+        .cte("spent")
+    )
+    group_cents = (
+        select(
+            func.coalesce(
+                func.sum(shares.c.item_cents).filter(shares.c.item_row == 1), 0
+            ).label("total_cents")
+        )
+        .cte("group_cents")
+    )
+    paid = (
+        select(
+            Payment.paid_by.label("user_id"),
+            func.sum(Payment.amount * rate).label("paid"),
+        )
+        .join(Receipt, Receipt.id == Payment.receipt_id)
+        .where(Receipt.group_id == group_id)
+        .group_by(Payment.paid_by)
+        .cte("paid")
+    )
+    settled_filter = (Settlement.group_id == group_id, Settlement.is_settled == True)
+    settled_out = (
+        select(Settlement.from_user.label("user_id"), func.sum(Settlement.amount).label("amount"))
+        .where(*settled_filter)
+        .group_by(Settlement.from_user)
+        .cte("settled_out")
+    )
+    settled_in = (
+        select(Settlement.to_user.label("user_id"), func.sum(Settlement.amount).label("amount"))
+        .where(*settled_filter)
+        .group_by(Settlement.to_user)
+        .cte("settled_in")
+    )
+    members = union(
+        select(spent.c.user_id),
+        select(paid.c.user_id),
+        select(settled_out.c.user_id),
+        select(settled_in.c.user_id),
+    ).cte("members")
+
+    result = await db.execute(
+        select(
+            members.c.user_id,
+            spent.c.spent,
+            paid.c.paid,
+            settled_out.c.amount.label("settled_out"),
+            settled_in.c.amount.label("settled_in"),
+            User.display_name,
+            group_cents.c.total_cents,
+        )
+        .select_from(members)
+        .join(group_cents, true())
+        .outerjoin(spent, spent.c.user_id == members.c.user_id)
+        .outerjoin(paid, paid.c.user_id == members.c.user_id)
+        .outerjoin(settled_out, settled_out.c.user_id == members.c.user_id)
+        .outerjoin(settled_in, settled_in.c.user_id == members.c.user_id)
+        .outerjoin(User, User.id == members.c.user_id)
+    )
+
+    financials: dict = {}
+    group_exact_totals = {}
+    total_group_cents = 0
+
+    for row in result.all():
+        total_group_cents = int(row.total_cents)
+        if row.spent is not None:
+            group_exact_totals[row.user_id] = row.spent
+        financials[row.user_id] = {
+            "spent": Decimal("0"),
+            "paid": row.paid if row.paid is not None else Decimal("0"),
+            "settled_out": row.settled_out if row.settled_out is not None else Decimal("0"),
+            "settled_in": row.settled_in if row.settled_in is not None else Decimal("0"),
+            # The Python engine only learns names from assignment and payment rows
+            "display_name": row.display_name if row.spent is not None or row.paid is not None else None,
+        }
+
+    for uid, spent_amount in distribute_group_cents(group_exact_totals, total_group_cents).items():
+        financials[uid]["spent"] += spent_amount
+
+    for data in financials.values():
+        data["net_balance"] = (
+            data["paid"] - data["spent"] + data["settled_out"] - data["settled_in"]
+        )
+
+    return financials
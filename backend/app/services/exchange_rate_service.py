@@ -1,7 +1,7 @@
 import time
 from decimal import Decimal
 
-import httpx
+from app.core.http_client import http_clients
 
 _cache: dict[str, tuple[dict[str, float], float]] = {}
 _CACHE_TTL = 3600  # 1 hour
@@ -19,12 +19,12 @@ async def get_exchange_rate(from_currency: str, to_currency: str) -> Decimal:
     if cached and now - cached[1] < _CACHE_TTL:
         rates = cached[0]
     else:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(f"https://open.er-api.com/v6/latest/{from_currency}")
-            resp.raise_for_status()
-            data = resp.json()
-            rates = data["rates"]
-            _cache[from_currency] = (rates, now)
+        url = f"https://open.er-api.com/v6/latest/{from_currency}"
+        resp = await http_clients.client(url).get(url)
+        resp.raise_for_status()
+        data = resp.json()
+        rates = data["rates"]
+        _cache[from_currency] = (rates, now)
 
     rate = rates.get(to_currency)
     if rate is None:
@@ -52,6 +52,8 @@ async def update_group(
         group.name = name.strip()
     if base_currency is not None:
         group.base_currency = base_currency.upper()
+        # Stats report the base currency
+        group.ledger_version = Group.ledger_version + 1
     await db.commit()
     await db.refresh(group)
     return group
@@ -72,13 +74,16 @@ async def delete_group(db: AsyncSession, group_id: uuid.UUID, user_id: uuid.UUID
     if not group:
         raise ValueError("Group not found")
 
-    from app.services.receipt_service import delete_all_receipts
-    from app.services.payment_service import clear_group_settlements
+    from app.services.receipt_service import delete_group_receipts_chunked
+    from app.models.payment import Settlement
+    from app.models.ledger import GroupLedger, GroupDailySpend
     from sqlalchemy import delete
 
-    # Cascade clear heavy components
-    await delete_all_receipts(db, group_id)
-    await clear_group_settlements(db, group_id)
+    # Receipts go in committed chunks (their children cascade); the rest is small
+    await delete_group_receipts_chunked(db, group_id)
+    await db.execute(delete(Settlement).where(Settlement.group_id == group_id))
+    await db.execute(delete(GroupLedger).where(GroupLedger.group_id == group_id))
+    await db.execute(delete(GroupDailySpend).where(GroupDailySpend.group_id == group_id))
 
     # Bulk delete members then group to avoid ORM N+1 deletion loops
     await db.execute(delete(GroupMember).where(GroupMember.group_id == group_id))
@@ -109,33 +114,17 @@ async def join_group_by_code(db: AsyncSession, invite_code: str, user: User) ->
 
 
 async def reset_group_data(db: AsyncSession, group_id: uuid.UUID) -> dict:
-    from app.models.receipt import Receipt, LineItem, LineItemAssignment
-    from app.models.payment import Payment, Settlement
+    from app.models.payment import Settlement
+    from app.services.receipt_service import delete_group_receipts_chunked
+    from app.services.ledger_service import clear_settlements
     from sqlalchemy import delete
 
-    # Get receipt IDs for this group first
-    receipt_ids_result = await db.execute(
-        select(Receipt.id).where(Receipt.group_id == group_id)
-    )
-    receipt_ids = [row[0] for row in receipt_ids_result.all()]
-    count = len(receipt_ids)
-
-    if receipt_ids:
-        # Delete dependents explicitly before receipts to satisfy FK constraints.
-        # (lazy="noload" on relationships means ORM cascade won't fire automatically.)
-        line_item_ids_result = await db.execute(
-            select(LineItem.id).where(LineItem.receipt_id.in_(receipt_ids))
-        )
-        line_item_ids = [row[0] for row in line_item_ids_result.all()]
-
-        if line_item_ids:
-            await db.execute(delete(LineItemAssignment).where(LineItemAssignment.line_item_id.in_(line_item_ids)))
-
-        await db.execute(delete(Payment).where(Payment.receipt_id.in_(receipt_ids)))
-        await db.execute(delete(LineItem).where(LineItem.receipt_id.in_(receipt_ids)))
-        await db.execute(delete(Receipt).where(Receipt.id.in_(receipt_ids)))
+    # Line items, assignments and payments cascade from each receipt chunk,
+    # which also takes its contribution out of the ledger
+    count = await delete_group_receipts_chunked(db, group_id)
 
     await db.execute(delete(Settlement).where(Settlement.group_id == group_id))
+    await clear_settlements(db, group_id)
 
     await db.commit()
 
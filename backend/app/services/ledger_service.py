@@ -0,0 +1,430 @@
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from types import SimpleNamespace
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.group import Group, GroupMember
+from app.models.ledger import GroupLedger, GroupDailySpend
+from app.models.receipt import Receipt, LineItem, LineItemAssignment
+from app.models.payment import Payment, Settlement
+from app.models.user import User
+from app.services.calculation_service import distribute_group_cents, exact_add, exact_sub, exact_cents
+
+_COLUMNS = ("spent", "assignment_count", "paid", "settled_out", "settled_in")
+
+
+def _zero_entry() -> dict:
+    return {
+        "spent": Decimal("0"),
+        "assignment_count": 0,
+        "paid": Decimal("0"),
+        "settled_out": Decimal("0"),
+        "settled_in": Decimal("0"),
+    }
+
+
+async def _collect_contributions(db: AsyncSession, *criteria) -> dict:
+    """
+    What the receipts matching `criteria` add to the ledger: per-user exact
+    spent, assignment count and paid, plus the floor-cent total of their
+    assigned line items. Uses the same Decimal math as get_group_financials.
+    "daily" holds each user's spend in cents per day for group_daily_spend.
+    """
+    assignments_result = await db.execute(
+        select(
+            Receipt.group_id,
+            Receipt.id.label("receipt_id"),
+            Receipt.receipt_date,
+            Receipt.created_at,
+            Receipt.exchange_rate,
+            LineItem.id.label("line_item_id"),
+            LineItem.amount,
+            LineItemAssignment.user_id,
+        )
+        # Outer joins so the receipt's group is known even without assignments
+        .select_from(Receipt)
+        .outerjoin(LineItem, LineItem.receipt_id == Receipt.id)
+        .outerjoin(LineItemAssignment, LineItemAssignment.line_item_id == LineItem.id)
+        .where(*criteria)
+    )
+    payments_result = await db.execute(
+        select(Receipt.group_id, Payment.paid_by, Payment.amount, Receipt.exchange_rate)
+        .select_from(Payment)
+        .join(Receipt, Receipt.id == Payment.receipt_id)
+        .where(*criteria)
+    )
+
+    return _fold_contributions(assignments_result.all(), payments_result.all())
+
+
+def _fold_contributions(assignment_rows, payment_rows) -> dict:
+    """The in-memory half of _collect_contributions, over already fetched rows."""
+    group_id = None
+    users: dict = defaultdict(_zero_entry)
+    line_items: dict = {}
+    for row in assignment_rows:
+        group_id = row.group_id
+        if row.user_id is None:
+            continue
+        if row.line_item_id not in line_items:
+            rate = row.exchange_rate if row.exchange_rate is not None else Decimal("1")
+            day = row.receipt_date or row.created_at.date()
+            line_items[row.line_item_id] = {
+                "amount": row.amount, "rate": rate, "user_ids": [],
+                "receipt_id": row.receipt_id, "day": day,
+            }
+        line_items[row.line_item_id]["user_ids"].append(row.user_id)
+
+    cents = 0
+    receipt_spend: dict = defaultdict(Decimal)
+    for item in line_items.values():
+        amount, rate, user_ids = item["amount"], item["rate"], item["user_ids"]
+        exact_share = (amount / Decimal(len(user_ids))) * rate
+        for uid in user_ids:
+            users[uid]["spent"] = exact_add(users[uid]["spent"], exact_share)
+            users[uid]["assignment_count"] += 1
+            key = (item["receipt_id"], item["day"], uid)
+            receipt_spend[key] = exact_add(receipt_spend[key], exact_share)
+        cents += int((amount * rate * Decimal("100")).to_integral_value(rounding="ROUND_DOWN"))
+
+    # Rounded per receipt so incremental updates and full rebuilds agree
+    daily: dict = defaultdict(int)
+    for (_, day, uid), spent in receipt_spend.items():
+        daily[(day, uid)] += int(exact_cents(spent).quantize(Decimal("1")))
+
+    for gid, paid_by, amount, rate in payment_rows:
+        group_id = gid
+        users[paid_by]["paid"] += amount * (rate if rate is not None else Decimal("1"))
+
+    return {"group_id": group_id, "users": dict(users), "cents": cents, "daily": dict(daily)}
+
+
+async def _apply_deltas(
+    db: AsyncSession,
+    group_id: uuid.UUID,
+    deltas: dict[uuid.UUID, dict],
+    cents_delta: int = 0,
+    daily_deltas: dict[tuple, int] | None = None,
+) -> None:
+    """
+    Add per-user deltas onto group_ledger rows (upserting), cents onto the
+    group and {(day, user_id): cents} onto group_daily_spend, bumping
+    groups.ledger_version so cached balances are invalidated.
+    """
+    rows = []
+    for uid, delta in deltas.items():
+        row = {**_zero_entry(), **delta}
+        if any(row[c] for c in _COLUMNS):
+            rows.append({"group_id": group_id, "user_id": uid, **row})
+
+    if rows:
+        stmt = insert(GroupLedger).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[GroupLedger.group_id, GroupLedger.user_id],
+            set_={c: getattr(GroupLedger, c) + getattr(stmt.excluded, c) for c in _COLUMNS},
+        )
+        await db.execute(stmt)
+
+    daily_rows = [
+        {"group_id": group_id, "day": day, "user_id": uid, "cents": c}
+        for (day, uid), c in (daily_deltas or {}).items()
+        if c
+    ]
+    if daily_rows:
+        stmt = insert(GroupDailySpend).values(daily_rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[GroupDailySpend.group_id, GroupDailySpend.day, GroupDailySpend.user_id],
+            set_={"cents": GroupDailySpend.cents + stmt.excluded.cents},
+        )
+        await db.execute(stmt)
+
+    await db.execute(
+        update(Group)
+        .where(Group.id == group_id)
+        .values(
+            ledger_spent_cents=Group.ledger_spent_cents + cents_delta,
+            ledger_version=Group.ledger_version + 1,
+        )
+    )
+
+
+async def bump_group_version(db: AsyncSession, group_id: uuid.UUID) -> None:
+    """Mark a group's money-related data as changed without touching the ledger."""
+    await db.execute(
+        update(Group).where(Group.id == group_id).values(ledger_version=Group.ledger_version + 1)
+    )
+
+
+async def bump_receipt_group_version(db: AsyncSession, receipt_id: uuid.UUID) -> None:
+    await db.execute(
+        update(Group)
+        .where(Group.id == select(Receipt.group_id).where(Receipt.id == receipt_id).scalar_subquery())
+        .values(ledger_version=Group.ledger_version + 1)
+    )
+
+
+async def bump_user_groups_version(db: AsyncSession, user_id: uuid.UUID) -> None:
+    """Invalidate every group the user belongs to, e.g. after a display name change."""
+    await db.execute(
+        update(Group)
+        .where(Group.id.in_(select(GroupMember.group_id).where(GroupMember.user_id == user_id)))
+        .values(ledger_version=Group.ledger_version + 1)
+    )
+
+
+def blank_snapshot(receipt_id: uuid.UUID) -> dict:
+    """Snapshot for a receipt that does not exist yet (nothing to subtract)."""
+    return {"receipt_id": receipt_id, "group_id": None, "users": {}, "cents": 0, "daily": {}}
+
+
+async def snapshot_receipt(db: AsyncSession, receipt_id: uuid.UUID) -> dict:
+    """
+    Capture a receipt's current ledger contribution. Call before mutating the
+    receipt, then pass the result to record_receipt_change() before commit.
+
+    The receipt row is locked first and held until commit, so a concurrent
+    edit of the same receipt waits for ours instead of snapshotting the same
+    "before" state and applying our delta a second time.
+    """
+    await db.execute(select(Receipt.id).where(Receipt.id == receipt_id).with_for_update())
+    snapshot = await _collect_contributions(db, Receipt.id == receipt_id)
+    snapshot["receipt_id"] = receipt_id
+    return snapshot
+
+
+async def record_receipt_change(db: AsyncSession, before: dict) -> None:
+    """Apply the difference between `before` and the receipt's current state to the ledger."""
+    await db.flush()
+    after = await _collect_contributions(db, Receipt.id == before["receipt_id"])
+
+    await _apply_receipt_diff(db, before, after)
+
+
+async def snapshot_receipts(db: AsyncSession, receipt_ids: list[uuid.UUID]) -> dict:
+    """Combined contribution of several receipts of one group, e.g. a chunk about to be deleted."""
+    return await _collect_contributions(db, Receipt.id.in_(receipt_ids))
+
+
+async def record_receipts_removed(db: AsyncSession, before: dict) -> None:
+    """Subtract a snapshot_receipts() result once those receipts are deleted."""
+    await _apply_receipt_diff(db, before, blank_snapshot(None))
+
+
+async def record_assignment_toggle(
+    db: AsyncSession, rows: list, line_item_id: uuid.UUID, user_id: uuid.UUID, assigned: bool
+) -> None:
+    """
+    Ledger update for a single assignment toggle, without re-reading the receipt.
+    `rows` are the receipt's outer-joined assignment rows after the toggle (as
+    _collect_contributions selects them); undoing the toggle in memory gives
+    the before state. Payments are untouched by a toggle, so they are left out.
+    """
+    if assigned:
+        before_rows = [r for r in rows if not (r.line_item_id == line_item_id and r.user_id == user_id)]
+    else:
+        template = next(r for r in rows if r.line_item_id == line_item_id)
+        before_rows = list(rows) + [SimpleNamespace(**{**template._asdict(), "user_id": user_id})]
+
+    before = _fold_contributions(before_rows, [])
+    after = _fold_contributions(rows, [])
+    await _apply_receipt_diff(db, before, after)
+
+
+async def _apply_receipt_diff(db: AsyncSession, before: dict, after: dict) -> None:
+    group_id = before["group_id"] or after["group_id"]
+    if group_id is None:
+        return
+
+    deltas = {}
+    for uid in set(before["users"]) | set(after["users"]):
+        old = before["users"].get(uid) or _zero_entry()
+        new = after["users"].get(uid) or _zero_entry()
+        deltas[uid] = {
+            "spent": exact_sub(new["spent"], old["spent"]),
+            "assignment_count": new["assignment_count"] - old["assignment_count"],
+            "paid": exact_sub(new["paid"], old["paid"]),
+        }
+
+    daily_deltas = dict(after["daily"])
+    for key, c in before["daily"].items():
+        daily_deltas[key] = daily_deltas.get(key, 0) - c
+
+    await _apply_deltas(db, group_id, deltas, after["cents"] - before["cents"], daily_deltas)
+
+
+async def apply_payment(
+    db: AsyncSession, receipt_id: uuid.UUID, paid_by: uuid.UUID, amount: Decimal
+) -> None:
+    """
+    Add a payment (negative amount to remove one) converted at the receipt's
+    rate. The receipt row is locked like snapshot_receipt() does, so a
+    concurrent rate change either sees this payment or is seen by it.
+    """
+    result = await db.execute(
+        select(Receipt.group_id, Receipt.exchange_rate).where(Receipt.id == receipt_id).with_for_update()
+    )
+    row = result.one_or_none()
+    if not row:
+        return
+    rate = row.exchange_rate if row.exchange_rate is not None else Decimal("1")
+    await _apply_deltas(db, row.group_id, {paid_by: {"paid": amount * rate}})
+
+
+async def apply_settlement(
+    db: AsyncSession, group_id: uuid.UUID, from_user: uuid.UUID, to_user: uuid.UUID, amount: Decimal
+) -> None:
+    await _apply_deltas(db, group_id, {
+        from_user: {"settled_out": amount},
+        to_user: {"settled_in": amount},
+    })
+
+
+async def clear_settlements(db: AsyncSession, group_id: uuid.UUID) -> None:
+    await db.execute(
+        update(GroupLedger)
+        .where(GroupLedger.group_id == group_id)
+        .values(settled_out=Decimal("0"), settled_in=Decimal("0"))
+    )
+    await bump_group_version(db, group_id)
+
+
+async def clear_group(db: AsyncSession, group_id: uuid.UUID) -> None:
+    await db.execute(delete(GroupLedger).where(GroupLedger.group_id == group_id))
+    await db.execute(delete(GroupDailySpend).where(GroupDailySpend.group_id == group_id))
+    await db.execute(
+        update(Group)
+        .where(Group.id == group_id)
+        .values(ledger_spent_cents=0, ledger_version=Group.ledger_version + 1)
+    )
+
+
+async def _lock_group(db: AsyncSession, group_id: uuid.UUID) -> None:
+    await db.execute(select(Group.id).where(Group.id == group_id).with_for_update())
+
+
+async def rebuild_group_ledger(db: AsyncSession, group_id: uuid.UUID) -> None:
+    """
+    Recompute a group's ledger from raw rows. Used for backfills and repairs;
+    safe against a live app, since the group row is locked first and every
+    ledger write (_apply_deltas) updates that row too.
+    """
+    await _lock_group(db, group_id)
+    contributions = await _collect_contributions(db, Receipt.group_id == group_id)
+    deltas = contributions["users"]
+
+    settlements_result = await db.execute(
+        select(Settlement.from_user, Settlement.to_user, Settlement.amount)
+        .where(
+            Settlement.group_id == group_id,
+            Settlement.is_settled == True,
+        )
+    )
+    for from_user, to_user, amount in settlements_result.all():
+        deltas.setdefault(from_user, _zero_entry())["settled_out"] += amount
+        deltas.setdefault(to_user, _zero_entry())["settled_in"] += amount
+
+    await clear_group(db, group_id)
+    await _apply_deltas(db, group_id, deltas, contributions["cents"], contributions["daily"])
+
+
+async def rebuild_daily_spend(db: AsyncSession, group_id: uuid.UUID) -> None:
+    """Recompute only a group's group_daily_spend rows from its receipts."""
+    await _lock_group(db, group_id)
+    contributions = await _collect_contributions(db, Receipt.group_id == group_id)
+    await db.execute(delete(GroupDailySpend).where(GroupDailySpend.group_id == group_id))
+    await _apply_deltas(db, group_id, {}, 0, contributions["daily"])
+
+
+async def get_ledger_financials(
+    db: AsyncSession,
+    group_id: uuid.UUID,
+) -> dict[uuid.UUID, dict]:
+    """
+    Same result shape as calculation_service.get_group_financials, read from
+    group_ledger in a single indexed lookup instead of a full history scan.
+    """
+    result = await db.execute(
+        select(GroupLedger, User.display_name, Group.ledger_spent_cents)
+        .join(Group, Group.id == GroupLedger.group_id)
+        .outerjoin(User, User.id == GroupLedger.user_id)
+        .where(GroupLedger.group_id == group_id)
+    )
+
+    rows = result.all()
+    total_group_cents = (rows[0][2] or 0) if rows else 0
+    return _financials_from_ledger([(entry, name) for entry, name, _ in rows], total_group_cents)
+
+
+def _financials_from_ledger(rows: list[tuple], total_group_cents: int) -> dict[uuid.UUID, dict]:
+    """Turn one group's (GroupLedger, display_name) rows into get_group_financials' shape."""
+    financials: dict = {}
+    group_exact_totals = {}
+
+    for entry, display_name in rows:
+        if not (entry.assignment_count or entry.paid or entry.settled_out or entry.settled_in):
+            continue
+        if entry.assignment_count:
+            group_exact_totals[entry.user_id] = entry.spent
+        financials[entry.user_id] = {
+            "spent": Decimal("0"),
+            "paid": entry.paid,
+            "settled_out": entry.settled_out,
+            "settled_in": entry.settled_in,
+            "display_name": display_name,
+        }
+
+    for uid, spent in distribute_group_cents(group_exact_totals, total_group_cents).items():
+        financials[uid]["spent"] += spent
+
+    for data in financials.values():
+        data["net_balance"] = (
+            data["paid"] - data["spent"] + data["settled_out"] - data["settled_in"]
+        )
+
+    return financials
+
+
+async def get_user_group_balances(db: AsyncSession, user_id: uuid.UUID) -> list[dict]:
+    """
+    The user's position in every group they belong to, from one query over
+    the ledgers of all those groups. Every member's row is read because the
+    remainder-cent distribution depends on the whole group.
+    """
+    result = await db.execute(
+        select(Group.id, Group.name, Group.base_currency, Group.ledger_spent_cents, GroupLedger)
+        .join(GroupMember, (GroupMember.group_id == Group.id) & (GroupMember.user_id == user_id))
+        .outerjoin(GroupLedger, GroupLedger.group_id == Group.id)
+        .order_by(Group.created_at.desc())
+    )
+
+    groups: dict = {}
+    for group_id, name, base_currency, spent_cents, entry in result.all():
+        group = groups.setdefault(group_id, {
+            "group_id": group_id,
+            "name": name,
+            "base_currency": base_currency,
+            "cents": spent_cents or 0,
+            "rows": [],
+        })
+        if entry is not None:
+            group["rows"].append((entry, None))
+
+    summaries = []
+    for group in groups.values():
+        mine = _financials_from_ledger(group["rows"], group["cents"]).get(user_id)
+        spent = mine["spent"] if mine else Decimal("0")
+        paid = mine["paid"] if mine else Decimal("0")
+        net = mine["net_balance"] if mine else Decimal("0")
+        summaries.append({
+            "group_id": group["group_id"],
+            "name": group["name"],
+            "base_currency": group["base_currency"],
+            "spent": spent.quantize(Decimal("0.01")),
+            "paid": paid.quantize(Decimal("0.01")),
+            "net_balance": net.quantize(Decimal("0.01")),
+        })
+    return summaries
@@ -0,0 +1,180 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, and_, or_, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.ocr_job import OcrJob, OcrJobStatus
+from app.models.receipt import Receipt, ReceiptStatus
+
+class LeaseLost(RuntimeError):
+    """The job was reclaimed by another worker; this worker's results must be dropped."""
+
+
+# Predicate of uq_ocr_jobs_live_receipt, for ON CONFLICT inference
+_LIVE = text("status IN ('queued', 'running')")
+
+
+async def enqueue_ocr_job(db: AsyncSession, receipt_id: uuid.UUID, currency: str | None = None) -> None:
+    """Queue OCR for a receipt; a no-op if it already has a queued or running job. Caller commits."""
+    await enqueue_ocr_jobs(db, [(receipt_id, currency)])
+
+
+async def enqueue_ocr_jobs(db: AsyncSession, jobs: list[tuple[uuid.UUID, str | None]]) -> None:
+    if not jobs:
+        return
+    stmt = insert(OcrJob).values([
+        {
+            "id": uuid.uuid4(),
+            "receipt_id": receipt_id,
+            "currency": currency,
+            "status": OcrJobStatus.queued,
+            "attempts": 0,
+            "run_after": func.now(),
+        }
+        for receipt_id, currency in jobs
+    ])
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=[OcrJob.receipt_id], index_where=_LIVE))
+
+
+async def claim_ocr_jobs(db: AsyncSession, worker_id: str, limit: int) -> list:
+    """
+    Lease up to `limit` runnable jobs to this worker and commit. Queued jobs
+    that are due and running jobs whose lease lapsed are both claimable;
+    SKIP LOCKED lets concurrent workers claim disjoint rows without waiting.
+    Returns rows of (id, receipt_id, currency, attempts).
+    """
+    claimable = (
+        select(OcrJob.id)
+        .where(or_(
+            and_(OcrJob.status == OcrJobStatus.queued, OcrJob.run_after <= func.now()),
+            and_(OcrJob.status == OcrJobStatus.running, OcrJob.lease_expires_at < func.now()),
+        ))
+        .order_by(OcrJob.run_after)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(OcrJob)
+        .where(OcrJob.id.in_(claimable))
+        .values(
+            status=OcrJobStatus.running,
+            locked_by=worker_id,
+            attempts=OcrJob.attempts + 1,
+            lease_expires_at=func.now() + timedelta(seconds=settings.ocr_job_lease_seconds),
+            heartbeat_at=func.now(),
+        )
+        .returning(OcrJob.id, OcrJob.receipt_id, OcrJob.currency, OcrJob.attempts)
+        .execution_options(synchronize_session=False)
+    )
+    jobs = result.all()
+    await db.commit()
+    return jobs
+
+
+def _owned(job_id: uuid.UUID, worker_id: str):
+    return and_(
+        OcrJob.id == job_id,
+        OcrJob.locked_by == worker_id,
+        OcrJob.status == OcrJobStatus.running,
+    )
+
+
+async def heartbeat_ocr_job(db: AsyncSession, job_id: uuid.UUID, worker_id: str) -> bool:
+    """Extend the lease; False if the job is no longer this worker's (it was reclaimed)."""
+    result = await db.execute(
+        update(OcrJob)
+        .where(_owned(job_id, worker_id))
+        .values(
+            lease_expires_at=func.now() + timedelta(seconds=settings.ocr_job_lease_seconds),
+            heartbeat_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def lock_owned_ocr_job(db: AsyncSession, job_id: uuid.UUID, worker_id: str) -> bool:
+    """
+    Lock the job row for the caller's transaction if this worker still holds
+    it. Call before committing results: a reclaim then waits for our commit.
+    """
+    result = await db.execute(select(OcrJob.id).where(_owned(job_id, worker_id)).with_for_update())
+    return result.scalar_one_or_none() is not None
+
+
+async def complete_ocr_job(db: AsyncSession, job_id: uuid.UUID, worker_id: str) -> None:
+    await db.execute(
+        update(OcrJob)
+        .where(_owned(job_id, worker_id))
+        .values(status=OcrJobStatus.done, finished_at=func.now(), lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def fail_ocr_job(
+    db: AsyncSession, job, worker_id: str, error: str, traceback: str | None = None
+) -> bool:
+    """
+    Requeue a failed job with a growing delay, or once it has used
+    ocr_job_max_attempts give up and mark the receipt failed so the user can
+    retry it. Returns True if the job was requeued.
+    """
+    retry = job.attempts < settings.ocr_job_max_attempts
+    if retry:
+        values = {
+            "status": OcrJobStatus.queued,
+            "locked_by": None,
+            "lease_expires_at": None,
+            "run_after": func.now() + timedelta(seconds=settings.ocr_job_retry_delay_seconds * job.attempts),
+            "last_error": error,
+        }
+    else:
+        values = {
+            "status": OcrJobStatus.failed,
+            "lease_expires_at": None,
+            "finished_at": func.now(),
+            "last_error": error,
+        }
+    await db.execute(
+        update(OcrJob).where(_owned(job.id, worker_id)).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if not retry:
+        await db.execute(
+            update(Receipt)
+            .where(Receipt.id == job.receipt_id, Receipt.status == ReceiptStatus.processing)
+            .values(
+                status=ReceiptStatus.failed,
+                raw_llm_response={"error": error, "traceback": traceback, "stage": "processing"},
+            )
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+    return retry
+
+
+async def reclaim_stuck_receipts(db: AsyncSession, limit: int = 100) -> int:
+    """
+    Queue OCR for receipts stuck in 'processing' with no live job, e.g. ones
+    whose in-process background task died with the web worker. Commits.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.ocr_stuck_receipt_seconds)
+    live_job = (
+        select(OcrJob.id)
+        .where(OcrJob.receipt_id == Receipt.id, OcrJob.status.in_([OcrJobStatus.queued, OcrJobStatus.running]))
+        .exists()
+    )
+    result = await db.execute(
+        select(Receipt.id, Receipt.currency)
+        .where(Receipt.status == ReceiptStatus.processing, Receipt.created_at < cutoff, ~live_job)
+        .limit(limit)
+    )
+    stuck = [(row.id, row.currency) for row in result.all()]
+    await enqueue_ocr_jobs(db, stuck)
+    await db.commit()
+    return len(stuck)
@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.payment import Payment, Settlement
+from app.services.ledger_service import apply_payment, apply_settlement, clear_settlements
 
 
 async def get_receipt_payments(db: AsyncSession, receipt_id: uuid.UUID) -> list[dict]:
@@ -51,6 +52,7 @@ async def record_payment(
 
     payment = Payment(receipt_id=receipt_id, paid_by=paid_by, amount=amount)
     db.add(payment)
+    await apply_payment(db, receipt_id, paid_by, amount)
     await db.commit()
     await db.refresh(payment, attribute_names=["payer"])
     return payment
@@ -70,6 +72,8 @@ async def update_payment(
         remaining = receipt_total - total_paid
         raise ValueError(f"Payment of {amount} exceeds remaining amount of {remaining}")
 
+    await apply_payment(db, payment.receipt_id, payment.paid_by, -payment.amount)
+    await apply_payment(db, payment.receipt_id, paid_by, amount)
     payment.paid_by = paid_by
     payment.amount = amount
     await db.commit()
@@ -83,6 +87,7 @@ async def delete_payment(db: AsyncSession, payment_id: uuid.UUID) -> bool:
     payment = result.scalar_one_or_none()
     if not payment:
         return False
+    await apply_payment(db, payment.receipt_id, payment.paid_by, -payment.amount)
     await db.delete(payment)
     await db.commit()
     return True
@@ -93,6 +98,7 @@ async def clear_group_settlements(db: AsyncSession, group_id: uuid.UUID) -> int:
     result = await db.execute(
         delete(Settlement).where(Settlement.group_id == group_id)
     )
+    await clear_settlements(db, group_id)
     await db.commit()
     return result.rowcount
 
@@ -109,6 +115,7 @@ async def settle_debt(
         settled_at=datetime.now(timezone.utc),
     )
     db.add(settlement)
+    await apply_settlement(db, group_id, from_user, to_user, amount)
     await db.commit()
     await db.refresh(settlement)
     return settlement
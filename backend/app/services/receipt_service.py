@@ -1,14 +1,24 @@
+import base64
+import binascii
+import json
 import uuid
+from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP
 
-from sqlalchemy import select, update
+from sqlalchemy import select, update, delete, bindparam, tuple_, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload, noload
 
+from app.core.config import settings
 from app.models.receipt import Receipt, LineItem, LineItemAssignment, ReceiptStatus
 from app.models.group import GroupMember
 from app.models.user import User
-from app.utils.currency_utils import compute_shares
+from app.utils.currency_utils import compute_shares_batch
+from app.services.bulk_write_service import insert_line_items, insert_assignments
+from app.services.ledger_service import (
+    blank_snapshot, snapshot_receipt, snapshot_receipts, record_receipt_change, record_receipts_removed,
+    bump_group_version, bump_receipt_group_version,
+)
 
 
 def _receipt_load_options():
@@ -32,6 +42,8 @@ async def create_receipt(
         currency=currency if currency else "SGD",
     )
     db.add(receipt)
+    # New receipt changes the group's receipt count in stats
+    await bump_group_version(db, group_id)
     await db.commit()
     result = await db.execute(
         select(Receipt).options(*_receipt_load_options()).where(Receipt.id == receipt.id)
@@ -74,68 +86,55 @@ async def create_manual_receipt(
     db.add(receipt)
     await db.flush()
 
-    sort = 0
+    rows = []
     for item in items:
         qty = Decimal(str(item.get("quantity", 1)))
         amount = Decimal(str(item["amount"]))
         unit_price = amount / qty if qty else amount
-        line_item = LineItem(
-            receipt_id=receipt.id,
-            description=item["description"],
-            quantity=qty,
-            unit_price=unit_price,
-            amount=amount,
-            sort_order=sort,
-        )
-        db.add(line_item)
-        sort += 1
-
-    # Fetch group members for auto-assigning tax/service charge
-    shared_line_items: list[LineItem] = []
-
-    if tax and tax > 0:
-        li = LineItem(
-            receipt_id=receipt.id,
-            description="Tax",
-            quantity=Decimal("1"),
-            unit_price=tax,
-            amount=tax,
-            sort_order=sort,
-        )
-        db.add(li)
-        shared_line_items.append(li)
-        sort += 1
-
-    if service_charge and service_charge > 0:
-        li = LineItem(
-            receipt_id=receipt.id,
-            description="Service Charge",
-            quantity=Decimal("1"),
-            unit_price=service_charge,
-            amount=service_charge,
-            sort_order=sort,
-        )
-        db.add(li)
-        shared_line_items.append(li)
-        sort += 1
+        rows.append({
+            "description": item["description"],
+            "quantity": qty,
+            "unit_price": unit_price,
+            "amount": amount,
+            "shared": False,
+        })
+
+    # Tax and service charge are auto-assigned to every group member
+    for description, charge in (("Tax", tax), ("Service Charge", service_charge)):
+        if charge and charge > 0:
+            rows.append({
+                "description": description,
+                "quantity": Decimal("1"),
+                "unit_price": charge,
+                "amount": charge,
+                "shared": True,
+            })
+
+    inserted = await insert_line_items(
+        db, receipt.id,
+        [{**{k: v for k, v in row.items() if k != "shared"}, "sort_order": i} for i, row in enumerate(rows)],
+    )
+    shared_line_items = [li for li, row in zip(inserted, rows) if row["shared"]]
 
     if shared_line_items:
-        await db.flush()  # ensure line item IDs are generated
         members_result = await db.execute(
             select(GroupMember.user_id).where(GroupMember.group_id == group_id)
         )
         member_ids = list(members_result.scalars().all())
         num_members = len(member_ids)
         if num_members > 0:
-            for li in shared_line_items:
-                shares = compute_shares(li.amount, member_ids, seed=str(li.id))
-                for uid, share in shares.items():
-                    db.add(LineItemAssignment(
-                        line_item_id=li.id,
-                        user_id=uid,
-                        share_amount=share,
-                    ))
+            all_shares = compute_shares_batch(
+                [li["amount"] for li in shared_line_items],
+                member_ids,
+                [[True] * num_members for _ in shared_line_items],
+                seeds=[str(li["id"]) for li in shared_line_items],
+                order_version=receipt.split_version,
+            )
+            await insert_assignments(
+                db, [(li["id"], shares) for li, shares in zip(shared_line_items, all_shares)]
+            )
 
+    await record_receipt_change(db, blank_snapshot(receipt.id))
     await db.commit()
     result = await db.execute(
         select(Receipt).options(*_receipt_load_options()).where(Receipt.id == receipt.id)
@@ -148,11 +147,53 @@ async def list_receipts(db: AsyncSession, group_id: uuid.UUID) -> list[Receipt]:
         select(Receipt)
         .options(noload(Receipt.line_items), noload(Receipt.uploader))
         .where(Receipt.group_id == group_id)
-        .order_by(Receipt.created_at.desc())
+        .order_by(Receipt.created_at.desc(), Receipt.id.desc())
     )
     return list(result.scalars().all())
 
 
+def encode_receipt_cursor(receipt: Receipt) -> str:
+    raw = f"{receipt.created_at.isoformat()}|{receipt.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_receipt_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Raises ValueError for a cursor this server did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, receipt_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(receipt_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def list_receipts_page(
+    db: AsyncSession, group_id: uuid.UUID, limit: int, cursor: str | None = None
+) -> tuple[list[Receipt], str | None]:
+    """
+    One page of a group's receipts, newest first, keyset-paginated on
+    (created_at, id). Returns the page and the cursor for the next one
+    (None on the last page).
+    """
+    stmt = (
+        select(Receipt)
+        .options(noload(Receipt.line_items), noload(Receipt.uploader))
+        .where(Receipt.group_id == group_id)
+    )
+    if cursor is not None:
+        created_at, receipt_id = decode_receipt_cursor(cursor)
+        stmt = stmt.where(tuple_(Receipt.created_at, Receipt.id) < tuple_(created_at, receipt_id))
+
+    result = await db.execute(
+        stmt.order_by(Receipt.created_at.desc(), Receipt.id.desc()).limit(limit + 1)
+    )
+    receipts = list(result.scalars().all())
+    if len(receipts) <= limit:
+        return receipts, None
+    receipts = receipts[:limit]
+    return receipts, encode_receipt_cursor(receipts[-1])
+
+
 async def list_processing_receipts(db: AsyncSession, user_id: uuid.UUID) -> list[Receipt]:
     """List all processing/failed receipts across all groups the user belongs to."""
     from app.models.group import GroupMember, Group
@@ -163,7 +204,8 @@ async def list_processing_receipts(db: AsyncSession, user_id: uuid.UUID) -> list
         .join(GroupMember, GroupMember.group_id == Group.id)
         .where(
             GroupMember.user_id == user_id,
-            Receipt.status.in_(["processing", "failed"]),
+            # Inlined so prepared (generic) plans can still match the partial index
+            Receipt.status.in_(bindparam("pending_statuses", ["processing", "failed"], literal_execute=True)),
         )
         .order_by(Receipt.created_at.desc())
     )
@@ -177,6 +219,61 @@ async def get_receipt(db: AsyncSession, receipt_id: uuid.UUID) -> Receipt | None
     return result.unique().scalar_one_or_none()
 
 
+# One row per receipt instead of one per assignment: line items and their
+# assignments are nested with json_agg, so receipt columns (raw_llm_response
+# in particular) are sent once. Fields mirror ReceiptDetailResponse.
+# raw_llm_response comes back as its own column so that only the money
+# columns are parsed as Decimal; the LLM payload keeps its plain JSON numbers.
+_RECEIPT_DETAIL = text("""
+    SELECT json_build_object(
+        'id', r.id, 'group_id', r.group_id, 'uploaded_by', r.uploaded_by,
+        'image_url', r.image_url, 'merchant_name', r.merchant_name,
+        'receipt_date', r.receipt_date, 'currency', r.currency,
+        'exchange_rate', r.exchange_rate, 'subtotal', r.subtotal, 'tax', r.tax,
+        'service_charge', r.service_charge, 'total', r.total, 'status', r.status,
+        'version', r.version, 'created_at', r.created_at,
+        'line_items', COALESCE(items.line_items, '[]')
+    )::text,
+    r.raw_llm_response::text
+    FROM receipts r
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+            'id', li.id, 'description', li.description, 'quantity', li.quantity,
+            'unit_price', li.unit_price, 'amount', li.amount, 'sort_order', li.sort_order,
+            'assignments', COALESCE(a.assignments, '[]')
+        ) ORDER BY li.sort_order) AS line_items
+        FROM line_items li
+        LEFT JOIN LATERAL (
+            SELECT json_agg(json_build_object(
+                'id', lia.id, 'line_item_id', lia.line_item_id,
+                'user_id', lia.user_id, 'share_amount', lia.share_amount
+            )) AS assignments
+            FROM line_item_assignments lia
+            WHERE lia.line_item_id = li.id
+        ) a ON true
+        WHERE li.receipt_id = r.id
+    ) items ON true
+    WHERE r.id = :receipt_id
+""")
+
+
+async def load_receipt_detail(db: AsyncSession, receipt_id: uuid.UUID) -> dict | None:
+    """
+    Receipt with nested line items and assignments as plain data, built by
+    Postgres in a single row; no ORM objects are materialized. Fetched as
+    text and parsed with Decimal floats so money values keep their digits;
+    raw_llm_response is parsed separately as ordinary JSON.
+    """
+    result = await db.execute(_RECEIPT_DETAIL, {"receipt_id": receipt_id})
+    row = result.one_or_none()
+    if row is None:
+        return None
+    raw, raw_llm_response = row
+    detail = json.loads(raw, parse_float=Decimal)
+    detail["raw_llm_response"] = json.loads(raw_llm_response) if raw_llm_response is not None else None
+    return detail
+
+
 from app.services.exchange_rate_service import get_exchange_rate
 from app.models.group import Group
 
@@ -206,6 +303,12 @@ async def update_receipt(
                 # But here valid currency is expected.
                 pass
 
+    # Exchange rate feeds every converted share and payment on this receipt;
+    # receipt_date moves its spend between days in group_daily_spend
+    ledger_before = None
+    if "exchange_rate" in data or "receipt_date" in data:
+        ledger_before = await snapshot_receipt(db, receipt_id)
+
     stmt = update(Receipt).where(Receipt.id == receipt_id)
     
     if expected_version is not None:
@@ -222,61 +325,68 @@ async def update_receipt(
     updated_id = result.scalar_one_or_none()
     if not updated_id:
         return None
+    if ledger_before is not None:
+        await record_receipt_change(db, ledger_before)
+    else:
+        await bump_receipt_group_version(db, receipt_id)
     await db.commit()
     return await get_receipt(db, receipt_id)
 
 
-async def delete_all_receipts(db: AsyncSession, group_id: uuid.UUID) -> int:
-    """Delete all receipts in a group using efficient bulk operations."""
-    from sqlalchemy import select, delete
-    from app.models.receipt import Receipt, LineItem, LineItemAssignment
-    from app.models.payment import Payment
-
-    # 1. Gather receipt IDs
-    result = await db.execute(select(Receipt.id).where(Receipt.group_id == group_id))
-    receipt_ids = list(result.scalars().all())
-
-    if not receipt_ids:
-        return 0
-
-    # 2. Gather line item IDs
-    li_result = await db.execute(select(LineItem.id).where(LineItem.receipt_id.in_(receipt_ids)))
-    line_item_ids = list(li_result.scalars().all())
-
-    # 3. Bulk delete bottom-up to maintain foreign key integrity
-    if line_item_ids:
-        await db.execute(delete(LineItemAssignment).where(LineItemAssignment.line_item_id.in_(line_item_ids)))
-        await db.execute(delete(LineItem).where(LineItem.receipt_id.in_(receipt_ids)))
+async def delete_group_receipts_chunked(db: AsyncSession, group_id: uuid.UUID) -> int:
+    """
+    Delete a group's receipts settings.delete_chunk_size at a time, committing
+    after each chunk so no single transaction holds row locks on the whole
+    history. Line items, assignments and payments go with them via ON DELETE
+    CASCADE. Each chunk subtracts its own ledger contribution in the same
+    transaction, so the ledger stays exact if the loop is interrupted.
+    """
+    chunk = settings.delete_chunk_size
+    total = 0
+    while True:
+        result = await db.execute(
+            select(Receipt.id)
+            .where(Receipt.group_id == group_id)
+            .limit(chunk)
+            # Waits for in-flight edits so their ledger deltas land before ours
+            .with_for_update()
+        )
+        receipt_ids = result.scalars().all()
+        if not receipt_ids:
+            return total
+
+        ledger_before = await snapshot_receipts(db, receipt_ids)
+        await db.execute(
+            delete(Receipt)
+            .where(Receipt.id.in_(receipt_ids))
+            .execution_options(synchronize_session=False)
+        )
+        # Also bumps ledger_version: the receipt count in stats changed
+        await record_receipts_removed(db, ledger_before)
+        await db.commit()
+        total += len(receipt_ids)
+        if len(receipt_ids) < chunk:
+            return total
 
-    if receipt_ids:
-        await db.execute(delete(Payment).where(Payment.receipt_id.in_(receipt_ids)))
-        await db.execute(delete(Receipt).where(Receipt.id.in_(receipt_ids)))
 
-    await db.commit()
-    return len(receipt_ids)
+async def delete_all_receipts(db: AsyncSession, group_id: uuid.UUID) -> int:
+    """Delete all receipts in a group in bounded chunks, keeping the ledger in step."""
+    return await delete_group_receipts_chunked(db, group_id)
 
 
 async def delete_receipt(db: AsyncSession, receipt_id: uuid.UUID) -> bool:
-    from sqlalchemy import select, delete
-    from app.models.receipt import Receipt, LineItem, LineItemAssignment
-    from app.models.payment import Payment
-
-    # 1. Gather line item IDs for this receipt
-    li_result = await db.execute(select(LineItem.id).where(LineItem.receipt_id == receipt_id))
-    line_item_ids = list(li_result.scalars().all())
+    ledger_before = await snapshot_receipt(db, receipt_id)
 
-    # 2. Bulk delete bottom-up to maintain foreign key integrity
-    if line_item_ids:
-        await db.execute(delete(LineItemAssignment).where(LineItemAssignment.line_item_id.in_(line_item_ids)))
-        await db.execute(delete(LineItem).where(LineItem.receipt_id == receipt_id))
-
-    await db.execute(delete(Payment).where(Payment.receipt_id == receipt_id))
-    
-    # 3. Delete receipt and check if it existed
-    result = await db.execute(delete(Receipt).where(Receipt.id == receipt_id))
+    # Line items, assignments and payments are removed by ON DELETE CASCADE
+    result = await db.execute(
+        delete(Receipt)
+        .where(Receipt.id == receipt_id)
+        .execution_options(synchronize_session=False)
+    )
     if result.rowcount == 0:
         return False
 
+    await record_receipt_change(db, ledger_before)
     await db.commit()
     return True
 
@@ -309,6 +419,7 @@ async def add_line_item(db: AsyncSession, receipt_id: uuid.UUID, description: st
     
     # Bump version
     receipt.version += 1
+    await bump_group_version(db, receipt.group_id)
     
     await db.commit()
     await db.refresh(item)
@@ -328,6 +439,8 @@ async def update_line_item(db: AsyncSession, item_id: uuid.UUID, data: dict) ->
     item = result.scalar_one_or_none()
     if not item:
         return None
+
+    ledger_before = await snapshot_receipt(db, item.receipt_id)
         
     # Update fields
     for k, v in data.items():
@@ -346,7 +459,8 @@ async def update_line_item(db: AsyncSession, item_id: uuid.UUID, data: dict) ->
         .where(Receipt.id == item.receipt_id)
         .values(version=Receipt.version + 1)
     )
-    
+
+    await record_receipt_change(db, ledger_before)
     await db.commit()
     
     # Re-fetch to ensure assignments are loaded and item is fresh
@@ -365,6 +479,7 @@ async def delete_line_item(db: AsyncSession, item_id: uuid.UUID) -> bool:
         return False
         
     receipt_id = item.receipt_id
+    ledger_before = await snapshot_receipt(db, receipt_id)
     await db.delete(item)
     
     # Bump receipt version
@@ -373,7 +488,8 @@ async def delete_line_item(db: AsyncSession, item_id: uuid.UUID) -> bool:
         .where(Receipt.id == receipt_id)
         .values(version=Receipt.version + 1)
     )
-    
+
+    await record_receipt_change(db, ledger_before)
     await db.commit()
     return True
 
@@ -388,6 +504,8 @@ async def bulk_update_receipt_items(
     if not receipt:
         return None
 
+    ledger_before = await snapshot_receipt(db, receipt_id)
+
     existing_items = {str(item.id): item for item in receipt.line_items}
     incoming_items = data.get("items", [])
     incoming_ids = {str(item["id"]) for item in incoming_items if not str(item["id"]).startswith("temp-")}
@@ -440,5 +558,6 @@ async def bulk_update_receipt_items(
         .values(**receipt_updates)
     )
 
+    await record_receipt_change(db, ledger_before)
     await db.commit()
     return await get_receipt(db, receipt_id)
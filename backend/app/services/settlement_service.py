@@ -1,37 +1,17 @@
+import time
 import uuid
 from decimal import Decimal
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services.calculation_service import get_group_financials
+from app.core.config import settings
+from app.services.calculation_service import load_group_financials
 
+ALGORITHMS = ("greedy", "optimal")
 
-async def calculate_balances(db: AsyncSession, group_id: uuid.UUID) -> dict:
-    """
-    Calculate net balances and produce the minimal set of debt transfers.
-    net_balance from get_group_financials():
-      positive = owed by others (creditor)
-      negative = owes others (debtor)
-    """
-    financials = await get_group_financials(db, group_id)
-
-    if not financials:
-        return {"balances": [], "total_assigned": Decimal("0"), "total_paid": Decimal("0")}
-
-    total_assigned = sum((data["spent"] for data in financials.values()), Decimal("0"))
-    total_paid = sum((data["paid"] for data in financials.values()), Decimal("0"))
-
-    debtors = []   # [user_id, amount_owed, name]
-    creditors = [] # [user_id, amount_credit, name]
-
-    for user_id, data in financials.items():
-        bal = data["net_balance"]
-        name = data["display_name"] or "Unknown"
-        if bal < 0:
-            debtors.append([user_id, -bal, name])
-        elif bal > 0:
-            creditors.append([user_id, bal, name])
 
+def _greedy_transfers(debtors: list, creditors: list) -> list[dict]:
+    """Pair the largest debtor with the largest creditor until everyone is square."""
     debtors.sort(key=lambda x: x[1], reverse=True)
     creditors.sort(key=lambda x: x[1], reverse=True)
 
@@ -55,6 +35,156 @@ async def calculate_balances(db: AsyncSession, group_id: uuid.UUID) -> dict:
             i += 1
         if creditors[j][1] <= Decimal("0.01"):
             j += 1
+    return result
+
+
+def _zero_sum_groups(cents: list[int], deadline: float) -> list[list[int]] | None:
+    """
+    Partition indices of `cents` (which sum to zero) into the largest number of
+    zero-sum subsets, by DP over bitmasks. A subset of k members settles in
+    k - 1 transfers, so this minimises the total. Returns None past `deadline`.
+    """
+    n = len(cents)
+    full = (1 << n) - 1
+    sums = [0] * (full + 1)
+    best = [0] * (full + 1)
+    via = [0] * (full + 1)  # index removed to reach the best sub-mask
+
+    for mask in range(1, full + 1):
+        if not mask & 0xFFF and time.perf_counter() > deadline:
+            return None
+        low = (mask & -mask).bit_length() - 1
+        sums[mask] = sums[mask & (mask - 1)] + cents[low]
+
+        top, top_i = -1, 0
+        m = mask
+        while m:
+            bit = m & -m
+            i = bit.bit_length() - 1
+            if best[mask ^ bit] > top:
+                top, top_i = best[mask ^ bit], i
+            m ^= bit
+        best[mask] = top + (sums[mask] == 0)
+        via[mask] = top_i
+
+    # Walk back from the full set; every zero-sum sub-mask on the path closes a group
+    groups, current = [], []
+    mask = full
+    while mask:
+        if sums[mask] == 0 and current:
+            groups.append(current)
+            current = []
+        i = via[mask]
+        current.append(i)
+        mask ^= 1 << i
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _optimal_transfers(members: list, budget_ms: int, max_members: int) -> list[dict] | None:
+    """
+    Minimum-transfer settlement. `members` is [user_id, net_balance, name].
+    Returns None when the group is too large, the time budget runs out, or the
+    balances do not net to zero (receipts not fully paid), so the caller can
+    fall back to greedy.
+    """
+    deadline = time.perf_counter() + budget_ms / 1000
+
+    entries = []
+    for user_id, bal, name in members:
+        c = int((bal * 100).quantize(Decimal("1")))
+        if c:
+            entries.append([user_id, c, name])
+    if not entries:
+        return []
+
+    # Rounding to cents can leave at most a cent per member; take it off the
+    # largest balances on the residue's side, one cent each, so no sign flips.
+    # Anything more is a real imbalance (unpaid receipts) that greedy handles.
+    residue = sum(e[1] for e in entries)
+    if residue:
+        step = 1 if residue > 0 else -1
+        same_side = sorted((e for e in entries if e[1] * step > 0), key=lambda e: abs(e[1]), reverse=True)
+        if abs(residue) > len(same_side):
+            return None
+        for e in same_side[:abs(residue)]:
+            e[1] -= step
+        entries = [e for e in entries if e[1]]
+
+    # An exact opposite pair is always part of some optimal answer: settle it directly
+    groups: list[list] = []
+    by_amount: dict[int, list] = {}
+    rest = []
+    for e in entries:
+        partners = by_amount.get(-e[1])
+        if partners:
+            groups.append([partners.pop(), e])
+        else:
+            by_amount.setdefault(e[1], []).append(e)
+    for bucket in by_amount.values():
+        rest.extend(bucket)
+
+    if len(rest) > max_members:
+        return None
+    if rest:
+        index_groups = _zero_sum_groups([e[1] for e in rest], deadline)
+        if index_groups is None:
+            return None
+        groups.extend([rest[i] for i in g] for g in index_groups)
+
+    result = []
+    for group in groups:
+        debtors = [[uid, Decimal(-c) / 100, name] for uid, c, name in group if c < 0]
+        creditors = [[uid, Decimal(c) / 100, name] for uid, c, name in group if c > 0]
+        result.extend(_greedy_transfers(debtors, creditors))
+    return result
+
+
+async def calculate_balances(db: AsyncSession, group_id: uuid.UUID, algorithm: str = "greedy") -> dict:
+    """
+    Calculate net balances and produce the set of debt transfers.
+    net_balance from load_group_financials():
+      positive = owed by others (creditor)
+      negative = owes others (debtor)
+
+    algorithm="optimal" minimises the number of transfers, falling back to
+    greedy for groups over settlement_optimal_max_members or when the search
+    exceeds settlement_optimal_budget_ms.
+    """
+    financials = await load_group_financials(db, group_id)
+
+    if not financials:
+        return {"balances": [], "total_assigned": Decimal("0"), "total_paid": Decimal("0")}
+
+    total_assigned = sum((data["spent"] for data in financials.values()), Decimal("0"))
+    total_paid = sum((data["paid"] for data in financials.values()), Decimal("0"))
+
+    result = None
+    if algorithm == "optimal":
+        members = [
+            [user_id, data["net_balance"], data["display_name"] or "Unknown"]
+            for user_id, data in financials.items()
+        ]
+        result = _optimal_transfers(
+            members,
+            settings.settlement_optimal_budget_ms,
+            settings.settlement_optimal_max_members,
+        )
+
+    if result is None:
+        debtors = []   # [user_id, amount_owed, name]
+        creditors = [] # [user_id, amount_credit, name]
+
+        for user_id, data in financials.items():
+            bal = data["net_balance"]
+            name = data["display_name"] or "Unknown"
+            if bal < 0:
+                debtors.append([user_id, -bal, name])
+            elif bal > 0:
+                creditors.append([user_id, bal, name])
+
+        result = _greedy_transfers(debtors, creditors)
 
     return {
         "balances": result,
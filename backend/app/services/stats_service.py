@@ -1,24 +1,34 @@
 import uuid
+from datetime import date
 from decimal import Decimal
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, Date
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.receipt import Receipt
 from app.models.group import Group
-from app.services.calculation_service import get_group_financials
+from app.models.ledger import GroupDailySpend
+from app.services.calculation_service import load_group_financials, date_range_criteria
 
 
-async def get_group_stats(db: AsyncSession, group_id: uuid.UUID) -> dict:
+async def get_group_stats(
+    db: AsyncSession,
+    group_id: uuid.UUID,
+    since: date | None = None,
+    until: date | None = None,
+    date_field: str = "receipt_date",
+) -> dict:
+    receipt_range, _ = date_range_criteria(since, until, date_field)
+
     group_result = await db.execute(select(Group.base_currency).where(Group.id == group_id))
     base_currency = group_result.scalar_one_or_none() or "SGD"
 
     receipt_count_result = await db.execute(
-        select(func.count(Receipt.id)).where(Receipt.group_id == group_id)
+        select(func.count(Receipt.id)).where(Receipt.group_id == group_id, *receipt_range)
     )
     receipt_count = receipt_count_result.scalar_one()
 
-    financials = await get_group_financials(db, group_id)
+    financials = await load_group_financials(db, group_id, since, until, date_field)
 
     total_spending = sum((data["spent"] for data in financials.values()), Decimal("0"))
 
@@ -40,3 +50,52 @@ async def get_group_stats(db: AsyncSession, group_id: uuid.UUID) -> dict:
         "spending_by_user": spending_by_user,
         "base_currency": base_currency,
     }
+
+
+def _cents_str(cents: int) -> str:
+    return str((Decimal(cents) / 100).quantize(Decimal("0.01")))
+
+
+async def get_spend_series(
+    db: AsyncSession,
+    group_id: uuid.UUID,
+    granularity: str = "day",
+    since: date | None = None,
+    until: date | None = None,
+) -> dict:
+    """
+    Per-day or per-month spend over [since, until), read from group_daily_spend
+    in one range scan of its (group_id, day, user_id) primary key.
+    """
+    if granularity == "month":
+        period = func.date_trunc("month", GroupDailySpend.day).cast(Date)
+    else:
+        period = GroupDailySpend.day
+
+    criteria = [GroupDailySpend.group_id == group_id]
+    if since is not None:
+        criteria.append(GroupDailySpend.day >= since)
+    if until is not None:
+        criteria.append(GroupDailySpend.day < until)
+
+    result = await db.execute(
+        select(period.label("period"), GroupDailySpend.user_id, func.sum(GroupDailySpend.cents).label("cents"))
+        .where(*criteria)
+        .group_by(period, GroupDailySpend.user_id)
+        .order_by(period)
+    )
+
+    series: dict = {}
+    for row in result.all():
+        if not row.cents:
+            continue
+        point = series.setdefault(row.period, {"period": row.period.isoformat(), "cents": 0, "by_user": []})
+        point["cents"] += row.cents
+        point["by_user"].append({"user_id": str(row.user_id), "amount": _cents_str(row.cents)})
+
+    points = []
+    for point in series.values():
+        point["total"] = _cents_str(point.pop("cents"))
+        points.append(point)
+
+    return {"granularity": granularity, "series": points}
@@ -1,7 +1,53 @@
 from decimal import Decimal
+from functools import lru_cache
 import hashlib
 
-def compute_shares(amount: Decimal, user_ids: list, seed: str | None = None) -> dict:
+try:
+    import numpy as np
+except ImportError:  # optional: compute_shares_batch falls back to compute_shares
+    np = None
+
+# Remainder-cent ordering versions. Stored per receipt (receipts.split_version)
+# so shares written under an older version can always be reproduced.
+SPLIT_ORDER_MD5 = 1     # sort users by md5(f"{seed}:{uid}") — one hash per user
+SPLIT_ORDER_ROTATE = 2  # one md5 of the seed per item rotates the str-sorted users
+
+
+def _rotation_offset(seed: str, n: int) -> int:
+    """Per-item rotation for SPLIT_ORDER_ROTATE: first 32 bits of md5("v2:" + seed), mod n."""
+    return int(hashlib.md5(f"v2:{seed}".encode()).hexdigest()[:8], 16) % n
+
+
+@lru_cache(maxsize=4096)
+def _md5_order(seed: str, uids: tuple[str, ...]) -> tuple[int, ...]:
+    """
+    SPLIT_ORDER_MD5 remainder order as positions into uids: sorted by
+    md5(f"{seed}:{uid}"), ties keeping input order. Cached per (item, user set),
+    so re-splitting an item hashes its users only once.
+    """
+    digests = [hashlib.md5(f"{seed}:{uid}".encode()).hexdigest() for uid in uids]
+    return tuple(sorted(range(len(uids)), key=digests.__getitem__))
+
+
+def _remainder_order(user_ids: list, seed: str | None, order_version: int) -> list:
+    """Order in which users receive the leftover cents."""
+    if not seed:
+        # Fallback to simple sort for consistency if no seed
+        return sorted(user_ids, key=str)
+    if order_version == SPLIT_ORDER_ROTATE:
+        sorted_ids = sorted(user_ids, key=str)
+        offset = _rotation_offset(seed, len(sorted_ids))
+        return sorted_ids[offset:] + sorted_ids[:offset]
+    # Hash of seed + user_id gives a deterministic random order
+    return [user_ids[k] for k in _md5_order(seed, tuple(str(uid) for uid in user_ids))]
+
+
+def compute_shares(
+    amount: Decimal,
+    user_ids: list,
+    seed: str | None = None,
+    order_version: int = SPLIT_ORDER_MD5,
+) -> dict:
     """
     Split amount into shares that sum EXACTLY to amount.
     Works in integer cents to avoid floating point errors.
@@ -15,6 +61,8 @@ def compute_shares(amount: Decimal, user_ids: list, seed: str | None = None) ->
         amount: The total amount to split.
         user_ids: List of user IDs (strings or UUIDs) to split among.
         seed: Optional string seed (e.g. item_id) for pseudo-random distribution.
+        order_version: SPLIT_ORDER_MD5 or SPLIT_ORDER_ROTATE; how the seed
+            orders users for the extra pennies.
         
     Returns:
         Dictionary mapping user_id to their share (Decimal).
@@ -31,14 +79,7 @@ def compute_shares(amount: Decimal, user_ids: list, seed: str | None = None) ->
     extra_count = amount_cents % n
     
     # Determine order for distributing extra cents
-    if seed:
-        # Use hash of seed + user_id to sort, creating a deterministic random order
-        def get_hash(uid):
-            return hashlib.md5(f"{seed}:{uid}".encode()).hexdigest()
-        sorted_ids = sorted(user_ids, key=get_hash)
-    else:
-        # Fallback to simple sort for consistency if no seed
-        sorted_ids = sorted(user_ids, key=str)
+    sorted_ids = _remainder_order(user_ids, seed, order_version)
         
     # Distribute
     shares = {}
@@ -50,7 +91,11 @@ def compute_shares(amount: Decimal, user_ids: list, seed: str | None = None) ->
     return shares
 
 
-def compute_receipt_shares(line_items_data: list[dict], seed: str | None = None) -> dict:
+def compute_receipt_shares(
+    line_items_data: list[dict],
+    seed: str | None = None,
+    order_version: int = SPLIT_ORDER_MD5,
+) -> dict:
     """
     Computes exact receipt-level shares by aggregating unrounded fractional shares
     for each user across all line items, then distributing remainder cents on the total sum.
@@ -58,6 +103,7 @@ def compute_receipt_shares(line_items_data: list[dict], seed: str | None = None)
     Args:
         line_items_data: List of dictionaries with keys "amount" (Decimal) and "user_ids" (list).
         seed: Optional string seed (e.g. receipt_id) for pseudo-random distribution.
+        order_version: Remainder ordering, as for compute_shares.
         
     Returns:
         Dictionary mapping user_id to their final receipt-level share (Decimal).
@@ -97,12 +143,7 @@ def compute_receipt_shares(line_items_data: list[dict], seed: str | None = None)
 
     extra_count = total_receipt_cents - total_base_cents
     
-    if seed:
-        def get_hash(uid):
-            return hashlib.md5(f"{seed}:{uid}".encode()).hexdigest()
-        sorted_ids = sorted(all_users, key=get_hash)
-    else:
-        sorted_ids = sorted(all_users, key=str)
+    sorted_ids = _remainder_order(all_users, seed, order_version)
         
     shares = {}
     for i, uid in enumerate(sorted_ids):
@@ -110,3 +151,106 @@ def compute_receipt_shares(line_items_data: list[dict], seed: str | None = None)
         shares[uid] = Decimal(cents) / Decimal("100")
         
     return shares
+
+
+def compute_receipt_shares_batch(
+    receipts: list[list[dict]],
+    seeds: list[str | None] | None = None,
+    order_version: int = SPLIT_ORDER_MD5,
+) -> list[dict]:
+    """
+    compute_receipt_shares() for many receipts at once, e.g. a group's
+    receipts when rebuilding. Each receipt is still summed with Decimal so the
+    result is exactly what the single-receipt call gives; the remainder order
+    for each (seed, user set) is hashed once and reused.
+
+    Args:
+        receipts: One line_items_data list per receipt, as for compute_receipt_shares.
+        seeds: Optional per-receipt seed (e.g. receipt_id).
+        order_version: Remainder ordering, as for compute_shares.
+
+    Returns:
+        One dictionary per receipt mapping user_id to share (Decimal).
+    """
+    if seeds is None:
+        seeds = [None] * len(receipts)
+    return [
+        compute_receipt_shares(line_items_data, seed=seed, order_version=order_version)
+        for line_items_data, seed in zip(receipts, seeds)
+    ]
+
+
+def compute_shares_batch(
+    amounts: list[Decimal],
+    user_ids: list,
+    incidence: list[list[bool]],
+    seeds: list[str | None] | None = None,
+    order_version: int = SPLIT_ORDER_MD5,
+) -> list[dict]:
+    """
+    Split many line items in one pass, with the same cent allocation as
+    calling compute_shares() on each item.
+
+    Amounts are converted to int64 cents and the base share and remainder
+    are computed with NumPy array operations; the md5 remainder order is
+    hashed once per (item, user set) and cached. Without NumPy installed this
+    simply loops over compute_shares().
+
+    Args:
+        amounts: Amount of each line item.
+        user_ids: Users that may share any item (the incidence columns).
+        incidence: incidence[i][j] is True when user_ids[j] shares item i.
+        seeds: Optional per-item seed (e.g. item_id), as for compute_shares.
+        order_version: Remainder ordering, as for compute_shares.
+
+    Returns:
+        One dictionary per line item mapping user_id to share (Decimal).
+    """
+    if seeds is None:
+        seeds = [None] * len(amounts)
+
+    if np is None or not amounts or not user_ids:
+        return [
+            compute_shares(
+                amount, [uid for uid, on in zip(user_ids, row) if on],
+                seed=seed, order_version=order_version,
+            )
+            for amount, row, seed in zip(amounts, incidence, seeds)
+        ]
+
+    cents = np.array([int((amount * 100).to_integral_value()) for amount in amounts], dtype=np.int64)
+    assigned = np.array(incidence, dtype=bool).reshape(len(amounts), len(user_ids))
+    n = np.maximum(assigned.sum(axis=1), 1)
+    base_cents = cents // n
+    extra_count = cents % n
+
+    # Remainder rank of each assigned user within its item: the cached md5
+    # order per (item, user set), or plain str(uid) order when unseeded or
+    # rotated (the rotation is applied to the ranks below)
+    rotate = order_version == SPLIT_ORDER_ROTATE
+    str_ids = [str(uid) for uid in user_ids]
+    str_rank = np.empty(len(user_ids), dtype=np.int64)
+    str_rank[sorted(range(len(user_ids)), key=str_ids.__getitem__)] = np.arange(len(user_ids))
+    ranks = np.zeros(assigned.shape, dtype=np.int64)
+    for i, seed in enumerate(seeds):
+        cols = np.flatnonzero(assigned[i])
+        if seed and not rotate:
+            ordered = cols[list(_md5_order(seed, tuple(str_ids[j] for j in cols)))]
+        else:
+            ordered = cols[np.argsort(str_rank[cols], kind="stable")]
+        ranks[i, ordered] = np.arange(len(cols))
+    if rotate:
+        offsets = np.array(
+            [_rotation_offset(seed, int(k)) if seed else 0 for seed, k in zip(seeds, n)],
+            dtype=np.int64,
+        )
+        ranks = (ranks - offsets[:, None]) % n[:, None]
+    share_cents = base_cents[:, None] + (ranks < extra_count[:, None])
+
+    return [
+        {
+            user_ids[j]: Decimal(int(share_cents[i, j])) / Decimal(100)
+            for j in np.flatnonzero(assigned[i])
+        }
+        for i in range(len(amounts))
+    ]
@@ -1,18 +1,27 @@
+import asyncio
 import json
+import os
+import signal
+import socket
 import uuid
 import logging
 import base64
-
-import base64
+import traceback
 
 from litellm import acompletion
-import httpx
-from sqlalchemy import select
+from sqlalchemy import select, delete
 
 from app.core.config import settings
 from app.core.database import async_session_factory
-from app.models.receipt import Receipt, LineItem, ReceiptStatus
+from app.core.http_client import http_clients
+from app.models.receipt import Receipt, ReceiptStatus, LineItem
 from app.models.group import Group
+from app.services.ledger_service import snapshot_receipt, record_receipt_change
+from app.services.bulk_write_service import insert_line_items
+from app.services.ocr_queue_service import (
+    LeaseLost, claim_ocr_jobs, heartbeat_ocr_job, lock_owned_ocr_job, complete_ocr_job, fail_ocr_job,
+    reclaim_stuck_receipts,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -54,26 +63,33 @@ async def fetch_exchange_rate(from_currency: str, to_currency: str) -> float:
         return 1.0
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://api.exchangerate-api.com/v4/latest/{from_currency}",
-                timeout=5.0
-            )
-            if response.status_code == 200:
-                data = response.json()
-                rate = data.get("rates", {}).get(to_currency)
-                if rate:
-                    logger.info(f"Fetched exchange rate: 1 {from_currency} = {rate} {to_currency}")
-                    return float(rate)
+        url = f"https://api.exchangerate-api.com/v4/latest/{from_currency}"
+        response = await http_clients.client(url).get(url, timeout=5.0)
+        if response.status_code == 200:
+            data = response.json()
+            rate = data.get("rates", {}).get(to_currency)
+            if rate:
+                logger.info(f"Fetched exchange rate: 1 {from_currency} = {rate} {to_currency}")
+                return float(rate)
     except Exception as e:
         logger.warning(f"Failed to fetch exchange rate: {e}")
     
     return 1.0  # Fallback
 
 
-async def process_receipt_ocr(receipt_id: uuid.UUID, user_provided_currency: str | None = None) -> None:
+async def process_receipt_ocr(
+    receipt_id: uuid.UUID,
+    user_provided_currency: str | None = None,
+    job_id: uuid.UUID | None = None,
+    worker_id: str | None = None,
+) -> None:
+    """
+    Extract a receipt and replace its line items with the result. Errors
+    propagate so the job queue can retry; the receipt is only marked failed
+    once it gives up (fail_ocr_job). With job_id, results are committed only
+    while this worker still holds the job's lease (LeaseLost otherwise).
+    """
     async with async_session_factory() as db:
-        receipt = None
         try:
             # Fetch receipt
             result = await db.execute(select(Receipt).where(Receipt.id == receipt_id))
@@ -88,10 +104,9 @@ async def process_receipt_ocr(receipt_id: uuid.UUID, user_provided_currency: str
             start_time = time.time()
             print(f"DEBUG: Downloading image from: {receipt.image_url}")
             
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.get(receipt.image_url)
-                response.raise_for_status()
-                image_data = response.content
+            response = await http_clients.client(receipt.image_url).get(receipt.image_url, timeout=60.0)
+            response.raise_for_status()
+            image_data = response.content
             
             download_time = time.time() - start_time
             print(f"DEBUG: Image downloaded in {download_time:.2f}s. Size: {len(image_data)} bytes")
@@ -146,6 +161,12 @@ async def process_receipt_ocr(receipt_id: uuid.UUID, user_provided_currency: str
             
             data = json.loads(raw_text)
 
+            # A retried receipt may already carry assignments/payments that
+            # depend on the exchange rate we are about to overwrite. Taken
+            # only now: the snapshot locks the receipt until commit, which
+            # must not span the download and LLM call.
+            ledger_before = await snapshot_receipt(db, receipt_id)
+
             receipt.merchant_name = data.get("merchant_name")
             
             date_str = data.get("receipt_date")
@@ -215,51 +236,139 @@ async def process_receipt_ocr(receipt_id: uuid.UUID, user_provided_currency: str
             
             receipt.status = ReceiptStatus.extracted
 
-            for i, item in enumerate(data.get("line_items", [])):
-                line_item = LineItem(
-                    receipt_id=receipt.id,
-                    description=item.get("description", "Unknown Item"),
-                    quantity=_get_val(item.get("quantity", 1)),
-                    unit_price=_get_val(item.get("unit_price")),
-                    amount=_get_val(item.get("amount")),
-                    sort_order=i,
-                )
-                db.add(line_item)
+            # Replace, never append: a retry or a reclaimed job may run after
+            # an earlier attempt already stored items (assignments cascade)
+            await db.execute(delete(LineItem).where(LineItem.receipt_id == receipt.id))
+            await insert_line_items(db, receipt.id, [
+                {
+                    "description": item.get("description", "Unknown Item"),
+                    "quantity": _get_val(item.get("quantity", 1)),
+                    "unit_price": _get_val(item.get("unit_price")),
+                    "amount": _get_val(item.get("amount")),
+                    "sort_order": i,
+                }
+                for i, item in enumerate(data.get("line_items", []))
+            ])
 
+            await record_receipt_change(db, ledger_before)
+            if job_id is not None and not await lock_owned_ocr_job(db, job_id, worker_id):
+                raise LeaseLost(f"OCR job {job_id} was reclaimed by another worker")
             await db.commit()
             logger.info(f"Successfully processed receipt {receipt_id}")
 
-        except Exception as e:
-            import traceback
-            print(f"DEBUG: OCR processing CRITICAL FAILURE for receipt {receipt_id}")
-            traceback.print_exc()
+        except Exception:
+            logger.exception(f"OCR processing failed for receipt {receipt_id}")
+            await db.rollback()
+            raise
+
+
+async def _heartbeat(job_id: uuid.UUID, worker_id: str, ocr: asyncio.Task) -> None:
+    """Renew the lease while `ocr` runs; cancel it once the lease is lost or cannot be renewed."""
+    try:
+        while True:
+            await asyncio.sleep(settings.ocr_job_lease_seconds / 3)
+            async with async_session_factory() as db:
+                if not await heartbeat_ocr_job(db, job_id, worker_id):
+                    logger.warning(f"Lost lease on OCR job {job_id}")
+                    break
+    except Exception:
+        logger.exception(f"Heartbeat for OCR job {job_id} failed")
+    ocr.cancel()
+
+
+async def _run_job(job, worker_id: str) -> None:
+    if job.attempts > settings.ocr_job_max_attempts:
+        # Reclaimed after its lease lapsed one time too many: it keeps killing workers
+        async with async_session_factory() as db:
+            await fail_ocr_job(db, job, worker_id, "Worker stopped before finishing")
+        return
+
+    ocr = asyncio.create_task(process_receipt_ocr(job.receipt_id, job.currency, job.id, worker_id))
+    heartbeat = asyncio.create_task(_heartbeat(job.id, worker_id, ocr))
+    try:
+        await ocr
+    except asyncio.CancelledError:
+        if not heartbeat.done():
+            raise  # this worker is being cancelled itself
+        # The heartbeat gave up the job; its lease lapses and another worker retries
+        logger.warning(f"Abandoned OCR job {job.id} for receipt {job.receipt_id}")
+        return
+    except LeaseLost as e:
+        logger.warning(str(e))
+        return
+    except Exception as e:
+        async with async_session_factory() as db:
+            await fail_ocr_job(db, job, worker_id, str(e), traceback.format_exc())
+        return
+    finally:
+        heartbeat.cancel()
+
+    async with async_session_factory() as db:
+        await complete_ocr_job(db, job.id, worker_id)
+
+
+async def run_worker(concurrency: int | None = None, stop: asyncio.Event | None = None) -> None:
+    """
+    Claim and process OCR jobs, at most `concurrency` at a time, until `stop`
+    is set; jobs in flight are then allowed to finish. Stuck receipts are
+    requeued every ocr_stuck_receipt_seconds.
+    """
+    concurrency = concurrency or settings.ocr_worker_concurrency
+    stop = stop or asyncio.Event()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    running: set[asyncio.Task] = set()
+    next_reclaim = 0.0
+    logger.info(f"OCR worker {worker_id} started with concurrency {concurrency}")
+
+    try:
+        while not stop.is_set():
+            loop_time = asyncio.get_running_loop().time()
             try:
-                # Rollback the failed transaction so we can use the session again
-                await db.rollback()
-                
-                if receipt:
-                    # Refetch receipt to ensure it's attached to the new transaction state
-                    # (Wait, receipt object is still valid but detached or state is confusing? 
-                    # Actually, better to just update it. But strictly, we should maybe re-query if needed.
-                    # However, since we just rolled back logic that modified it (but failed), 
-                    # we can just set the status fields and commit.)
-                    
-                    # NOTE: We need to make sure we don't re-add invalid line items.
-                    # Since we rolled back, line items are gone from DB. 
-                    # Receipt modifications (merchant_name etc) are also gone from DB.
-                    # So we update status on the CLEAN receipt row.
-                    
-                    receipt.status = ReceiptStatus.failed
-                    receipt.raw_llm_response = {
-                        "error": str(e),
-                        "traceback": traceback.format_exc(),
-                        "stage": "processing"
-                    }
-                    # We might need to merge/add receipt back if it was detached? 
-                    # But it was fetched in this session. Rollback invalidates it?
-                    # SQLAlchemy async session: objects expire on commit/rollback.
-                    # So accessing receipt.* triggers refresh.
-                    
-                    await db.commit()
-            except Exception as commit_err:
-                print(f"DEBUG: Failed to save error state for receipt {receipt_id}: {commit_err}")
+                if loop_time >= next_reclaim:
+                    async with async_session_factory() as db:
+                        requeued = await reclaim_stuck_receipts(db)
+                    if requeued:
+                        logger.info(f"Requeued {requeued} stuck receipt(s)")
+                    next_reclaim = loop_time + settings.ocr_stuck_receipt_seconds
+
+                jobs = []
+                free = concurrency - len(running)
+                if free > 0:
+                    async with async_session_factory() as db:
+                        jobs = await claim_ocr_jobs(db, worker_id, free)
+                for job in jobs:
+                    task = asyncio.create_task(_run_job(job, worker_id))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+            except Exception:
+                logger.exception("OCR worker loop error")
+                jobs = []
+
+            if jobs and len(running) < concurrency:
+                continue  # more may be waiting
+            # Idle or full: wake on the poll interval, a finished job, or stop
+            waiters = [*running, asyncio.create_task(stop.wait())]
+            await asyncio.wait(waiters, timeout=settings.ocr_poll_seconds, return_when=asyncio.FIRST_COMPLETED)
+            waiters[-1].cancel()
+    finally:
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+async def main(concurrency: int | None = None) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await run_worker(concurrency, stop)
+    finally:
+        # Inside the API process (ocr_worker_in_web) main.lifespan closes them instead
+        await http_clients.aclose()
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else None))
@@ -0,0 +1,33 @@
+"""Populate group_daily_spend from existing receipts.
+
+Usage: python -m scripts.backfill_daily_spend [group_id ...]
+Run from the backend/ directory. With no arguments every group is backfilled.
+Safe to re-run: each group's rows are replaced, not added to.
+"""
+
+import asyncio
+import sys
+import uuid
+
+from sqlalchemy import select
+
+from app.core.database import async_session_factory
+from app.models.group import Group
+from app.services.ledger_service import rebuild_daily_spend
+
+
+async def main(group_ids: list[uuid.UUID]):
+    async with async_session_factory() as db:
+        if not group_ids:
+            group_ids = list((await db.scalars(select(Group.id))).all())
+
+        for group_id in group_ids:
+            await rebuild_daily_spend(db, group_id)
+            await db.commit()
+            print(f"  Backfilled daily spend for group {group_id}")
+
+    print(f"Done. {len(group_ids)} group(s) backfilled.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main([uuid.UUID(arg) for arg in sys.argv[1:]]))
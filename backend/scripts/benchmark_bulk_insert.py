@@ -0,0 +1,99 @@
+"""Compare ORM add_all against the unnest bulk insert for line items and assignments.
+
+Usage: python -m scripts.benchmark_bulk_insert [items] [users] [rounds]
+Run from the backend/ directory against a dev database. Everything is
+written inside a transaction that is rolled back, so no data is kept.
+Defaults: a 50-item receipt split 10 ways, 5 rounds.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+from app.core.database import async_session_factory
+from app.models.group import Group
+from app.models.receipt import Receipt, LineItem, LineItemAssignment, ReceiptStatus
+from app.models.user import User
+from app.services.bulk_write_service import insert_line_items, insert_assignments
+from app.utils.currency_utils import compute_shares_batch
+
+
+def _items(n: int) -> list[dict]:
+    return [
+        {
+            "description": f"Item {i}",
+            "quantity": Decimal("1"),
+            "unit_price": Decimal("12.34"),
+            "amount": Decimal("12.34"),
+            "sort_order": i,
+        }
+        for i in range(n)
+    ]
+
+
+async def _orm_path(db, receipt_id, items, user_ids):
+    line_items = [LineItem(receipt_id=receipt_id, **item) for item in items]
+    db.add_all(line_items)
+    await db.flush()
+    all_shares = compute_shares_batch(
+        [li.amount for li in line_items], user_ids, [[True] * len(user_ids) for _ in line_items],
+        seeds=[str(li.id) for li in line_items],
+    )
+    db.add_all([
+        LineItemAssignment(line_item_id=li.id, user_id=uid, share_amount=share)
+        for li, shares in zip(line_items, all_shares)
+        for uid, share in shares.items()
+    ])
+    await db.flush()
+
+
+async def _bulk_path(db, receipt_id, items, user_ids):
+    line_items = await insert_line_items(db, receipt_id, items)
+    all_shares = compute_shares_batch(
+        [li["amount"] for li in line_items], user_ids, [[True] * len(user_ids) for _ in line_items],
+        seeds=[str(li["id"]) for li in line_items],
+    )
+    await insert_assignments(db, [(li["id"], shares) for li, shares in zip(line_items, all_shares)])
+
+
+async def main(n_items: int, n_users: int, rounds: int):
+    timings = {"orm": [], "bulk": []}
+    async with async_session_factory() as db:
+        users = [
+            User(id=uuid.uuid4(), email=f"bench-{uuid.uuid4()}@example.com", display_name=f"Bench {i}")
+            for i in range(n_users)
+        ]
+        db.add_all(users)
+        await db.flush()
+        group = Group(name="Benchmark", created_by=users[0].id)
+        db.add(group)
+        await db.flush()
+        user_ids = [u.id for u in users]
+
+        for _ in range(rounds):
+            for name, path in (("orm", _orm_path), ("bulk", _bulk_path)):
+                receipt = Receipt(
+                    group_id=group.id, uploaded_by=users[0].id, image_url="",
+                    status=ReceiptStatus.confirmed,
+                )
+                db.add(receipt)
+                await db.flush()
+                t0 = time.perf_counter()
+                await path(db, receipt.id, _items(n_items), user_ids)
+                timings[name].append((time.perf_counter() - t0) * 1000)
+                db.expunge_all()
+
+        await db.rollback()
+
+    rows = n_items + n_items * n_users
+    print(f"{n_items} items x {n_users} users = {rows} rows per receipt, {rounds} rounds")
+    for name, samples in timings.items():
+        print(f"  {name:>4}: median {statistics.median(samples):8.2f} ms  min {min(samples):8.2f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    asyncio.run(main(*(args + [50, 10, 5][len(args):])))
@@ -0,0 +1,69 @@
+"""Compare greedy and optimal settlement on synthetic groups.
+
+Usage: python -m scripts.benchmark_settlement [trials_per_size]
+Run from the backend/ directory. No database needed.
+"""
+
+import random
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+from app.core.config import settings
+from app.services.settlement_service import _greedy_transfers, _optimal_transfers
+
+SIZES = (5, 8, 10, 12, 15, 18, 20, 30, 45, 60)
+
+
+def synthetic_group(size: int, rng: random.Random) -> list:
+    """Net balances for `size` members that sum to zero, with a few exact opposites."""
+    cents = [rng.randint(-20000, 20000) for _ in range(size - 1)]
+    for i in range(0, size - 1, 4):
+        if i + 1 < size - 1:
+            cents[i + 1] = -cents[i]
+    cents.append(-sum(cents))
+    return [[uuid.uuid4(), Decimal(c) / 100, f"user{i}"] for i, c in enumerate(cents)]
+
+
+def run_greedy(members: list) -> list:
+    debtors = [[uid, -bal, name] for uid, bal, name in members if bal < 0]
+    creditors = [[uid, bal, name] for uid, bal, name in members if bal > 0]
+    return _greedy_transfers(debtors, creditors)
+
+
+def main(trials: int):
+    rng = random.Random(42)
+    budget = settings.settlement_optimal_budget_ms
+    limit = settings.settlement_optimal_max_members
+    print(f"budget={budget}ms max_members={limit} trials={trials}")
+    print(f"{'size':>5} {'greedy':>8} {'optimal':>8} {'fallback':>9} {'greedy ms':>10} {'optimal ms':>11}")
+
+    for size in SIZES:
+        greedy_count = optimal_count = fallbacks = 0
+        greedy_time = optimal_time = 0.0
+        for _ in range(trials):
+            members = synthetic_group(size, rng)
+
+            t0 = time.perf_counter()
+            greedy = run_greedy([m[:] for m in members])
+            greedy_time += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            optimal = _optimal_transfers([m[:] for m in members], budget, limit)
+            optimal_time += time.perf_counter() - t0
+            if optimal is None:
+                fallbacks += 1
+                optimal = greedy
+
+            greedy_count += len(greedy)
+            optimal_count += len(optimal)
+
+        print(
+            f"{size:>5} {greedy_count / trials:>8.2f} {optimal_count / trials:>8.2f} "
+            f"{fallbacks:>9} {greedy_time * 1000 / trials:>10.2f} {optimal_time * 1000 / trials:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
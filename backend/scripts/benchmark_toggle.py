@@ -0,0 +1,81 @@
+"""Compare p50/p99 latency of toggle_assignment in "orm" and "sql" mode.
+
+Usage: python -m scripts.benchmark_toggle [users] [toggles]
+Run from the backend/ directory against a dev database (migrations applied).
+Each toggle commits, like the endpoint does; the benchmark group and users
+are deleted at the end. Defaults: a line item shared by up to 6 users, 200
+toggles per mode.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.group import Group
+from app.models.ledger import GroupLedger, GroupDailySpend
+from app.models.receipt import Receipt, LineItem, ReceiptStatus
+from app.models.user import User
+from app.services.assignment_service import toggle_assignment
+
+
+async def main(n_users: int, n_toggles: int):
+    async with async_session_factory() as db:
+        users = [
+            User(id=uuid.uuid4(), email=f"bench-{uuid.uuid4()}@example.com", display_name=f"Bench {i}")
+            for i in range(n_users)
+        ]
+        db.add_all(users)
+        await db.flush()
+        group = Group(name="Benchmark", created_by=users[0].id)
+        db.add(group)
+        await db.flush()
+        receipt = Receipt(
+            group_id=group.id, uploaded_by=users[0].id, image_url="", status=ReceiptStatus.confirmed,
+        )
+        db.add(receipt)
+        await db.flush()
+        line_item = LineItem(
+            receipt_id=receipt.id, description="Shared", unit_price=Decimal("100.00"), amount=Decimal("100.00"),
+        )
+        db.add(line_item)
+        await db.commit()
+        receipt_id, line_item_id, group_id = receipt.id, line_item.id, group.id
+        user_ids = [u.id for u in users]
+
+    timings = {}
+    try:
+        for mode in ("orm", "sql"):
+            settings.assignment_toggle_mode = mode
+            samples = []
+            for i in range(n_toggles):
+                async with async_session_factory() as db:
+                    t0 = time.perf_counter()
+                    result = await toggle_assignment(db, receipt_id, line_item_id, user_ids[i % n_users], None)
+                    samples.append((time.perf_counter() - t0) * 1000)
+                    assert result is not None
+            timings[mode] = samples
+    finally:
+        async with async_session_factory() as db:
+            await db.execute(delete(Receipt).where(Receipt.id == receipt_id))
+            await db.execute(delete(GroupLedger).where(GroupLedger.group_id == group_id))
+            await db.execute(delete(GroupDailySpend).where(GroupDailySpend.group_id == group_id))
+            await db.execute(delete(Group).where(Group.id == group_id))
+            await db.execute(delete(User).where(User.id.in_(user_ids)))
+            await db.commit()
+
+    print(f"{n_toggles} toggles per mode over {n_users} users")
+    for mode, samples in timings.items():
+        p99 = statistics.quantiles(samples, n=100)[98]
+        print(f"  {mode:>3}: p50 {statistics.median(samples):8.2f} ms  p99 {p99:8.2f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    asyncio.run(main(*(args + [6, 200][len(args):])))
@@ -0,0 +1,86 @@
+"""EXPLAIN the hot query shapes and check each one uses its intended index.
+
+Usage: python -m scripts.check_query_plans
+Run from the backend/ directory against a migrated database. Sequential scans
+are disabled for the check, so small dev tables still show whether the
+planner *can* use the index for the predicate. Exits 1 if any check fails.
+"""
+
+import asyncio
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, bindparam, text, tuple_
+from sqlalchemy.dialects import postgresql
+
+from app.core.database import async_session_factory
+from app.models.group import Group, GroupMember
+from app.models.payment import Settlement
+from app.models.receipt import Receipt
+
+ANY_ID = uuid.UUID(int=0)
+
+# (description, statement mirroring the service query, expected index)
+CHECKS = [
+    (
+        "list_receipts_page",
+        select(Receipt.id)
+        .where(
+            Receipt.group_id == ANY_ID,
+            tuple_(Receipt.created_at, Receipt.id) < tuple_(datetime.now(timezone.utc), ANY_ID),
+        )
+        .order_by(Receipt.created_at.desc(), Receipt.id.desc())
+        .limit(51),
+        "ix_receipts_group_id_created_at_id",
+    ),
+    (
+        "list_processing_receipts",
+        select(Receipt.id, Group.name)
+        .join(Group, Group.id == Receipt.group_id)
+        .join(GroupMember, GroupMember.group_id == Group.id)
+        .where(
+            GroupMember.user_id == ANY_ID,
+            Receipt.status.in_(bindparam("pending_statuses", ["processing", "failed"], literal_execute=True)),
+        )
+        .order_by(Receipt.created_at.desc()),
+        "ix_receipts_pending_group_id_created_at",
+    ),
+    (
+        "send_overdue_reminders",
+        select(Settlement.id).where(
+            Settlement.is_settled == False,
+            Settlement.created_at <= datetime.now(timezone.utc) - timedelta(days=14),
+        ),
+        "ix_settlements_unsettled_created_at",
+    ),
+]
+
+
+def _index_names(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+async def main() -> int:
+    failures = 0
+    async with async_session_factory() as db:
+        await db.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, stmt, index in CHECKS:
+            sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+            result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            plan = result.scalar_one()[0]["Plan"]
+            used = _index_names(plan)
+            ok = index in used
+            failures += not ok
+            print(f"  {'OK  ' if ok else 'FAIL'} {name}: expected {index}, plan uses {sorted(used) or 'no index'}")
+        await db.rollback()
+
+    print(f"Done. {len(CHECKS) - failures}/{len(CHECKS)} queries use their index.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,32 @@
+"""Recompute group_ledger from raw receipts, payments and settlements.
+
+Usage: python -m scripts.rebuild_group_ledger [group_id ...]
+Run from the backend/ directory. With no arguments every group is rebuilt.
+"""
+
+import asyncio
+import sys
+import uuid
+
+from sqlalchemy import select
+
+from app.core.database import async_session_factory
+from app.models.group import Group
+from app.services.ledger_service import rebuild_group_ledger
+
+
+async def main(group_ids: list[uuid.UUID]):
+    async with async_session_factory() as db:
+        if not group_ids:
+            group_ids = list((await db.scalars(select(Group.id))).all())
+
+        for group_id in group_ids:
+            await rebuild_group_ledger(db, group_id)
+            await db.commit()
+            print(f"  Rebuilt ledger for group {group_id}")
+
+    print(f"Done. {len(group_ids)} group(s) rebuilt.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main([uuid.UUID(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,58 @@
+"""
+Shared fixtures. `pg_db` runs a test against a real Postgres: set
+TEST_DATABASE_URL (postgresql+asyncpg://...) to a throwaway database, otherwise
+those tests are skipped. Each test gets the schema and the SQL functions from
+the migrations inside one transaction that is rolled back afterwards.
+"""
+
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# Migrations whose plpgsql functions metadata.create_all() cannot create
+_FUNCTION_MIGRATIONS = (
+    "e2f3a4b5c6d7_add_py_decimal28_function.py",
+    "a0b1c2d3e4f5_add_toggle_assignment_function.py",
+)
+_VERSIONS = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+
+
+def _run_migrations(sync_conn) -> None:
+    from alembic.runtime.migration import MigrationContext
+    from alembic.operations import Operations
+
+    with Operations.context(MigrationContext.configure(sync_conn)):
+        for filename in _FUNCTION_MIGRATIONS:
+            spec = importlib.util.spec_from_file_location(filename[:-3], _VERSIONS / filename)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            module.upgrade()
+
+
+@pytest.fixture
+async def pg_db():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    import app.models  # noqa: F401  (registers every table)
+    from app.core.database import Base
+
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_run_migrations)
+        # Service commits release a savepoint; the outer rollback undoes everything
+        session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+        try:
+            yield session
+        finally:
+            await session.close()
+            await trans.rollback()
+    await engine.dispose()
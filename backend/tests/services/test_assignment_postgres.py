@@ -0,0 +1,57 @@
+"""toggle_line_item_assignment() against compute_shares (skipped unless TEST_DATABASE_URL is set)."""
+
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.models.group import Group, GroupMember
+from app.models.receipt import Receipt, LineItem, LineItemAssignment, ReceiptStatus
+from app.models.user import User
+from app.services.assignment_service import _toggle_assignment_sql
+from app.utils.currency_utils import compute_shares, SPLIT_ORDER_MD5, SPLIT_ORDER_ROTATE
+
+USERS = [uuid.uuid5(uuid.NAMESPACE_DNS, f"user{i}.example.com") for i in range(7)]
+
+
+async def seed_item(db, amount: Decimal, split_version: int) -> tuple[uuid.UUID, uuid.UUID]:
+    for uid in USERS:
+        db.add(User(id=uid, email=f"{uid}@example.com", display_name=str(uid)[:8]))
+    group = Group(name="Trip", created_by=USERS[0])
+    db.add(group)
+    await db.flush()
+    for uid in USERS:
+        db.add(GroupMember(group_id=group.id, user_id=uid))
+    receipt = Receipt(
+        group_id=group.id, uploaded_by=USERS[0], image_url="manual",
+        status=ReceiptStatus.confirmed, split_version=split_version,
+    )
+    db.add(receipt)
+    await db.flush()
+    item = LineItem(receipt_id=receipt.id, description="item", amount=amount, unit_price=amount)
+    db.add(item)
+    await db.flush()
+    return receipt.id, item.id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("split_version", [SPLIT_ORDER_MD5, SPLIT_ORDER_ROTATE])
+@pytest.mark.parametrize("amount", [Decimal("100.00"), Decimal("19.99"), Decimal("0.05"), Decimal("-10.01")])
+async def test_sql_toggle_splits_like_compute_shares(pg_db, split_version, amount):
+    receipt_id, item_id = await seed_item(pg_db, amount, split_version)
+
+    # Add everyone one by one, then take a few back out
+    toggles = USERS + USERS[1:6:2]
+    assigned = set()
+    for uid in toggles:
+        result = await _toggle_assignment_sql(pg_db, receipt_id, item_id, uid, None)
+        assigned ^= {uid}
+        assert result["assigned"] == (uid in assigned)
+
+        expected = compute_shares(amount, list(assigned), seed=str(item_id), order_version=split_version)
+        assert {a["user_id"]: a["share_amount"] for a in result["assignments"]} == expected
+
+        stored = await pg_db.execute(
+            LineItemAssignment.__table__.select().where(LineItemAssignment.line_item_id == item_id)
+        )
+        assert {r.user_id: r.share_amount for r in stored} == expected
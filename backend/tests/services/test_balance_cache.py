@@ -0,0 +1,103 @@
+import uuid
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+
+from app.services import balance_cache
+from app.services.balance_cache import get_cached_balances, get_cached_group_stats, cache_stats
+
+GROUP_ID = uuid.uuid4()
+
+
+def make_version_db(*versions):
+    """Mock db whose execute() calls return the given ledger_version values in turn."""
+    results = []
+    for version in versions:
+        r = MagicMock()
+        r.scalar_one_or_none.return_value = version
+        results.append(r)
+    db = AsyncMock()
+    db.execute.side_effect = results
+    return db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    balance_cache._cache.clear()
+    yield
+    balance_cache._cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_same_version_is_served_from_cache():
+    db = make_version_db(3, 3)
+    with patch("app.services.settlement_service.calculate_balances", AsyncMock(return_value={"balances": []})) as calc:
+        first = await get_cached_balances(db, GROUP_ID)
+        second = await get_cached_balances(db, GROUP_ID)
+
+    assert first is second
+    calc.assert_awaited_once()
+    assert cache_stats()["hits"] == 1
+    assert cache_stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_bumped_version_recomputes():
+    db = make_version_db(3, 4)
+    with patch("app.services.settlement_service.calculate_balances", AsyncMock(return_value={"balances": []})) as calc:
+        await get_cached_balances(db, GROUP_ID)
+        await get_cached_balances(db, GROUP_ID)
+
+    assert calc.await_count == 2
+    assert cache_stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_oldest_entry():
+    cache = balance_cache.LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["size"] == 2
+
+
+def _stats(**amounts):
+    return {
+        "total_spending": str(sum(Decimal(a) for a in amounts.values())),
+        "receipt_count": 1,
+        "base_currency": "SGD",
+        "spending_by_user": [
+            {"user_id": uid, "display_name": uid, "amount": a, "paid": "0.00", "balance": "0.00"}
+            for uid, a in amounts.items()
+        ],
+    }
+
+
+@pytest.mark.asyncio
+async def test_stats_cursor_returns_only_changed_users():
+    stats = AsyncMock(side_effect=[_stats(alice="10.00", bob="5.00"), _stats(alice="10.00", carol="7.00")])
+    db = make_version_db(1, 1, 2)
+    with patch("app.services.stats_service.get_group_stats", stats):
+        first = await get_cached_group_stats(db, GROUP_ID)
+        unchanged = await get_cached_group_stats(db, GROUP_ID, cursor=first["cursor"])
+        delta = await get_cached_group_stats(db, GROUP_ID, cursor=first["cursor"])
+
+    assert first["cursor"] == "1"
+    assert unchanged == {"cursor": "1", "changed": False}
+    assert delta["cursor"] == "2"
+    assert delta["full"] is False
+    assert [u["user_id"] for u in delta["spending_by_user"]] == ["carol"]
+    assert delta["removed_user_ids"] == ["bob"]
+
+
+@pytest.mark.asyncio
+async def test_unknown_cursor_returns_full_stats():
+    db = make_version_db(5)
+    with patch("app.services.stats_service.get_group_stats", AsyncMock(return_value=_stats(alice="1.00"))):
+        result = await get_cached_group_stats(db, GROUP_ID, cursor="2")
+
+    assert result["full"] is True
+    assert len(result["spending_by_user"]) == 1
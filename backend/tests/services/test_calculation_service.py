@@ -1,5 +1,6 @@
 import uuid
 from decimal import Decimal
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 
@@ -98,3 +99,110 @@ async def test_empty_group_returns_empty_dict():
     db = make_db()
     result = await get_group_financials(db, GROUP_ID)
     assert result == {}
+
+
+def make_sql_db(rows):
+    """Mock db for get_group_financials_sql: one execute() returning per-user rows."""
+    SqlRow = namedtuple('SqlRow', ['user_id', 'spent', 'paid', 'settled_out', 'settled_in', 'display_name', 'total_cents'])
+    db = AsyncMock()
+    r = MagicMock()
+    r.all.return_value = [SqlRow(*row) for row in rows]
+    db.execute.side_effect = [r]
+    return db
+
+
+@pytest.mark.asyncio
+async def test_exact_totals_do_not_depend_on_row_order():
+    """100.00 + 3 x (10.00 / 3): a 28-digit running sum lands on 110.00 or 109.99 depending on order."""
+    alice, bob, carol, dave = (uuid.UUID(int=i) for i in (1, 2, 3, 4))
+    rid = uuid.uuid4()
+    items = [(uuid.uuid4(), Decimal("100.00"), [alice])]
+    items += [(uuid.uuid4(), Decimal("10.00"), [alice, bob, carol]) for _ in range(3)]
+    items.append((uuid.uuid4(), Decimal("0.01"), [dave]))
+    rows = [(rid, Decimal("1"), lid, amount, uid, None) for lid, amount, uids in items for uid in uids]
+
+    forward = await get_group_financials(make_db(assignment_rows=rows), GROUP_ID)
+    backward = await get_group_financials(make_db(assignment_rows=rows[::-1]), GROUP_ID)
+
+    spent = {u: d["spent"] for u, d in forward.items()}
+    assert spent == {u: d["spent"] for u, d in backward.items()}
+    # Alice's exact 109.99..9 floors to 10999 cents; the 3 leftover cents go in id order
+    assert spent == {alice: Decimal("110.00"), bob: Decimal("10.00"), carol: Decimal("10.00"), dave: Decimal("0.01")}
+
+
+@pytest.mark.asyncio
+async def test_sql_engine_payments_and_settlements():
+    from app.services.calculation_service import get_group_financials_sql
+
+    db = make_sql_db([
+        (ALICE, Decimal("100.00"), None, Decimal("100.00"), None, "Alice", 10000),
+        (BOB, None, Decimal("100.00"), None, Decimal("100.00"), "Bob", 10000),
+    ])
+    result = await get_group_financials_sql(db, GROUP_ID)
+    assert result[ALICE]["net_balance"] == Decimal("0.00")
+    assert result[BOB]["net_balance"] == Decimal("0.00")
+    assert result[BOB]["spent"] == Decimal("0")
+    assert result[ALICE]["display_name"] == "Alice"
+
+
+class _AsyncRows:
+    """Minimal stand-in for an AsyncResult: async-iterates over preset rows."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._rows)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.mark.asyncio
+async def test_stream_engine_matches_full_scan():
+    from app.services.calculation_service import get_group_financials_stream
+
+    carol = uuid.uuid4()
+    assignment_rows, stream_rows = [], []
+    for rate in (Decimal("1"), Decimal("0.731"), Decimal("1.35")):
+        rid = uuid.uuid4()
+        for amount, uids in ((Decimal("10.00"), [ALICE, BOB, carol]), (Decimal("7.15"), [BOB, carol])):
+            lid = uuid.uuid4()
+            for uid in uids:
+                assignment_rows.append((rid, rate, lid, amount, uid, None))
+                stream_rows.append(SimpleNamespace(
+                    exchange_rate=rate, line_item_id=lid, amount=amount, user_id=uid, display_name=None,
+                ))
+    payment_rows = [(ALICE, Decimal("20.00"), Decimal("0.731"), "Alice")]
+    settlement_rows = [(BOB, ALICE, Decimal("5.00"))]
+
+    expected = await get_group_financials(
+        make_db(assignment_rows, payment_rows, settlement_rows), GROUP_ID
+    )
+
+    db = AsyncMock()
+    db.stream.side_effect = [
+        _AsyncRows(stream_rows),
+        _AsyncRows(payment_rows),
+        _AsyncRows(settlement_rows),
+    ]
+    result = await get_group_financials_stream(db, GROUP_ID)
+
+    assert result == expected
+
+
+@pytest.mark.asyncio
+async def test_date_range_filters_receipts_and_settlements():
+    from datetime import date
+
+    db = make_db()
+    await get_group_financials(db, GROUP_ID, since=date(2026, 10, 1), until=date(2026, 11, 1))
+
+    assignments_sql, payments_sql, settlements_sql = (str(c.args[0]) for c in db.execute.call_args_list)
+    for sql in (assignments_sql, payments_sql):
+        assert "receipts.receipt_date >=" in sql
+        assert "receipts.receipt_date <" in sql
+    assert "settlements.settled_at >=" in settlements_sql
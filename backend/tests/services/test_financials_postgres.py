@@ -0,0 +1,64 @@
+"""Engine parity against a real Postgres (skipped unless TEST_DATABASE_URL is set)."""
+
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.models.group import Group, GroupMember
+from app.models.payment import Payment
+from app.models.receipt import Receipt, LineItem, LineItemAssignment, ReceiptStatus
+from app.models.user import User
+from app.services.calculation_service import get_group_financials, get_group_financials_sql
+from app.services.ledger_service import get_ledger_financials, rebuild_group_ledger
+
+USERS = [uuid.UUID(int=i) for i in (1, 2, 3, 4)]
+
+
+async def seed_group(db, receipts) -> uuid.UUID:
+    """receipts: [(exchange_rate, [(amount, [user index, ...]), ...], [(payer index, amount), ...])]"""
+    for uid in USERS:
+        db.add(User(id=uid, email=f"{uid}@example.com", display_name=f"User {uid.int}"))
+    group = Group(name="Trip", created_by=USERS[0])
+    db.add(group)
+    await db.flush()
+    for uid in USERS:
+        db.add(GroupMember(group_id=group.id, user_id=uid))
+
+    for rate, items, payments in receipts:
+        receipt = Receipt(
+            group_id=group.id, uploaded_by=USERS[0], image_url="manual",
+            exchange_rate=rate, status=ReceiptStatus.confirmed,
+        )
+        db.add(receipt)
+        await db.flush()
+        for amount, members in items:
+            item = LineItem(receipt_id=receipt.id, description="item", amount=amount, unit_price=amount)
+            db.add(item)
+            await db.flush()
+            for i in members:
+                db.add(LineItemAssignment(line_item_id=item.id, user_id=USERS[i], share_amount=Decimal("0")))
+        for payer, amount in payments:
+            db.add(Payment(receipt_id=receipt.id, paid_by=USERS[payer], amount=amount))
+    await db.flush()
+    return group.id
+
+
+def spent(financials: dict) -> dict:
+    return {uid: (d["spent"], d["paid"]) for uid, d in financials.items()}
+
+
+@pytest.mark.asyncio
+async def test_sql_and_ledger_engines_match_python_engine(pg_db):
+    thirds = [(Decimal("10.00"), [0, 1, 2]) for _ in range(3)]
+    group_id = await seed_group(pg_db, [
+        (Decimal("1"), [(Decimal("100.00"), [0]), *thirds, (Decimal("0.01"), [3])], [(0, Decimal("50.00"))]),
+        (Decimal("0.731"), [(Decimal("7.15"), [1, 2]), (Decimal("19.99"), [0, 1, 2, 3])], []),
+        (Decimal("1.35"), thirds, [(2, Decimal("30.00"))]),
+    ])
+
+    expected = spent(await get_group_financials(pg_db, group_id))
+    assert spent(await get_group_financials_sql(pg_db, group_id)) == expected
+
+    await rebuild_group_ledger(pg_db, group_id)
+    assert spent(await get_ledger_financials(pg_db, group_id)) == expected
@@ -0,0 +1,231 @@
+import uuid
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import ledger_service
+from app.services.calculation_service import get_group_financials
+from app.services.ledger_service import get_ledger_financials, record_receipt_change
+
+GROUP_ID = uuid.uuid4()
+ALICE = uuid.UUID("00000000-0000-0000-0000-00000000000a")
+BOB = uuid.UUID("00000000-0000-0000-0000-00000000000b")
+CAROL = uuid.UUID("00000000-0000-0000-0000-00000000000c")
+OCT_1, OCT_2 = date(2026, 10, 1), date(2026, 10, 2)
+
+
+def _result(rows):
+    r = MagicMock()
+    r.all.return_value = rows
+    return r
+
+
+def make_ledger_db(entries, spent_cents, names=None):
+    """Mock db whose single execute() returns (GroupLedger, display_name, cents) rows."""
+    names = names or {}
+    rows = [
+        (SimpleNamespace(user_id=uid, **entry), names.get(uid), spent_cents)
+        for uid, entry in entries.items()
+    ]
+    db = AsyncMock()
+    db.execute.side_effect = [_result(rows)]
+    return db
+
+
+def entry(spent="0", assignment_count=0, paid="0", settled_out="0", settled_in="0"):
+    return {
+        "spent": Decimal(spent),
+        "assignment_count": assignment_count,
+        "paid": Decimal(paid),
+        "settled_out": Decimal(settled_out),
+        "settled_in": Decimal(settled_in),
+    }
+
+
+@pytest.mark.asyncio
+async def test_remainder_cents_distributed_like_full_scan():
+    """Ledger read matches get_group_financials on a 10.00 item split three ways."""
+    AssignRow = namedtuple('AssignRow', ['receipt_id', 'exchange_rate', 'line_item_id', 'amount', 'user_id', 'display_name'])
+    receipt_id, line_item_id = uuid.uuid4(), uuid.uuid4()
+    scan_db = AsyncMock()
+    scan_db.execute.side_effect = [
+        _result([AssignRow(receipt_id, Decimal("1"), line_item_id, Decimal("10.00"), uid, None)
+                 for uid in (ALICE, BOB, CAROL)]),
+        _result([]),
+        _result([]),
+    ]
+    expected = await get_group_financials(scan_db, GROUP_ID)
+
+    exact = Decimal("10.00") / Decimal(3)
+    db = make_ledger_db(
+        {uid: entry(spent=exact, assignment_count=1) for uid in (ALICE, BOB, CAROL)},
+        spent_cents=1000,
+    )
+    result = await get_ledger_financials(db, GROUP_ID)
+
+    assert {uid: d["spent"] for uid, d in result.items()} == {uid: d["spent"] for uid, d in expected.items()}
+    assert sum(d["spent"] for d in result.values()) == Decimal("10.00")
+
+
+@pytest.mark.asyncio
+async def test_net_balance_and_display_name():
+    db = make_ledger_db(
+        {
+            ALICE: entry(spent="30", assignment_count=1, paid="0", settled_out="10"),
+            BOB: entry(paid="30", settled_in="10"),
+        },
+        spent_cents=3000,
+        names={ALICE: "Alice", BOB: "Bob"},
+    )
+    result = await get_ledger_financials(db, GROUP_ID)
+    assert result[ALICE]["net_balance"] == Decimal("-20.00")
+    assert result[BOB]["net_balance"] == Decimal("20")
+    assert result[BOB]["spent"] == Decimal("0")
+    assert result[ALICE]["display_name"] == "Alice"
+
+
+@pytest.mark.asyncio
+async def test_zeroed_rows_are_skipped():
+    """A user whose assignments were all removed drops out of the result."""
+    db = make_ledger_db({ALICE: entry(), BOB: entry(spent="5", assignment_count=1)}, spent_cents=500)
+    result = await get_ledger_financials(db, GROUP_ID)
+    assert list(result) == [BOB]
+
+
+@pytest.mark.asyncio
+async def test_record_receipt_change_applies_difference():
+    receipt_id = uuid.uuid4()
+    before = {
+        "receipt_id": receipt_id, "group_id": GROUP_ID, "cents": 1000,
+        "users": {ALICE: {"spent": Decimal("10"), "assignment_count": 1, "paid": Decimal("0")}},
+        "daily": {(OCT_1, ALICE): 1000},
+    }
+    after = {
+        "group_id": GROUP_ID, "cents": 1000,
+        "users": {
+            ALICE: {"spent": Decimal("5"), "assignment_count": 1, "paid": Decimal("0")},
+            BOB: {"spent": Decimal("5"), "assignment_count": 1, "paid": Decimal("0")},
+        },
+        # receipt_date moved to the next day
+        "daily": {(OCT_2, ALICE): 500, (OCT_2, BOB): 500},
+    }
+    db = AsyncMock()
+    with patch.object(ledger_service, "_collect_contributions", AsyncMock(return_value=after)), \
+         patch.object(ledger_service, "_apply_deltas", AsyncMock()) as apply:
+        await record_receipt_change(db, before)
+
+    db.flush.assert_awaited_once()
+    _, group_id, deltas, cents_delta, daily_deltas = apply.await_args.args
+    assert group_id == GROUP_ID
+    assert deltas[ALICE] == {"spent": Decimal("-5"), "assignment_count": 0, "paid": Decimal("0")}
+    assert deltas[BOB] == {"spent": Decimal("5"), "assignment_count": 1, "paid": Decimal("0")}
+    assert cents_delta == 0
+    assert daily_deltas == {(OCT_1, ALICE): -1000, (OCT_2, ALICE): 500, (OCT_2, BOB): 500}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_locks_receipt_before_reading():
+    db = AsyncMock()
+    collect = AsyncMock(return_value={"group_id": GROUP_ID, "users": {}, "cents": 0, "daily": {}})
+    with patch.object(ledger_service, "_collect_contributions", collect):
+        await ledger_service.snapshot_receipt(db, uuid.uuid4())
+
+    lock = db.execute.await_args_list[0].args[0]
+    assert "FOR UPDATE" in str(lock.compile(dialect=postgresql.dialect()))
+    collect.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_apply_payment_locks_receipt_for_its_rate():
+    row = MagicMock()
+    row.one_or_none.return_value = SimpleNamespace(group_id=GROUP_ID, exchange_rate=Decimal("0.5"))
+    db = AsyncMock()
+    db.execute.side_effect = [row]
+    with patch.object(ledger_service, "_apply_deltas", AsyncMock()) as apply:
+        await ledger_service.apply_payment(db, uuid.uuid4(), ALICE, Decimal("10.00"))
+
+    assert "FOR UPDATE" in str(db.execute.await_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    assert apply.await_args.args[2] == {ALICE: {"paid": Decimal("5.000")}}
+
+
+@pytest.mark.asyncio
+async def test_rebuild_locks_group_before_reading():
+    db = AsyncMock()
+    db.execute.return_value = _result([])
+    collect = AsyncMock(return_value={"group_id": GROUP_ID, "users": {}, "cents": 0, "daily": {}})
+    with patch.object(ledger_service, "_collect_contributions", collect), \
+         patch.object(ledger_service, "_apply_deltas", AsyncMock()):
+        await ledger_service.rebuild_daily_spend(db, GROUP_ID)
+
+    lock = str(db.execute.await_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    assert "FROM groups" in lock and "FOR UPDATE" in lock
+
+
+@pytest.mark.asyncio
+async def test_user_group_balances_batched_over_groups():
+    """One query covers every group; remainder cents follow the per-group distribution."""
+    from app.services.ledger_service import get_user_group_balances
+
+    trip, empty = uuid.uuid4(), uuid.uuid4()
+    exact = Decimal("10.00") / Decimal(3)
+    rows = [
+        (trip, "Trip", "SGD", 1000, SimpleNamespace(user_id=uid, **entry(spent=exact, assignment_count=1)))
+        for uid in (ALICE, BOB, CAROL)
+    ]
+    rows.append((empty, "Empty", "USD", 0, None))
+    db = AsyncMock()
+    db.execute.side_effect = [_result(rows)]
+
+    summaries = await get_user_group_balances(db, ALICE)
+
+    assert db.execute.await_count == 1
+    assert [s["group_id"] for s in summaries] == [trip, empty]
+    # ALICE sorts first by id, so she takes the leftover cent
+    assert summaries[0]["spent"] == Decimal("3.34")
+    assert summaries[0]["net_balance"] == Decimal("-3.34")
+    assert summaries[1]["net_balance"] == Decimal("0.00")
+
+
+ToggleRow = namedtuple('ToggleRow', [
+    'group_id', 'receipt_id', 'receipt_date', 'created_at', 'exchange_rate', 'line_item_id', 'amount', 'user_id',
+])
+
+
+@pytest.mark.asyncio
+async def test_assignment_toggle_deltas_from_returned_rows():
+    """Removing BOB from a shared item moves his half to ALICE, using only the rows after the toggle."""
+    from app.services.ledger_service import record_assignment_toggle
+
+    receipt_id, shared, solo = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    row = ToggleRow(GROUP_ID, receipt_id, OCT_1, None, Decimal("1"), shared, Decimal("10.00"), ALICE)
+    rows = [row, row._replace(line_item_id=solo, amount=Decimal("3.00"), user_id=BOB)]
+
+    with patch.object(ledger_service, "_apply_deltas", AsyncMock()) as apply:
+        await record_assignment_toggle(AsyncMock(), rows, shared, BOB, assigned=False)
+
+    _, group_id, deltas, cents_delta, daily_deltas = apply.await_args.args
+    assert group_id == GROUP_ID
+    assert deltas[ALICE] == {"spent": Decimal("5"), "assignment_count": 0, "paid": Decimal("0")}
+    assert deltas[BOB] == {"spent": Decimal("-5"), "assignment_count": -1, "paid": Decimal("0")}
+    assert cents_delta == 0
+    assert daily_deltas == {(OCT_1, ALICE): 500, (OCT_1, BOB): -500}
+
+
+@pytest.mark.asyncio
+async def test_assignment_toggle_first_user_adds_item_cents():
+    from app.services.ledger_service import record_assignment_toggle
+
+    line_item_id = uuid.uuid4()
+    rows = [ToggleRow(GROUP_ID, uuid.uuid4(), OCT_1, None, Decimal("2"), line_item_id, Decimal("4.50"), ALICE)]
+
+    with patch.object(ledger_service, "_apply_deltas", AsyncMock()) as apply:
+        await record_assignment_toggle(AsyncMock(), rows, line_item_id, ALICE, assigned=True)
+
+    _, _, deltas, cents_delta, daily_deltas = apply.await_args.args
+    assert deltas == {ALICE: {"spent": Decimal("9.00"), "assignment_count": 1, "paid": Decimal("0")}}
+    assert cents_delta == 900
+    assert daily_deltas == {(OCT_1, ALICE): 900}
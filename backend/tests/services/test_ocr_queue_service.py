@@ -0,0 +1,66 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.ocr_queue_service import enqueue_ocr_jobs, fail_ocr_job, heartbeat_ocr_job
+
+WORKER = "host:1"
+
+
+def make_job(attempts):
+    return SimpleNamespace(id=uuid.uuid4(), receipt_id=uuid.uuid4(), currency="MYR", attempts=attempts)
+
+
+def compiled(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_requeued_while_attempts_remain():
+    db = AsyncMock()
+    with patch("app.services.ocr_queue_service.settings.ocr_job_max_attempts", 3):
+        requeued = await fail_ocr_job(db, make_job(attempts=2), WORKER, "timeout")
+
+    assert requeued is True
+    # Only the job row is touched; the receipt stays 'processing'
+    assert db.execute.await_count == 1
+    assert "UPDATE ocr_jobs" in compiled(db.execute.await_args_list[0].args[0])
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_last_attempt_fails_job_and_receipt():
+    db = AsyncMock()
+    with patch("app.services.ocr_queue_service.settings.ocr_job_max_attempts", 3):
+        requeued = await fail_ocr_job(db, make_job(attempts=3), WORKER, "timeout")
+
+    assert requeued is False
+    statements = [compiled(call.args[0]) for call in db.execute.await_args_list]
+    assert "UPDATE ocr_jobs" in statements[0]
+    assert "UPDATE receipts" in statements[1]
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_enqueue_skips_receipts_with_a_live_job():
+    db = AsyncMock()
+    await enqueue_ocr_jobs(db, [(uuid.uuid4(), None), (uuid.uuid4(), "USD")])
+
+    sql = compiled(db.execute.await_args.args[0])
+    assert "ON CONFLICT (receipt_id) WHERE status IN ('queued', 'running') DO NOTHING" in sql
+
+
+@pytest.mark.asyncio
+async def test_enqueue_nothing_issues_no_statement():
+    db = AsyncMock()
+    await enqueue_ocr_jobs(db, [])
+    db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_reports_lost_lease():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(rowcount=0)
+    assert await heartbeat_ocr_job(db, uuid.uuid4(), WORKER) is False
@@ -0,0 +1,174 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+
+from app.services.receipt_service import (
+    list_receipts_page, encode_receipt_cursor, decode_receipt_cursor, load_receipt_detail,
+    delete_group_receipts_chunked,
+)
+
+GROUP_ID = uuid.uuid4()
+NOW = datetime(2026, 10, 16, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def make_receipts(n):
+    return [SimpleNamespace(id=uuid.uuid4(), created_at=NOW - timedelta(minutes=i)) for i in range(n)]
+
+
+def make_db(rows):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = rows
+    db = AsyncMock()
+    db.execute.side_effect = [result]
+    return db
+
+
+def test_cursor_round_trip_keeps_microseconds():
+    receipt = make_receipts(1)[0]
+    assert decode_receipt_cursor(encode_receipt_cursor(receipt)) == (receipt.created_at, receipt.id)
+
+
+def test_garbage_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_receipt_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_page_fetches_one_extra_row_to_detect_more():
+    receipts = make_receipts(3)
+    db = make_db(receipts)
+
+    page, next_cursor = await list_receipts_page(db, GROUP_ID, limit=2)
+
+    assert page == receipts[:2]
+    assert decode_receipt_cursor(next_cursor) == (receipts[1].created_at, receipts[1].id)
+    assert "LIMIT" in str(db.execute.call_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_last_page_has_no_cursor():
+    receipts = make_receipts(2)
+    db = make_db(receipts)
+
+    page, next_cursor = await list_receipts_page(
+        db, GROUP_ID, limit=2, cursor=encode_receipt_cursor(make_receipts(1)[0])
+    )
+
+    assert page == receipts
+    assert next_cursor is None
+    assert "(receipts.created_at, receipts.id) <" in str(db.execute.call_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_bulk_assignments_go_out_as_one_statement():
+    from decimal import Decimal
+    from app.services.bulk_write_service import insert_assignments
+
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    items = [
+        (uuid.uuid4(), {alice: Decimal("5.00"), bob: Decimal("5.00")}),
+        (uuid.uuid4(), {alice: Decimal("3.34")}),
+    ]
+    db = AsyncMock()
+
+    rows = await insert_assignments(db, items)
+
+    db.execute.assert_awaited_once()
+    params = db.execute.call_args.args[1]
+    assert params["user_ids"] == [alice, bob, alice]
+    assert params["shares"] == [Decimal("5.00"), Decimal("5.00"), Decimal("3.34")]
+    assert [r["id"] for r in rows] == params["ids"]
+
+
+@pytest.mark.asyncio
+async def test_receipt_detail_keeps_decimal_digits():
+    """The json_agg row is parsed with Decimal floats and fits ReceiptDetailResponse."""
+    from app.schemas.receipt import ReceiptDetailResponse
+
+    receipt_id, item_id = uuid.uuid4(), uuid.uuid4()
+    raw = (
+        f'{{"id": "{receipt_id}", "group_id": "{GROUP_ID}", "uploaded_by": "{uuid.uuid4()}",'
+        ' "image_url": "", "merchant_name": "Cafe", "receipt_date": null, "currency": "SGD",'
+        ' "exchange_rate": 1.000000, "subtotal": null, "tax": null, "service_charge": null,'
+        ' "total": 10.10, "status": "confirmed", "version": 3,'
+        ' "created_at": "2026-10-16T12:00:00.123456+00:00",'
+        f' "line_items": [{{"id": "{item_id}", "description": "Tea", "quantity": 1.000,'
+        ' "unit_price": 10.10, "amount": 10.10, "sort_order": 0, "assignments": []}]}'
+    )
+    result = MagicMock()
+    result.one_or_none.return_value = (raw, None)
+    db = AsyncMock()
+    db.execute.return_value = result
+
+    detail = ReceiptDetailResponse.model_validate(await load_receipt_detail(db, receipt_id))
+
+    assert detail.total == Decimal("10.10")
+    assert str(detail.line_items[0].amount) == "10.10"
+    assert detail.created_at == NOW
+    assert db.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_receipt_detail_keeps_llm_response_numbers_as_numbers():
+    """Only money columns become Decimal; the raw LLM payload serializes as it was stored."""
+    from app.schemas.receipt import ReceiptDetailResponse
+
+    receipt_id = uuid.uuid4()
+    raw = (
+        f'{{"id": "{receipt_id}", "group_id": "{GROUP_ID}", "uploaded_by": "{uuid.uuid4()}",'
+        ' "image_url": "", "merchant_name": "Cafe", "receipt_date": null, "currency": "SGD",'
+        ' "exchange_rate": 1.000000, "subtotal": null, "tax": null, "service_charge": null,'
+        ' "total": 10.10, "status": "confirmed", "version": 1,'
+        ' "created_at": "2026-10-16T12:00:00.123456+00:00", "line_items": []}'
+    )
+    llm = '{"total": 10.1, "items": [{"description": "Tea", "quantity": 2, "unit_price": 5.05}]}'
+    result = MagicMock()
+    result.one_or_none.return_value = (raw, llm)
+    db = AsyncMock()
+    db.execute.return_value = result
+
+    detail = ReceiptDetailResponse.model_validate(await load_receipt_detail(db, receipt_id))
+    body = json.loads(detail.model_dump_json())
+
+    assert body["total"] == "10.10"
+    assert body["raw_llm_response"] == {
+        "total": 10.1, "items": [{"description": "Tea", "quantity": 2, "unit_price": 5.05}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_receipt_detail_missing_receipt():
+    result = MagicMock()
+    result.one_or_none.return_value = None
+    db = AsyncMock()
+    db.execute.return_value = result
+
+    assert await load_receipt_detail(db, uuid.uuid4()) is None
+
+
+@pytest.mark.asyncio
+async def test_chunked_delete_subtracts_each_chunk_before_commit():
+    chunks = [[uuid.uuid4(), uuid.uuid4()], [uuid.uuid4()]]
+    selects = []
+    for ids in chunks:
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = ids
+        selects.append(result)
+    db = AsyncMock()
+    # select chunk, delete chunk, per chunk
+    db.execute.side_effect = [selects[0], MagicMock(), selects[1], MagicMock()]
+
+    snapshot = AsyncMock(side_effect=lambda db, ids: {"ids": ids})
+    removed = AsyncMock()
+    with patch("app.services.receipt_service.settings.delete_chunk_size", 2), \
+         patch("app.services.receipt_service.snapshot_receipts", snapshot), \
+         patch("app.services.receipt_service.record_receipts_removed", removed):
+        total = await delete_group_receipts_chunked(db, GROUP_ID)
+
+    assert total == 3
+    assert [c.args[1] for c in removed.await_args_list] == [{"ids": chunks[0]}, {"ids": chunks[1]}]
+    assert db.commit.await_count == 2
@@ -23,7 +23,7 @@ async def test_simple_debt_resolution():
                 "settled_out": Decimal("0"), "settled_in": Decimal("0"),
                 "net_balance": Decimal("100"), "display_name": "Bob"},
     }
-    with patch("app.services.settlement_service.get_group_financials", return_value=financials):
+    with patch("app.services.settlement_service.load_group_financials", return_value=financials):
         result = await calculate_balances(db, GROUP_ID)
     assert len(result["balances"]) == 1
     transfer = result["balances"][0]
@@ -46,7 +46,7 @@ async def test_settlement_reduces_debt():
                 "net_balance": Decimal("0"),   # 100 - 0 + 0 - 100 = 0
                 "display_name": "Bob"},
     }
-    with patch("app.services.settlement_service.get_group_financials", return_value=financials):
+    with patch("app.services.settlement_service.load_group_financials", return_value=financials):
         result = await calculate_balances(db, GROUP_ID)
     assert result["balances"] == []
 
@@ -63,7 +63,7 @@ async def test_totals_returned():
                 "settled_out": Decimal("0"), "settled_in": Decimal("0"),
                 "net_balance": Decimal("-40"), "display_name": "Bob"},
     }
-    with patch("app.services.settlement_service.get_group_financials", return_value=financials):
+    with patch("app.services.settlement_service.load_group_financials", return_value=financials):
         result = await calculate_balances(db, GROUP_ID)
     assert result["total_assigned"] == Decimal("100.00")
     assert result["total_paid"] == Decimal("100.00")
@@ -72,6 +72,72 @@ async def test_totals_returned():
 @pytest.mark.asyncio
 async def test_empty_group():
     db = AsyncMock()
-    with patch("app.services.settlement_service.get_group_financials", return_value={}):
+    with patch("app.services.settlement_service.load_group_financials", return_value={}):
         result = await calculate_balances(db, GROUP_ID)
     assert result == {"balances": [], "total_assigned": Decimal("0"), "total_paid": Decimal("0")}
+
+
+def _financials(balances: dict) -> dict:
+    return {
+        uid: {"spent": Decimal("0"), "paid": Decimal("0"),
+              "settled_out": Decimal("0"), "settled_in": Decimal("0"),
+              "net_balance": Decimal(bal), "display_name": None}
+        for uid, bal in balances.items()
+    }
+
+
+@pytest.mark.asyncio
+async def test_optimal_uses_fewer_transfers_than_greedy():
+    """Two independent zero-sum clusters settle in 4 transfers; greedy needs 5."""
+    users = [uuid.uuid4() for _ in range(6)]
+    financials = _financials(dict(zip(users, ["-10", "7", "3", "-8", "5", "3"])))
+    with patch("app.services.settlement_service.load_group_financials", return_value=financials):
+        greedy = await calculate_balances(AsyncMock(), GROUP_ID)
+        optimal = await calculate_balances(AsyncMock(), GROUP_ID, algorithm="optimal")
+
+    assert len(greedy["balances"]) == 5
+    assert len(optimal["balances"]) == 4
+    net = {uid: Decimal("0") for uid in users}
+    for t in optimal["balances"]:
+        net[t["from_user_id"]] -= t["amount"]
+        net[t["to_user_id"]] += t["amount"]
+    assert net == {uid: financials[uid]["net_balance"] for uid in users}
+
+
+@pytest.mark.asyncio
+async def test_optimal_falls_back_to_greedy_for_large_groups():
+    users = [uuid.uuid4() for _ in range(4)]
+    financials = _financials(dict(zip(users, ["-10", "7", "-3", "6"])))
+    with patch("app.services.settlement_service.load_group_financials", return_value=financials), \
+         patch("app.services.settlement_service.settings.settlement_optimal_max_members", 2):
+        greedy = await calculate_balances(AsyncMock(), GROUP_ID)
+        optimal = await calculate_balances(AsyncMock(), GROUP_ID, algorithm="optimal")
+
+    assert optimal == greedy
+
+
+@pytest.mark.asyncio
+async def test_optimal_with_partly_paid_receipt_matches_greedy():
+    """Balances net to -85 while a receipt is unpaid; optimal must not invent transfers."""
+    financials = _financials({ALICE: "-50", BOB: "-45", CHARLIE: "10"})
+    with patch("app.services.settlement_service.load_group_financials", return_value=financials):
+        greedy = await calculate_balances(AsyncMock(), GROUP_ID)
+        optimal = await calculate_balances(AsyncMock(), GROUP_ID, algorithm="optimal")
+
+    assert optimal == greedy
+    assert [(t["from_user_id"], t["to_user_id"], t["amount"]) for t in optimal["balances"]] == [
+        (ALICE, CHARLIE, Decimal("10.00")),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_optimal_absorbs_rounding_cents():
+    users = [uuid.uuid4() for _ in range(3)]
+    # Thirds of 10.00 round to 3.33 each: one cent short of the creditor's 10.00
+    financials = _financials(dict(zip(users, ["-3.333", "-3.333", "6.667"])))
+    with patch("app.services.settlement_service.load_group_financials", return_value=financials):
+        optimal = await calculate_balances(AsyncMock(), GROUP_ID, algorithm="optimal")
+
+    assert len(optimal["balances"]) == 2
+    assert all(t["to_user_id"] == users[2] for t in optimal["balances"])
+
@@ -32,7 +32,7 @@ async def test_total_spending_is_sum_of_spent():
                 "settled_out": Decimal("0"), "settled_in": Decimal("0"),
                 "net_balance": Decimal("-40.00"), "display_name": "Bob"},
     }
-    with patch("app.services.stats_service.get_group_financials", return_value=financials):
+    with patch("app.services.stats_service.load_group_financials", return_value=financials):
         result = await get_group_stats(db, GROUP_ID)
     assert result["total_spending"] == "100.00"
 
@@ -46,7 +46,7 @@ async def test_balance_reflects_settlements():
                 "settled_out": Decimal("0"), "settled_in": Decimal("0"),
                 "net_balance": Decimal("0.00"), "display_name": "Alice"},
     }
-    with patch("app.services.stats_service.get_group_financials", return_value=financials):
+    with patch("app.services.stats_service.load_group_financials", return_value=financials):
         result = await get_group_stats(db, GROUP_ID)
     user = result["spending_by_user"][0]
     assert user["balance"] == "0.00"
@@ -60,8 +60,37 @@ async def test_empty_group_returns_zero_stats():
     receipt_count_result = MagicMock()
     receipt_count_result.scalar_one.return_value = 0
     db.execute.side_effect = [currency_result, receipt_count_result]
-    with patch("app.services.stats_service.get_group_financials", return_value={}):
+    with patch("app.services.stats_service.load_group_financials", return_value={}):
         result = await get_group_stats(db, GROUP_ID)
     assert result["total_spending"] == "0.00"
     assert result["receipt_count"] == 0
     assert result["spending_by_user"] == []
+
+
+@pytest.mark.asyncio
+async def test_spend_series_groups_by_period():
+    from collections import namedtuple
+    from datetime import date
+    from app.services.stats_service import get_spend_series
+
+    SeriesRow = namedtuple('SeriesRow', ['period', 'user_id', 'cents'])
+    rows_result = MagicMock()
+    rows_result.all.return_value = [
+        SeriesRow(date(2026, 10, 1), ALICE, 1050),
+        SeriesRow(date(2026, 10, 1), BOB, 250),
+        SeriesRow(date(2026, 10, 3), BOB, 0),
+        SeriesRow(date(2026, 10, 4), BOB, 100),
+    ]
+    db = AsyncMock()
+    db.execute.side_effect = [rows_result]
+
+    result = await get_spend_series(db, GROUP_ID, "day", since=date(2026, 10, 1))
+
+    assert result["granularity"] == "day"
+    assert [p["period"] for p in result["series"]] == ["2026-10-01", "2026-10-04"]
+    assert result["series"][0]["total"] == "13.00"
+    assert result["series"][0]["by_user"] == [
+        {"user_id": str(ALICE), "amount": "10.50"},
+        {"user_id": str(BOB), "amount": "2.50"},
+    ]
+    assert "group_daily_spend.day >=" in str(db.execute.call_args.args[0])
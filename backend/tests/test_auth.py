@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import json
+import time
+from unittest.mock import AsyncMock, patch
+import httpx
+import jwt as pyjwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+from jwt import PyJWK
+from jwt.algorithms import ECAlgorithm
+
+from app.core import auth
+
+
+def make_key(kid):
+    private = ec.generate_private_key(ec.SECP256R1())
+    jwk = json.loads(ECAlgorithm.to_jwk(private.public_key()))
+    return private, PyJWK({**jwk, "kid": kid, "alg": "ES256"})
+
+
+def make_token(private, kid, exp_in=3600):
+    claims = {"sub": "00000000-0000-0000-0000-00000000000a", "aud": "authenticated", "exp": int(time.time()) + exp_in}
+    return pyjwt.encode(claims, private, algorithm="ES256", headers={"kid": kid})
+
+
+@pytest.fixture(autouse=True)
+def reset_auth_state():
+    auth._token_cache.clear()
+    auth._jwks_cache = None
+    auth._jwks_fetched_at = 0.0
+    auth._jwks_failed_at = float("-inf")
+    yield
+    auth._token_cache.clear()
+    auth._jwks_cache = None
+
+
+@pytest.mark.asyncio
+async def test_verified_token_is_cached():
+    private, key = make_key("k1")
+    token = make_token(private, "k1")
+    with patch.object(auth, "_fetch_jwks", AsyncMock(return_value={"k1": key})), \
+         patch.object(auth.pyjwt, "decode", wraps=pyjwt.decode) as decode:
+        first = await auth._verify_token(token)
+        second = await auth._verify_token(token)
+
+    assert first == second
+    assert decode.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_cache_entry_is_verified_again():
+    private, key = make_key("k1")
+    token = make_token(private, "k1", exp_in=-10)
+    auth._token_cache.set(hashlib.sha256(token.encode()).digest(), {"exp": time.time() - 10})
+    with patch.object(auth, "_fetch_jwks", AsyncMock(return_value={"k1": key})):
+        with pytest.raises(pyjwt.ExpiredSignatureError):
+            await auth._verify_token(token)
+
+
+@pytest.mark.asyncio
+async def test_rotated_kid_refreshes_once_for_concurrent_requests():
+    old_private, old_key = make_key("old")
+    new_private, new_key = make_key("new")
+    auth._jwks_cache = {"old": old_key}
+    auth._jwks_fetched_at = time.monotonic() - 60
+
+    async def slow_fetch():
+        await asyncio.sleep(0.01)
+        return {"new": new_key}
+
+    fetch = AsyncMock(side_effect=slow_fetch)
+    tokens = [make_token(new_private, "new", exp_in=3600 + i) for i in range(5)]
+    with patch.object(auth, "_fetch_jwks", fetch):
+        results = await asyncio.gather(*(auth._verify_token(t) for t in tokens))
+
+    assert len(results) == 5
+    assert fetch.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_does_not_refetch_fresh_keys():
+    private, _ = make_key("stranger")
+    _, key = make_key("k1")
+    auth._jwks_cache = {"k1": key}
+    auth._jwks_fetched_at = time.monotonic()
+    fetch = AsyncMock()
+    with patch.object(auth, "_fetch_jwks", fetch):
+        with pytest.raises(pyjwt.InvalidTokenError):
+            await auth._verify_token(make_token(private, "stranger"))
+    fetch.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_backs_off_instead_of_retrying_per_request():
+    _, old_key = make_key("old")
+    new_private, _ = make_key("new")
+    auth._jwks_cache = {"old": old_key}
+    auth._jwks_fetched_at = time.monotonic() - 60
+
+    fetch = AsyncMock(side_effect=httpx.ConnectTimeout("down"))
+    tokens = [make_token(new_private, "new", exp_in=3600 + i) for i in range(5)]
+    with patch.object(auth, "_fetch_jwks", fetch):
+        for token in tokens:
+            with pytest.raises(pyjwt.InvalidTokenError):
+                await auth._verify_token(token)
+
+    assert fetch.await_count == 1
+    assert auth._jwks_cache == {"old": old_key}
+
+
+@pytest.mark.asyncio
+async def test_failed_first_fetch_backs_off_too():
+    fetch = AsyncMock(side_effect=httpx.ConnectTimeout("down"))
+    with patch.object(auth, "_fetch_jwks", fetch):
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPError):
+                await auth._get_jwks()
+    assert fetch.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_identity_is_cached_until_invalidated():
+    import uuid
+    from unittest.mock import MagicMock
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    user_id = uuid.UUID("00000000-0000-0000-0000-00000000000a")
+    result = MagicMock()
+    result.one_or_none.return_value = (user_id, "Alice", "alice@example.com", None)
+    db = AsyncMock()
+    db.execute.return_value = result
+    creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials="token")
+    auth._user_cache.clear()
+
+    with patch.object(auth, "_verify_token", AsyncMock(return_value={"sub": str(user_id)})):
+        first = await auth.get_current_identity(creds, db)
+        second = await auth.get_current_identity(creds, db)
+        auth.invalidate_user(user_id)
+        await auth.get_current_identity(creds, db)
+
+    assert first == second == auth.UserSnapshot(user_id, "Alice", "alice@example.com", None)
+    assert db.execute.await_count == 2
@@ -87,5 +87,127 @@ class TestCurrencyUtils(unittest.TestCase):
         self.assertEqual(shares["u3"], Decimal("10.01"))
         self.assertEqual(sum(shares.values()), Decimal("30.03"))
 
+    def _random_batch(self, items=60, members=12):
+        import random
+        rng = random.Random(7)
+        users = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(members)]
+        amounts = [Decimal(rng.randint(-500, 100000)) / 100 for _ in range(items)]
+        incidence = [[rng.random() < 0.6 for _ in users] for _ in range(items)]
+        seeds = [str(uuid.UUID(int=rng.getrandbits(128))) if i % 5 else None for i in range(items)]
+        return amounts, users, incidence, seeds
+
+    def _expected(self, amounts, users, incidence, seeds):
+        return [
+            compute_shares(amount, [u for u, on in zip(users, row) if on], seed=seed)
+            for amount, row, seed in zip(amounts, incidence, seeds)
+        ]
+
+    def test_compute_shares_batch_matches_per_item(self):
+        """Batch split gives exactly the per-item compute_shares allocation."""
+        from app.utils.currency_utils import compute_shares_batch
+
+        amounts, users, incidence, seeds = self._random_batch()
+        self.assertEqual(
+            compute_shares_batch(amounts, users, incidence, seeds),
+            self._expected(amounts, users, incidence, seeds),
+        )
+
+    def test_compute_shares_batch_without_numpy(self):
+        from unittest.mock import patch
+        from app.utils import currency_utils
+
+        amounts, users, incidence, seeds = self._random_batch(items=10, members=4)
+        with patch.object(currency_utils, "np", None):
+            result = currency_utils.compute_shares_batch(amounts, users, incidence, seeds)
+        self.assertEqual(result, self._expected(amounts, users, incidence, seeds))
+
+    def test_compute_shares_batch_sums_exactly(self):
+        from app.utils.currency_utils import compute_shares_batch
+
+        amounts = [Decimal("10.00"), Decimal("0.04"), Decimal("7.77")]
+        users = ["u1", "u2", "u3"]
+        results = compute_shares_batch(amounts, users, [[True] * 3] * 3, ["a", "b", "c"])
+        for amount, shares in zip(amounts, results):
+            self.assertEqual(sum(shares.values()), amount)
+
+    def test_rotate_order_fair_and_reproducible(self):
+        """Version 2 spreads the extra cent across users and is stable per seed."""
+        from app.utils.currency_utils import SPLIT_ORDER_ROTATE
+
+        amount = Decimal("0.04")
+        users = ["u1", "u2", "u3"]
+        counts = defaultdict(int)
+        for i in range(300):
+            seed = f"item-{i}"
+            shares = compute_shares(amount, users, seed=seed, order_version=SPLIT_ORDER_ROTATE)
+            self.assertEqual(shares, compute_shares(amount, users, seed=seed, order_version=SPLIT_ORDER_ROTATE))
+            self.assertEqual(sum(shares.values()), amount)
+            for uid, share in shares.items():
+                if share == Decimal("0.02"):
+                    counts[uid] += 1
+        for uid in users:
+            self.assertGreater(counts[uid], 60)
+
+    def test_default_order_is_legacy_md5(self):
+        """Shares stored before versioning still reproduce with the default."""
+        from app.utils.currency_utils import SPLIT_ORDER_MD5
+
+        users = ["u1", "u2", "u3"]
+        self.assertEqual(
+            compute_shares(Decimal("10.00"), users, seed="s"),
+            compute_shares(Decimal("10.00"), users, seed="s", order_version=SPLIT_ORDER_MD5),
+        )
+
+    def test_compute_shares_batch_rotate_matches_per_item(self):
+        from app.utils.currency_utils import SPLIT_ORDER_ROTATE, compute_shares_batch
+
+        amounts, users, incidence, seeds = self._random_batch()
+        expected = [
+            compute_shares(a, [u for u, on in zip(users, row) if on], seed=seed, order_version=SPLIT_ORDER_ROTATE)
+            for a, row, seed in zip(amounts, incidence, seeds)
+        ]
+        self.assertEqual(
+            compute_shares_batch(amounts, users, incidence, seeds, order_version=SPLIT_ORDER_ROTATE),
+            expected,
+        )
+
+    def test_compute_shares_batch_hashes_each_user_set_once(self):
+        """Re-splitting the same items reuses the cached md5 order."""
+        from app.utils.currency_utils import _md5_order, compute_shares_batch
+
+        amounts, users, incidence, seeds = self._random_batch()
+        _md5_order.cache_clear()
+        first = compute_shares_batch(amounts, users, incidence, seeds)
+        misses = _md5_order.cache_info().misses
+        self.assertEqual(compute_shares_batch(amounts, users, incidence, seeds), first)
+        self.assertEqual(_md5_order.cache_info().misses, misses)
+        # Cached orders are shared with the per-item path
+        self.assertEqual(first, self._expected(amounts, users, incidence, seeds))
+        self.assertEqual(_md5_order.cache_info().misses, misses)
+
+    def test_compute_shares_batch_item_without_users(self):
+        from app.utils.currency_utils import compute_shares_batch
+
+        results = compute_shares_batch(
+            [Decimal("1.00"), Decimal("0.10")], ["u1", "u2"], [[False, False], [True, True]], ["a", "b"],
+        )
+        self.assertEqual(results, [{}, {"u1": Decimal("0.05"), "u2": Decimal("0.05")}])
+
+    def test_compute_receipt_shares_batch_matches_per_receipt(self):
+        from app.utils.currency_utils import compute_receipt_shares, compute_receipt_shares_batch
+
+        amounts, users, incidence, seeds = self._random_batch(items=30, members=5)
+        receipts = [
+            [{"amount": a, "user_ids": [u for u, on in zip(users, row) if on]} for a, row in
+             zip(amounts[k:k + 6], incidence[k:k + 6])]
+            for k in range(0, 30, 6)
+        ]
+        receipt_seeds = ["r1", None, "r3", "r4", "r5"]
+        self.assertEqual(
+            compute_receipt_shares_batch(receipts, receipt_seeds),
+            [compute_receipt_shares(items, seed=seed) for items, seed in zip(receipts, receipt_seeds)],
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,46 @@
+import httpx
+import pytest
+
+from app.core.http_client import HttpClientRegistry, OTHER_HOSTS
+
+HOSTS = ["open.er-api.com", "example.supabase.co"]
+
+
+@pytest.mark.asyncio
+async def test_one_client_per_host_with_stats():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True}))
+    registry = HttpClientRegistry(transport=transport, hosts=HOSTS)
+
+    rates = registry.client("https://open.er-api.com/v6/latest/SGD")
+    assert registry.client("https://open.er-api.com/v6/latest/USD") is rates
+    assert registry.client("https://example.supabase.co/auth/v1/.well-known/jwks.json") is not rates
+
+    for _ in range(3):
+        await rates.get("https://open.er-api.com/v6/latest/SGD")
+
+    stats = registry.stats()["hosts"]["open.er-api.com"]
+    assert stats["requests"] == stats["responses"] == 3
+    assert stats["avg_ms"] >= 0
+
+    await registry.aclose()
+    assert rates.is_closed
+    assert registry.client("https://open.er-api.com/v6/latest/SGD") is not rates
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_unknown_hosts_share_one_client():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200))
+    registry = HttpClientRegistry(transport=transport, hosts=HOSTS)
+
+    images = [f"https://img{i}.example.com/receipt.jpg" for i in range(5)]
+    clients = {id(registry.client(url)) for url in images}
+    assert len(clients) == 1
+    for url in images:
+        await registry.client(url).get(url)
+
+    hosts = registry.stats()["hosts"]
+    assert set(hosts) == {OTHER_HOSTS}
+    assert hosts[OTHER_HOSTS]["requests"] == 5
+    await registry.aclose()
+
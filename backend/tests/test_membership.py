@@ -0,0 +1,102 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+from fastapi import HTTPException
+
+from app.core import membership
+from app.core.auth import UserSnapshot
+
+ALICE = UserSnapshot(uuid.uuid4(), "Alice", "alice@example.com", None)
+TRIP, OTHER = uuid.uuid4(), uuid.uuid4()
+
+
+def _scalars(values):
+    r = MagicMock()
+    r.scalars.return_value.all.return_value = values
+    r.scalar_one_or_none.return_value = values[0] if values else None
+    return r
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    membership._user_groups.clear()
+    membership._receipt_groups.clear()
+    membership._item_groups.clear()
+    membership._payment_groups.clear()
+
+
+@pytest.mark.asyncio
+async def test_cached_membership_needs_no_query():
+    db = AsyncMock()
+    db.execute.side_effect = [_scalars([TRIP])]
+
+    assert await membership.require_group_member(TRIP, ALICE, db) == ALICE
+    assert await membership.require_group_member(TRIP, ALICE, db) == ALICE
+    assert db.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_non_member_is_rechecked_then_refused():
+    db = AsyncMock()
+    db.execute.side_effect = [_scalars([TRIP]), _scalars([TRIP])]
+    await membership.require_group_member(TRIP, ALICE, db)
+
+    with pytest.raises(HTTPException) as exc:
+        await membership.require_group_member(OTHER, ALICE, db)
+    assert exc.value.status_code == 403
+    assert db.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_receipt_resolves_group_once():
+    receipt_id = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.side_effect = [_scalars([TRIP]), _scalars([TRIP])]
+
+    await membership.require_receipt_member(receipt_id, ALICE, db)
+    await membership.require_receipt_member(receipt_id, ALICE, db)
+    assert db.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_unknown_receipt_is_not_found():
+    db = AsyncMock()
+    db.execute.side_effect = [_scalars([])]
+    with pytest.raises(HTTPException) as exc:
+        await membership.require_receipt_member(uuid.uuid4(), ALICE, db)
+    assert exc.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_item_of_another_group_is_refused():
+    item_id = uuid.uuid4()
+    db = AsyncMock()
+    # item -> owning group, then the caller's memberships
+    db.execute.side_effect = [_scalars([OTHER]), _scalars([TRIP])]
+
+    with pytest.raises(HTTPException) as exc:
+        await membership.require_item_member(item_id, ALICE, db)
+    assert exc.value.status_code == 403
+    assert "line_items" in str(db.execute.await_args_list[0].args[0])
+
+
+@pytest.mark.asyncio
+async def test_payment_resolves_group_once():
+    payment_id = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.side_effect = [_scalars([TRIP]), _scalars([TRIP])]
+
+    await membership.require_payment_member(payment_id, ALICE, db)
+    await membership.require_payment_member(payment_id, ALICE, db)
+    assert db.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_unknown_payment_is_not_found():
+    db = AsyncMock()
+    db.execute.side_effect = [_scalars([])]
+
+    with pytest.raises(HTTPException) as exc:
+        await membership.require_payment_member(uuid.uuid4(), ALICE, db)
+    assert exc.value.status_code == 404
+
@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+import pytest
+
+from app.services.ocr_queue_service import LeaseLost
+from app.workers import ocr
+
+WORKER = "host:1"
+
+
+def make_job(attempts=1):
+    return SimpleNamespace(id=uuid.uuid4(), receipt_id=uuid.uuid4(), currency=None, attempts=attempts)
+
+
+class _Session:
+    async def __aenter__(self):
+        return AsyncMock()
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+@pytest.fixture
+def queue():
+    """Patch the worker's session factory and queue calls; yields the mocks."""
+    mocks = SimpleNamespace(
+        heartbeat=AsyncMock(return_value=True),
+        complete=AsyncMock(),
+        fail=AsyncMock(return_value=True),
+    )
+    with patch.object(ocr, "async_session_factory", _Session), \
+         patch.object(ocr, "heartbeat_ocr_job", mocks.heartbeat), \
+         patch.object(ocr, "complete_ocr_job", mocks.complete), \
+         patch.object(ocr, "fail_ocr_job", mocks.fail), \
+         patch.object(ocr.settings, "ocr_job_lease_seconds", 0.03):
+        yield mocks
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_cancels_processing(queue):
+    queue.heartbeat.return_value = False
+    started, finished = asyncio.Event(), asyncio.Event()
+
+    async def slow_ocr(*args):
+        started.set()
+        await asyncio.sleep(1)
+        finished.set()
+
+    with patch.object(ocr, "process_receipt_ocr", slow_ocr):
+        await asyncio.wait_for(ocr._run_job(make_job(), WORKER), timeout=0.5)
+
+    assert started.is_set() and not finished.is_set()
+    queue.complete.assert_not_awaited()
+    queue.fail.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failing_heartbeat_cancels_processing(queue):
+    queue.heartbeat.side_effect = ConnectionError("db down")
+
+    async def slow_ocr(*args):
+        await asyncio.sleep(1)
+
+    with patch.object(ocr, "process_receipt_ocr", slow_ocr):
+        await asyncio.wait_for(ocr._run_job(make_job(), WORKER), timeout=0.5)
+
+    queue.complete.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_processing_error_goes_to_retry(queue):
+    job = make_job()
+    with patch.object(ocr, "process_receipt_ocr", AsyncMock(side_effect=ValueError("bad json"))):
+        await ocr._run_job(job, WORKER)
+
+    _, failed_job, worker_id, error, tb = queue.fail.await_args.args
+    assert (failed_job, worker_id, error) == (job, WORKER, "bad json")
+    assert "ValueError" in tb
+    queue.complete.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_reclaimed_job_is_neither_completed_nor_failed(queue):
+    with patch.object(ocr, "process_receipt_ocr", AsyncMock(side_effect=LeaseLost("reclaimed"))):
+        await ocr._run_job(make_job(), WORKER)
+
+    queue.complete.assert_not_awaited()
+    queue.fail.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_success_completes_job(queue):
+    job = make_job()
+    with patch.object(ocr, "process_receipt_ocr", AsyncMock()) as process:
+        await ocr._run_job(job, WORKER)
+
+    process.assert_awaited_once_with(job.receipt_id, job.currency, job.id, WORKER)
+    queue.complete.assert_awaited_once()
@@ -0,0 +1,25 @@
+from unittest.mock import patch
+
+from app.core import database
+
+
+def test_only_slow_checkouts_count_as_waits():
+    stats = dict.fromkeys(database._stats, 0)
+    stats.update(wait_ms_total=0.0, wait_ms_max=0.0)
+    with patch.dict(database._stats, stats), \
+         patch.object(database.settings, "db_pool_wait_threshold_ms", 5.0):
+        for ms in (0.1, 0.4, 12.0, 0.2, 8.0):
+            database._record_checkout_time(ms)
+        result = database.pool_stats()
+
+    assert result["waits"] == 2
+    assert result["wait_ms_avg"] == 10.0
+    assert result["wait_ms_max"] == 12.0
+
+
+def test_connection_listeners_cover_the_read_engine():
+    from sqlalchemy import event
+
+    for engine in (database.engine, database.read_engine):
+        assert event.contains(engine.sync_engine, "connect", database._on_connect)
+        assert event.contains(engine.sync_engine, "checkout", database._on_checkout)
@@ -0,0 +1,52 @@
+from unittest.mock import patch
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.query_counter import (
+    QueryBudgetExceeded, instrument_engine, query_budget, track_queries,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    return engine
+
+
+def test_counts_statements_and_repeats(engine):
+    with engine.connect() as conn, track_queries() as queries:
+        for i in range(5):
+            conn.execute(text("SELECT :i"), {"i": i})
+        conn.execute(text("SELECT 1"))
+
+    assert queries.count == 6
+    assert queries.total_ms > 0
+    assert queries.repeated(threshold=5) == [("SELECT ?", 5)]
+
+
+def test_untracked_statements_are_ignored(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with track_queries() as queries:
+            pass
+    assert queries.count == 0
+
+
+def test_strict_mode_raises_on_the_statement_over_budget(engine):
+    with patch("app.core.query_counter.settings.query_budget_strict", True), \
+         engine.connect() as conn, track_queries(budget=1) as queries:
+        conn.execute(text("SELECT 1"))
+        with pytest.raises(QueryBudgetExceeded):
+            conn.execute(text("SELECT 2"))
+    assert queries.over_budget()
+
+
+@pytest.mark.asyncio
+async def test_budget_dependency_sets_the_tracked_budget(engine):
+    with engine.connect() as conn, track_queries() as queries:
+        conn.execute(text("SELECT 1"))
+        await query_budget(3)()
+        conn.execute(text("SELECT 2"))
+    assert queries.budget == 3
+    assert not queries.over_budget()
@@ -0,0 +1,27 @@
+import time
+from unittest.mock import patch
+
+from starlette.requests import Request
+
+from app.core.database import READ_PIN_HEADER, is_read_pinned
+
+
+def make_request(pin=None):
+    headers = [(READ_PIN_HEADER.lower().encode(), str(pin).encode())] if pin is not None else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_fresh_pin_is_honoured():
+    with patch("app.core.database.settings.read_pin_seconds", 5):
+        assert is_read_pinned(make_request(int(time.time()) + 5))
+
+
+def test_expired_or_missing_pin_is_not():
+    assert not is_read_pinned(make_request())
+    assert not is_read_pinned(make_request(int(time.time()) - 1))
+    assert not is_read_pinned(make_request("soon"))
+
+
+def test_pin_beyond_the_window_is_ignored():
+    with patch("app.core.database.settings.read_pin_seconds", 5):
+        assert not is_read_pinned(make_request(9999999999))
@@ -0,0 +1,108 @@
+import json
+import threading
+import uuid
+from unittest.mock import MagicMock, patch
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core import slow_query_log
+
+
+@pytest.fixture
+def slow_engine(tmp_path):
+    log_path = tmp_path / "slow.jsonl"
+    with patch.multiple(
+        slow_query_log.settings,
+        slow_query_ms=1e-9, slow_query_log_path=str(log_path), slow_query_explain=False,
+    ):
+        engine = create_engine("sqlite://")
+        slow_query_log.instrument_engine(engine)
+        slow_query_log.clear()
+        yield engine, log_path
+    slow_query_log.clear()
+
+
+def test_parameters_are_redacted_to_types(slow_engine):
+    engine, log_path = slow_engine
+    secret = str(uuid.uuid4())
+    with engine.connect() as conn:
+        conn.execute(text("SELECT :email, :n"), {"email": secret, "n": 3})
+
+    slow_query_log.flush()
+    line = log_path.read_text()
+    assert secret not in line
+    entry = json.loads(line)
+    assert entry["statement"] == "SELECT ?, ?"
+    assert entry["parameters"] == ["str", "int"]
+
+
+def test_worst_queries_ranks_and_groups(slow_engine):
+    slow_query_log.record("SELECT 1", None, 5.0)
+    slow_query_log.record("SELECT 2", None, 50.0)
+    slow_query_log.record("SELECT  1", None, 60.0)
+
+    worst = slow_query_log.worst_queries(limit=2)
+
+    assert [e["ms"] for e in worst["slowest"]] == [60.0, 50.0]
+    assert worst["by_statement"][0] == {"statement": "SELECT 1", "count": 2, "total_ms": 65.0, "max_ms": 60.0}
+
+
+def test_log_file_is_written_off_the_calling_thread(slow_engine):
+    _, log_path = slow_engine
+    writers = []
+    real_open = open
+
+    def tracking_open(*args, **kwargs):
+        writers.append(threading.current_thread())
+        return real_open(*args, **kwargs)
+
+    with patch("builtins.open", tracking_open):
+        slow_query_log.record("SELECT 1", None, 5.0)
+        slow_query_log.record("SELECT 2", None, 6.0)
+        slow_query_log.flush()
+
+    assert writers and threading.current_thread() not in writers
+    assert [json.loads(l)["statement"] for l in log_path.read_text().splitlines()] == ["SELECT 1", "SELECT 2"]
+
+
+def test_disabled_by_default():
+    engine = create_engine("sqlite://")
+    slow_query_log.instrument_engine(engine)
+    slow_query_log.clear()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert slow_query_log.worst_queries()["recorded"] == 0
+
+
+def test_failed_explain_rolls_back_to_savepoint():
+    def execute(sql, *args):
+        if sql.startswith("EXPLAIN"):
+            raise RuntimeError("syntax error")
+
+    cursor = MagicMock()
+    cursor.execute.side_effect = execute
+    conn = MagicMock()
+    conn.connection.cursor.return_value = cursor
+
+    assert slow_query_log._explain(conn, "SELECT 1", ()) is None
+    assert [c.args[0] for c in cursor.execute.call_args_list] == [
+        "SAVEPOINT slow_query_explain",
+        "EXPLAIN (ANALYZE off) SELECT 1",
+        "ROLLBACK TO SAVEPOINT slow_query_explain",
+    ]
+    cursor.close.assert_called_once()
+
+
+def test_explain_enabled_keeps_connection_usable(slow_engine):
+    engine, _ = slow_engine
+    with patch.object(slow_query_log.settings, "slow_query_explain", True):
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            conn.execute(text("INSERT INTO t VALUES (1)"))
+            # SQLite rejects Postgres' EXPLAIN options; the statement must still succeed
+            assert conn.execute(text("SELECT x FROM t")).scalar() == 1
+            assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 1
+
+    entries = slow_query_log.worst_queries()["slowest"]
+    assert any(e["statement"] == "SELECT x FROM t" and e["plan"] is None for e in entries)
+
@@ -22,18 +22,27 @@ async function getAccessToken(): Promise<string | null> {
   return null;
 }
 
+// Read-your-writes pin (unix expiry) returned after writes; echoed back so
+// reads go to the primary instead of a lagging replica until it expires
+let readPin: string | null = null;
+
 export async function apiFetch(path: string, options: RequestInit = {}) {
   const token = await getAccessToken();
+  const pinned = readPin && Number(readPin) * 1000 > Date.now();
 
   const res = await fetch(`${API_URL}${path}`, {
     ...options,
     headers: {
       "Content-Type": "application/json",
       ...(token && { Authorization: `Bearer ${token}` }),
+      ...(pinned && { "X-Read-Pin": readPin as string }),
       ...options.headers,
     },
   });
 
+  const pin = res.headers.get("X-Read-Pin");
+  if (pin) readPin = pin;
+
   if (!res.ok) {
     const error = await res.json().catch(() => ({ detail: res.statusText }));
     let errorMessage = error.detail || res.statusText;